@@ -0,0 +1,183 @@
+import argparse
+import gzip
+import json
+import os
+import time
+import tracemalloc
+from dotenv import load_dotenv
+
+from payloads import GZIP_LEVEL, EncodedContext, encode_payload, gzip_body, payload_preview
+
+# Measures what the scraped context costs per deck: the old path serialized the page separately
+# for the outline request and the calibration request and sent both uncompressed; the new path
+# encodes it to bytes once and gzips the calibration body. --memory compares peak allocations.
+# The context is a real scraped page (or several, joined the way multi_source.py joins them), so
+# the gzip ratio is that of real markdown rather than of a synthetic vocabulary.
+#
+#   python bench_context.py --url https://example.com/docs
+#   python bench_context.py --file page.md --mbps 20
+#   python bench_context.py --url https://example.com --live      (also times real calibration uploads)
+#   python bench_context.py --url https://a.example --url https://b.example --memory
+
+load_dotenv()
+
+
+def scraped_pages(urls):
+    """Scrapes each URL (bypassing the shared cache) and joins the pages under per-source headings."""
+    from work import fetch_website_content
+
+    return "\n\n".join(f"# Source: {url}\n\n{fetch_website_content(url)}" for url in urls)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run_offline(content, mbps):
+    outline_fields = {"auth_token": "x" * 40, "presentation_id": "p" * 36, "presentation_instructions": "i" * 80,
+                      "slide_order": 0, "slide_range": "2-5"}
+    calibration_fields = {"presentation_id": "p" * 36}
+
+    def old_path():
+        outline = json.dumps({**outline_fields, "raw_context": content})
+        calibration = json.dumps({**calibration_fields, "raw_context": content})
+        return outline.encode("utf-8"), calibration.encode("utf-8")
+
+    def new_path():
+        context = EncodedContext(content)
+        outline = encode_payload(outline_fields, context=context)
+        calibration = encode_payload(calibration_fields, context=context)
+        return outline, gzip_body(calibration)
+
+    (old_outline, old_calibration), old_cpu = timed(old_path)
+    (new_outline, new_calibration), new_cpu = timed(new_path)
+
+    old_bytes = len(old_outline) + len(old_calibration)
+    new_bytes = len(new_outline) + len(new_calibration)
+    bytes_per_second = mbps * 1_000_000 / 8
+    old_latency = old_cpu + old_bytes / bytes_per_second
+    new_latency = new_cpu + new_bytes / bytes_per_second
+    return {
+        "context_bytes": len(content.encode("utf-8")),
+        "old_bytes_sent": old_bytes,
+        "new_bytes_sent": new_bytes,
+        "bytes_saved": old_bytes - new_bytes,
+        "old_cpu_seconds": round(old_cpu, 4),
+        "new_cpu_seconds": round(new_cpu, 4),
+        "uplink_mbps": mbps,
+        "old_estimated_upload_seconds": round(old_latency, 3),
+        "new_estimated_upload_seconds": round(new_latency, 3),
+    }
+
+
+def run_memory(content):
+    """Peak memory of building, logging and handing off both context requests, old path vs new."""
+    outline_fields = {"auth_token": "x" * 40, "presentation_id": "p" * 36, "presentation_instructions": "i" * 80,
+                      "slide_order": 0, "slide_range": "2-5"}
+    calibration_fields = {"presentation_id": "p" * 36}
+    sent = []
+
+    def old_path():
+        # What work.py did before: pretty-print each request for the log, then serialize it again
+        # for the transport (ws.send and requests' json= both encode the string to bytes).
+        request_data = {**outline_fields, "raw_context": content}
+        log_line = f"Sending outline request: {json.dumps(request_data, indent=2)}"
+        sent.append(len(json.dumps(request_data).encode("utf-8")))
+        del log_line
+        payload = {**calibration_fields, "raw_context": content}
+        log_line = f"Requesting calibration sample text with payload: {json.dumps(payload, indent=2)}"
+        sent.append(len(json.dumps(payload).encode("utf-8")))
+        del log_line
+
+    def new_path():
+        # The outline request goes out as WebSocket frames and the calibration request is read by
+        # http.client in blocks, so only one chunk of either is ever copied at a time.
+        context = EncodedContext(content)
+        body = encode_payload(outline_fields, context=context)
+        log_line = f"Sending outline request: {payload_preview(body)}"
+        sent.append(sum(len(bytes(chunk)) for chunk in body.iter_chunks()))
+        del body, log_line
+        body = encode_payload(calibration_fields, context=context)
+        log_line = f"Requesting calibration sample text with payload: {payload_preview(body)}"
+        reader = body.reader()
+        sent.append(sum(len(block) for block in iter(lambda: reader.read(8192), b"")))
+        del body, reader, log_line
+
+    def peak(fn):
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    context_bytes = len(content.encode("utf-8"))
+    old_peak = peak(old_path)
+    new_peak = peak(new_path)
+    return {
+        "context_bytes": context_bytes,
+        "old_peak_bytes": old_peak,
+        "new_peak_bytes": new_peak,
+        "old_peak_per_context_byte": round(old_peak / context_bytes, 2),
+        "new_peak_per_context_byte": round(new_peak / context_bytes, 2),
+        "peak_reduction": round(1 - new_peak / old_peak, 3) if old_peak else 0.0,
+    }
+
+
+def run_live(content, auth_token):
+    import requests
+    from work import create_new_presentation, http_session
+
+    presentation = create_new_presentation(auth_token)
+    if not presentation:
+        return {"error": "Could not create a presentation for the live benchmark"}
+    url = "https://alai-standalone-backend.getalai.com/get-calibration-sample-text"
+    headers = {"Content-Type": "application/json", "Accept": "application/json", "Authorization": f"Bearer {auth_token}"}
+    body = encode_payload({"presentation_id": presentation["id"]}, context=content).tobytes()
+
+    def post(data, extra_headers):
+        try:
+            return http_session.post(url, headers={**headers, **extra_headers}, data=data).status_code
+        except requests.exceptions.RequestException as e:
+            return str(e)
+
+    plain_status, plain_seconds = timed(lambda: post(body, {}))
+    gzip_status, gzip_seconds = timed(lambda: post(gzip.compress(body, compresslevel=GZIP_LEVEL), {"Content-Encoding": "gzip"}))
+    return {
+        "plain_status": plain_status,
+        "plain_seconds": round(plain_seconds, 3),
+        "gzip_status": gzip_status,
+        "gzip_seconds": round(gzip_seconds, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark context upload size and time.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", action="append", help="Page to scrape as the context (repeat to join several)")
+    source.add_argument("--file", help="Markdown file with a previously scraped page")
+    parser.add_argument("--mbps", type=float, default=20.0, help="Uplink bandwidth used for the latency estimate")
+    parser.add_argument("--memory", action="store_true", help="Also measure peak memory with tracemalloc")
+    parser.add_argument("--live", action="store_true", help="Also time real calibration uploads (needs AUTH_TOKEN)")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            content = f.read()
+    else:
+        content = scraped_pages(args.url)
+    if not content.strip():
+        print("The context is empty; nothing to benchmark.")
+        exit(1)
+
+    print(json.dumps(run_offline(content, args.mbps), indent=2))
+    if args.memory:
+        print(json.dumps(run_memory(content), indent=2))
+    if args.live:
+        auth_token = os.getenv("AUTH_TOKEN")
+        if not auth_token:
+            print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+            exit(1)
+        print(json.dumps(run_live(content, auth_token), indent=2))
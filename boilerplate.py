@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from urllib.parse import urlparse
+
+# Cross-site boilerplate learning.
+#
+# Scraped pages are cut into content-defined chunks: a chunk ends after a blank line, or after a
+# line whose hash matches BOUNDARY_MASK, so an edit only moves the boundaries next to it and nav
+# bars, cookie banners and footers produce the same chunk on every page of a domain. Chunk
+# frequencies are tracked per domain across runs, and chunks seen on most pages of a domain are
+# stripped before the content is sent to the backend. Pages are identified by URL (host and
+# path), so re-scraping an edited page replaces its chunks instead of counting as another page.
+
+BOILERPLATE_DB = "boilerplate.db"
+BOUNDARY_MASK = 0x7
+MIN_CHUNK_LINES = 1
+MAX_CHUNK_LINES = 40
+MIN_PAGES = 3
+MIN_PAGE_RATIO = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    domain TEXT NOT NULL,
+    page_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (domain, page_key)
+);
+CREATE TABLE IF NOT EXISTS page_chunks (
+    domain TEXT NOT NULL,
+    page_key TEXT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    PRIMARY KEY (domain, page_key, chunk_hash)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    domain TEXT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (domain, chunk_hash)
+);
+CREATE TABLE IF NOT EXISTS savings (
+    domain TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    bytes_in INTEGER NOT NULL,
+    bytes_saved INTEGER NOT NULL
+);
+"""
+
+
+def chunk_content(content):
+    """Splits text into content-defined chunks of whole lines."""
+    chunks = []
+    current = []
+    for line in (content or "").splitlines(keepends=True):
+        current.append(line)
+        stripped = line.strip()
+        at_boundary = not stripped or (zlib.crc32(stripped.encode("utf-8")) & BOUNDARY_MASK) == 0
+        if (at_boundary and len(current) >= MIN_CHUNK_LINES) or len(current) >= MAX_CHUNK_LINES:
+            chunks.append("".join(current))
+            current = []
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def chunk_hash(chunk):
+    normalized = " ".join(chunk.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest() if normalized else None
+
+
+def url_domain(url):
+    return urlparse(url).netloc.lower() or url
+
+
+def page_key(url):
+    """Host and path of a URL, so query strings, fragments and trailing slashes name the same page."""
+    parsed = urlparse(url)
+    if not parsed.netloc:
+        return url.rstrip("/")
+    return f"{parsed.netloc.lower()}{parsed.path.rstrip('/') or '/'}"
+
+
+class BoilerplateStore:
+    def __init__(self, path=BOILERPLATE_DB, min_pages=MIN_PAGES, min_page_ratio=MIN_PAGE_RATIO):
+        self.path = path
+        self.min_pages = min_pages
+        self.min_page_ratio = min_page_ratio
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(pages)")]
+            if "page_hash" in columns:
+                # Stores from before pages were keyed by URL counted every edit of a page as a new
+                # page; their counts cannot be corrected, so learning starts over.
+                print(f"Resetting boilerplate store {self.path}: pages were counted by content hash.")
+                conn.execute("DROP TABLE pages")
+                conn.execute("DROP TABLE IF EXISTS chunks")
+            conn.executescript(SCHEMA)
+
+    def learn(self, conn, domain, url, content, chunks):
+        """Counts each distinct chunk once per distinct page (URL) of the domain."""
+        key = page_key(url)
+        content_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        now = time.time()
+        row = conn.execute(
+            "SELECT content_hash FROM pages WHERE domain = ? AND page_key = ?", (domain, key)
+        ).fetchone()
+        if row and row[0] == content_hash:
+            return
+        seen = {}
+        for chunk in chunks:
+            h = chunk_hash(chunk)
+            if h:
+                seen[h] = len(chunk.encode("utf-8"))
+        previous = {
+            r[0] for r in conn.execute(
+                "SELECT chunk_hash FROM page_chunks WHERE domain = ? AND page_key = ?", (domain, key)
+            )
+        }
+        added = [h for h in seen if h not in previous]
+        removed = [h for h in previous if h not in seen]
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (domain, page_key, content_hash, seen_at) VALUES (?, ?, ?, ?)",
+            (domain, key, content_hash, now),
+        )
+        conn.executemany(
+            "INSERT INTO page_chunks (domain, page_key, chunk_hash) VALUES (?, ?, ?)",
+            [(domain, key, h) for h in added],
+        )
+        conn.executemany(
+            "DELETE FROM page_chunks WHERE domain = ? AND page_key = ? AND chunk_hash = ?",
+            [(domain, key, h) for h in removed],
+        )
+        conn.executemany(
+            "INSERT INTO chunks (domain, chunk_hash, page_count, size, last_seen) VALUES (?, ?, 1, ?, ?) "
+            "ON CONFLICT (domain, chunk_hash) DO UPDATE SET page_count = page_count + 1, last_seen = excluded.last_seen",
+            [(domain, h, seen[h], now) for h in added],
+        )
+        conn.executemany(
+            "UPDATE chunks SET page_count = page_count - 1 WHERE domain = ? AND chunk_hash = ?",
+            [(domain, h) for h in removed],
+        )
+
+    def boilerplate_hashes(self, conn, domain, hashes):
+        page_total = conn.execute("SELECT COUNT(*) FROM pages WHERE domain = ?", (domain,)).fetchone()[0]
+        if page_total < self.min_pages:
+            return set()
+        threshold = max(self.min_pages, self.min_page_ratio * page_total)
+        boilerplate = set()
+        hashes = list(hashes)
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT chunk_hash FROM chunks WHERE domain = ? AND page_count >= ? AND chunk_hash IN ({placeholders})",
+                [domain, threshold, *batch],
+            )
+            boilerplate.update(row[0] for row in rows)
+        return boilerplate
+
+    def strip(self, url, content):
+        """Learns from the page, then returns (content without boilerplate chunks, stats)."""
+        domain = url_domain(url)
+        chunks = chunk_content(content)
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            self.learn(conn, domain, url, content, chunks)
+            hashes = [chunk_hash(chunk) for chunk in chunks]
+            boilerplate = self.boilerplate_hashes(conn, domain, {h for h in hashes if h})
+            kept = [chunk for chunk, h in zip(chunks, hashes) if h not in boilerplate]
+            stripped = "".join(kept)
+            bytes_in = len(content.encode("utf-8"))
+            bytes_saved = bytes_in - len(stripped.encode("utf-8"))
+            conn.execute(
+                "INSERT INTO savings (domain, runs, bytes_in, bytes_saved) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT (domain) DO UPDATE SET runs = runs + 1, bytes_in = bytes_in + excluded.bytes_in, "
+                "bytes_saved = bytes_saved + excluded.bytes_saved",
+                (domain, bytes_in, bytes_saved),
+            )
+        stats = {
+            "domain": domain,
+            "chunks": len(chunks),
+            "boilerplate_chunks": len(chunks) - len(kept),
+            "bytes_in": bytes_in,
+            "bytes_saved": bytes_saved,
+        }
+        return stripped, stats
+
+    def stats(self):
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            rows = conn.execute(
+                "SELECT s.domain, s.runs, s.bytes_in, s.bytes_saved, "
+                "(SELECT COUNT(*) FROM pages p WHERE p.domain = s.domain) "
+                "FROM savings s ORDER BY s.bytes_saved DESC"
+            ).fetchall()
+        return [
+            {
+                "domain": domain,
+                "runs": runs,
+                "pages": pages,
+                "bytes_in": bytes_in,
+                "bytes_saved": bytes_saved,
+                "saved_ratio": round(bytes_saved / bytes_in, 3) if bytes_in else 0.0,
+            }
+            for domain, runs, bytes_in, bytes_saved, pages in rows
+        ]
+
+
+def strip_boilerplate(url, content, store=None):
+    if not content:
+        return content
+    store = store or BoilerplateStore()
+    stripped, stats = store.strip(url, content)
+    if not stripped.strip():
+        print(f"Boilerplate filter for {stats['domain']} would remove the whole page; keeping it unfiltered.")
+        return content
+    print(f"Boilerplate filter for {stats['domain']}: removed {stats['boilerplate_chunks']} of {stats['chunks']} chunks, "
+          f"saved {stats['bytes_saved']} of {stats['bytes_in']} bytes")
+    return stripped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show bytes saved by the boilerplate filter per domain.")
+    parser.add_argument("--db", default=BOILERPLATE_DB)
+    args = parser.parse_args()
+    print(json.dumps(BoilerplateStore(args.db).stats(), indent=2))
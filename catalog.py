@@ -0,0 +1,211 @@
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+# Local SQLite catalog of every deck generate_presentation() builds.
+#
+# decks holds one row per presentation (source URL, the URLs of a multi-source deck, context hash,
+# style, share link, timings) and
+# slides one row per slide (outline, chosen variant, the ids of every variant streamed, how its
+# stream ended and how long it took), so questions such as "latest deck for this URL" or "all slides that timed out"
+# are indexed lookups instead of searches through stdout and log files.
+#
+#   python catalog.py latest https://example.com
+#   python catalog.py slides --status timed_out
+#   python catalog.py deck <presentation_id>
+
+CATALOG_FILE = "catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    presentation_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    sources TEXT,
+    context_hash TEXT,
+    tone TEXT,
+    verbosity_level INTEGER,
+    status TEXT NOT NULL,
+    share_url TEXT,
+    outline_count INTEGER,
+    slide_count INTEGER,
+    outlines TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    time_to_first_view REAL,
+    total_time REAL
+);
+CREATE TABLE IF NOT EXISTS slides (
+    slide_id TEXT PRIMARY KEY,
+    presentation_id TEXT NOT NULL,
+    slide_order INTEGER NOT NULL,
+    heading TEXT,
+    outline TEXT,
+    status TEXT NOT NULL,
+    variant_id TEXT,
+    variant_count INTEGER,
+    variant_ids TEXT,
+    stream_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS decks_url_finished ON decks (url, finished_at);
+CREATE INDEX IF NOT EXISTS decks_context_hash ON decks (context_hash, finished_at);
+CREATE INDEX IF NOT EXISTS decks_finished ON decks (finished_at);
+CREATE INDEX IF NOT EXISTS slides_presentation ON slides (presentation_id, slide_order);
+CREATE INDEX IF NOT EXISTS slides_status ON slides (status);
+CREATE INDEX IF NOT EXISTS slides_variant ON slides (variant_id);
+"""
+
+DECK_COLUMNS = [
+    "presentation_id", "url", "sources", "context_hash", "tone", "verbosity_level", "status", "share_url",
+    "outline_count", "slide_count", "outlines", "started_at", "finished_at", "time_to_first_view", "total_time",
+]
+SLIDE_COLUMNS = [
+    "slide_id", "presentation_id", "slide_order", "heading", "outline", "status", "variant_id", "variant_count",
+    "variant_ids", "stream_seconds",
+]
+
+
+def _row_dict(row, json_fields=("outlines", "outline", "sources", "variant_ids")):
+    record = dict(row)
+    for field in json_fields:
+        if record.get(field):
+            record[field] = json.loads(record[field])
+    return record
+
+
+class PresentationCatalog:
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(decks)")}
+            if "sources" not in columns:
+                conn.execute("ALTER TABLE decks ADD COLUMN sources TEXT")
+            if "variant_ids" not in {row[1] for row in conn.execute("PRAGMA table_info(slides)")}:
+                conn.execute("ALTER TABLE slides ADD COLUMN variant_ids TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return closing(conn)
+
+    def record_deck(self, deck, slides):
+        """Inserts or replaces a deck and its slides."""
+        deck = {**deck, "outlines": json.dumps(deck.get("outlines") or []),
+                "sources": json.dumps(deck.get("sources") or [deck["url"]])}
+        deck.setdefault("finished_at", time.time())
+        rows = [
+            {**slide, "presentation_id": deck["presentation_id"], "heading": slide.get("outline", {}).get("heading"),
+             "outline": json.dumps(slide.get("outline")), "variant_ids": json.dumps(slide.get("variant_ids") or [])}
+            for slide in slides
+        ]
+        with self._connect() as conn, conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO decks ({', '.join(DECK_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(DECK_COLUMNS))})",
+                [deck.get(column) for column in DECK_COLUMNS],
+            )
+            conn.execute("DELETE FROM slides WHERE presentation_id = ?", (deck["presentation_id"],))
+            conn.executemany(
+                f"INSERT OR REPLACE INTO slides ({', '.join(SLIDE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(SLIDE_COLUMNS))})",
+                [[row.get(column) for column in SLIDE_COLUMNS] for row in rows],
+            )
+
+    def deck(self, presentation_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM decks WHERE presentation_id = ?", (presentation_id,)).fetchone()
+            if not row:
+                return None
+            slides = conn.execute(
+                "SELECT * FROM slides WHERE presentation_id = ? ORDER BY slide_order", (presentation_id,)
+            ).fetchall()
+        return {**_row_dict(row), "slides": [_row_dict(slide) for slide in slides]}
+
+    def latest_deck(self, url, status="complete"):
+        """Returns the most recent deck for a URL (any status when status is None), with its slides."""
+        query = "SELECT presentation_id FROM decks WHERE url = ?"
+        params = [url]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY finished_at DESC LIMIT 1", params).fetchone()
+        return self.deck(row["presentation_id"]) if row else None
+
+    def decks_for_context(self, context_hash, limit=20):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM decks WHERE context_hash = ? ORDER BY finished_at DESC LIMIT ?", (context_hash, limit)
+            ).fetchall()
+        return [_row_dict(row) for row in rows]
+
+    def slides_with_status(self, status, limit=100):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.*, d.url FROM slides s JOIN decks d ON d.presentation_id = s.presentation_id "
+                "WHERE s.status = ? ORDER BY d.finished_at DESC, s.slide_order LIMIT ?",
+                (status, limit),
+            ).fetchall()
+        return [_row_dict(row) for row in rows]
+
+    def stats(self):
+        with self._connect() as conn:
+            decks = conn.execute(
+                "SELECT status, COUNT(*), AVG(time_to_first_view), AVG(total_time) FROM decks GROUP BY status"
+            ).fetchall()
+            slides = conn.execute("SELECT status, COUNT(*), AVG(stream_seconds) FROM slides GROUP BY status").fetchall()
+        return {
+            "decks": {row[0]: {"count": row[1], "avg_time_to_first_view": row[2], "avg_total_time": row[3]} for row in decks},
+            "slides": {row[0]: {"count": row[1], "avg_stream_seconds": row[2]} for row in slides},
+        }
+
+
+_default_catalog = None
+
+
+def record_deck(deck, slides):
+    """Records a deck in the default catalog; failures are reported but never raised."""
+    global _default_catalog
+    try:
+        if _default_catalog is None:
+            _default_catalog = PresentationCatalog()
+        _default_catalog.record_deck(deck, slides)
+    except Exception as e:
+        print(f"Error recording deck {deck.get('presentation_id')} in the catalog: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the catalog of generated presentations.")
+    parser.add_argument("--catalog", default=CATALOG_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    latest_parser = subparsers.add_parser("latest", help="Latest deck for a URL")
+    latest_parser.add_argument("url")
+    latest_parser.add_argument("--any-status", action="store_true", help="Include failed and partial decks")
+
+    deck_parser = subparsers.add_parser("deck", help="One deck with its slides")
+    deck_parser.add_argument("presentation_id")
+
+    slides_parser = subparsers.add_parser("slides", help="Slides by outcome")
+    slides_parser.add_argument("--status", required=True,
+                               help="complete, early_stop, timed_out, error or no_variants")
+    slides_parser.add_argument("--limit", type=int, default=100)
+
+    subparsers.add_parser("stats", help="Deck and slide counts by status")
+
+    args = parser.parse_args()
+    catalog = PresentationCatalog(args.catalog)
+    start = time.perf_counter()
+    if args.command == "latest":
+        result = catalog.latest_deck(args.url, status=None if args.any_status else "complete")
+    elif args.command == "deck":
+        result = catalog.deck(args.presentation_id)
+    elif args.command == "slides":
+        result = catalog.slides_with_status(args.status, args.limit)
+    else:
+        result = catalog.stats()
+    print(json.dumps(result, indent=2))
+    print(f"Query took {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
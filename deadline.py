@@ -0,0 +1,86 @@
+import threading
+import time
+
+# Deadline budgeting for generate_presentation(deadline=...).
+#
+# A Deadline hands each step a share of the time that is left, keeps a reserve for publishing
+# the share link, and sets `cancel` when only that reserve remains so in-flight variant streams
+# stop. Every shortcut the pipeline takes to stay inside the deadline is recorded with
+# degrade() and reported with the result.
+
+SHARE_RESERVE_SECONDS = 3.0
+EST_SLIDE_SECONDS = 25.0
+CALIBRATION_MIN_SECONDS = 30.0
+EARLY_VARIANT_FRACTION = 0.5
+
+
+class Deadline:
+    def __init__(self, seconds, reserve=SHARE_RESERVE_SECONDS):
+        self.seconds = seconds
+        self.reserve = min(reserve, seconds / 4)
+        self.started = time.monotonic()
+        self.cancel = threading.Event()
+        self.degradations = []
+        self.lock = threading.Lock()
+        self.timer = threading.Timer(max(0.0, seconds - self.reserve), self.cancel.set)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        """Seconds left for pipeline work, not counting the share link reserve."""
+        return max(0.0, self.seconds - self.reserve - self.elapsed())
+
+    def fraction_left(self):
+        return self.remaining() / max(self.seconds - self.reserve, 1e-9)
+
+    def expired(self):
+        return self.cancel.is_set() or self.remaining() <= 0
+
+    def publish_timeout(self):
+        """Timeout for a publishing request (activating a variant, the share link): the time left
+        before the deadline itself, reserve included, and never less than the reserve."""
+        return max(self.reserve, self.seconds - self.elapsed())
+
+    def budget(self, cap, share=1.0):
+        """Timeout for a step: at most cap seconds and at most `share` of the time left."""
+        return max(0.0, min(cap, self.remaining() * share))
+
+    def variant_threshold(self, normal):
+        """Early-stop score for a variant stream; accepts the first variant once half the time is gone."""
+        if self.fraction_left() > EARLY_VARIANT_FRACTION:
+            return normal
+        self.degrade("first_variant", "accepting the first variant of each slide", once=True)
+        return float("-inf")
+
+    def slide_capacity(self, parallel):
+        """How many slides (including the first) fit in the time left at EST_SLIDE_SECONDS each."""
+        after_first = max(0.0, self.remaining() - EST_SLIDE_SECONDS)
+        return max(1, 1 + int(after_first / EST_SLIDE_SECONDS * parallel))
+
+    def degrade(self, name, detail=None, once=False):
+        with self.lock:
+            if once and any(d["degradation"] == name for d in self.degradations):
+                return
+            self.degradations.append({"degradation": name, "detail": detail, "at_seconds": round(self.elapsed(), 2)})
+        print(f"Deadline: {name}{f' ({detail})' if detail else ''} at {self.elapsed():.1f}s of {self.seconds}s")
+
+    def close(self):
+        self.timer.cancel()
+
+    def report(self):
+        with self.lock:
+            return {
+                "deadline_seconds": self.seconds,
+                "elapsed_seconds": round(self.elapsed(), 2),
+                "deadline_met": self.elapsed() <= self.seconds,
+                "degradations": list(self.degradations),
+            }
+
+
+def as_deadline(deadline):
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(float(deadline))
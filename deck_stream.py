@@ -0,0 +1,253 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import websocket
+
+from profiling import carry_step
+from variant_scoring import score_variant
+from ws_archive import archive_session
+
+# Multi-slide variant generation over shared WebSocket connections.
+#
+# stream_slide_variants() in work.py opens a new authenticated socket per slide. Here the variant
+# requests for every slide of a deck are sent over one connection (or a small pool of them) and
+# the incoming variants are demultiplexed by slide_id. A slide that gets no variants because its
+# connection failed, closed early or timed out is retried on its own socket with
+# stream_slide_variants(). Each slide's outcome is reported with the same statuses
+# stream_slide_variants() uses: complete, early_stop, timed_out, cancelled or error.
+
+VARIANTS_WS_URL = "wss://alai-standalone-backend.getalai.com/ws/create-and-stream-slide-variants?token={auth_token}"
+
+
+def build_variant_request(auth_token, presentation_id, slide_id, outline, starting_slide_order):
+    return {
+        "auth_token": auth_token,
+        "presentation_id": presentation_id,
+        "slide_id": slide_id,
+        "layout_type": "AI_GENERATED_LAYOUT",
+        "images_on_slide": [],
+        "slide_specific_context": outline.get("slide_context", "ww3"),
+        "additional_instructions": "ww3",
+        "update_tone_verbosity_calibration_status": False,
+        "starting_slide_order": starting_slide_order,
+        "presentation_instructions": outline.get("slide_instructions", "")
+    }
+
+
+def parse_variant_message(data, slide_id=None):
+    """Returns the variants in a decoded variants message, or None if it is not a variants message.
+
+    slide_id is used for list items that do not name their slide.
+    """
+    if isinstance(data, dict) and "variant_id" in data:
+        return [data]
+    if isinstance(data, dict) and "id" in data and "slide_id" in data:
+        return [{
+            "variant_id": data.get("id"),
+            "slide_id": data.get("slide_id"),
+            "slide_content": data.get("element_slide", {})
+        }]
+    if isinstance(data, list):
+        return [
+            {
+                "variant_id": item["id"],
+                "slide_id": item.get("slide_id", slide_id),
+                "slide_content": item.get("element_slide", {})
+            }
+            for item in data
+            if isinstance(item, dict) and "id" in item
+        ]
+    return None
+
+
+def _stream_connection(auth_token, presentation_id, slides, score_threshold, on_variant, timeout, idle_timeout,
+                       cancel=None):
+    """Streams variants for several slides over one connection; returns ({slide_id: [variants]}, {slide_id: status})."""
+    variants = {slide["slide_id"]: [] for slide in slides}
+    done = set()
+    ws_messages = []
+    lock = threading.Lock()
+    connection_closed = threading.Event()
+    last_message = [time.monotonic()]
+    ws_error = []
+
+    def on_message(ws, message):
+        print(f"Deck variants WebSocket message received: {message[:200]}...")
+        with lock:
+            ws_messages.append(message)
+            last_message[0] = time.monotonic()
+            waiting = [slide_id for slide_id in variants if slide_id not in done]
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON in deck variants WS: {e}")
+            return
+        # Unattributed variants can only be assigned when a single slide is still waiting.
+        parsed = parse_variant_message(data, waiting[0] if len(waiting) == 1 else None)
+        if parsed is None:
+            print(f"Received message in unexpected format: {message[:100]}...")
+            return
+
+        for variant in parsed:
+            slide_id = variant.get("slide_id")
+            if slide_id not in variants:
+                print(f"Ignoring variant {variant.get('variant_id')} for unexpected slide {slide_id}")
+                continue
+            with lock:
+                variants[slide_id].append(variant)
+            if on_variant:
+                on_variant(slide_id, variant)
+            threshold = score_threshold() if callable(score_threshold) else score_threshold
+            if threshold is not None and slide_id not in done:
+                score = score_variant(variant)
+                if score >= threshold:
+                    print(f"Variant {variant.get('variant_id')} scored {score:.2f} >= {threshold}; slide {slide_id} is done.")
+                    with lock:
+                        done.add(slide_id)
+        with lock:
+            all_done = len(done) == len(variants)
+        if all_done:
+            ws.close()
+
+    def on_error(ws, error):
+        print(f"Deck variants WebSocket error: {error}")
+        ws_error.append(error)
+        connection_closed.set()
+
+    def on_close(ws, close_status_code, close_msg):
+        print(f"Deck variants WebSocket connection closed. Status code: {close_status_code}, Message: {close_msg}")
+        connection_closed.set()
+
+    def on_open(ws):
+        print(f"Deck variants WebSocket connection opened for {len(slides)} slides")
+        try:
+            for slide in slides:
+                ws.send(json.dumps(build_variant_request(
+                    auth_token, presentation_id, slide["slide_id"], slide["outline"], slide["slide_order"]
+                )))
+        except Exception as e:
+            print(f"Error sending deck variants requests: {e}")
+            on_error(ws, e)
+
+    ws = websocket.WebSocketApp(
+        VARIANTS_WS_URL.format(auth_token=auth_token),
+        on_open=on_open,
+        on_message=on_message,
+        on_error=on_error,
+        on_close=on_close
+    )
+    wst = threading.Thread(target=carry_step(ws.run_forever))
+    wst.daemon = True
+    wst.start()
+
+    # The server does not say when a slide is finished, so the connection is closed once every
+    # slide has variants and nothing has arrived for idle_timeout seconds.
+    deadline = time.monotonic() + timeout
+    ended = "complete"
+    while not connection_closed.wait(timeout=0.5):
+        now = time.monotonic()
+        with lock:
+            all_started = all(variants.values())
+            idle = now - last_message[0]
+        if cancel is not None and cancel.is_set():
+            ended = "cancelled"
+            break
+        if now >= deadline:
+            ended = "timed_out"
+            break
+        if all_started and idle >= idle_timeout:
+            break
+        if callable(score_threshold):
+            # The threshold can drop while waiting; slides whose best variant now meets it are done.
+            threshold = score_threshold()
+            with lock:
+                received = {slide_id: list(v) for slide_id, v in variants.items() if v and slide_id not in done}
+            for slide_id, slide_variants in received.items():
+                if threshold is not None and max(score_variant(v) for v in slide_variants) >= threshold:
+                    with lock:
+                        done.add(slide_id)
+            with lock:
+                all_done = len(done) == len(variants)
+            if all_done:
+                break
+    if ws_error:
+        ended = "error"
+
+    if wst.is_alive():
+        try:
+            ws.close()
+        except Exception as e:
+            print(f"Error during final close: {e}")
+        wst.join(timeout=2)
+        if wst.is_alive():
+            print("Warning: Deck variants WebSocket thread did not exit gracefully.")
+
+    archive_session(ws_messages, route="create-and-stream-slide-variants", source=presentation_id)
+    with lock:
+        statuses = {slide_id: "early_stop" if slide_id in done else ended for slide_id in variants}
+        return {slide_id: list(slide_variants) for slide_id, slide_variants in variants.items()}, statuses
+
+
+def stream_deck_variants(auth_token, presentation_id, slides, connections=1, score_threshold=None, on_variant=None,
+                         timeout=180, idle_timeout=10, outcomes=None, cancel=None):
+    """Generates variants for several slides over shared connections and returns {slide_id: [variants]}.
+
+    slides is a list of {"slide_id", "outline", "slide_order"}; they are spread round-robin over
+    `connections` sockets. on_variant(slide_id, variant) is called for every variant received.
+    score_threshold may be a callable, re-read as in work.stream_slide_variants().
+    When an outcomes dict is given, outcomes[slide_id] records how each slide's stream ended.
+    Setting the cancel event ends every stream, and slides left without variants are not retried.
+    """
+    from work import stream_slide_variants
+
+    if not slides:
+        return {}
+    connections = max(1, min(connections, len(slides)))
+    groups = [slides[i::connections] for i in range(connections)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="deck-stream") as executor:
+        futures = [
+            executor.submit(carry_step(_stream_connection), auth_token, presentation_id, group, score_threshold, on_variant,
+                            timeout, idle_timeout, cancel)
+            for group in groups
+        ]
+        statuses = {}
+        for group, future in zip(groups, futures):
+            try:
+                group_variants, group_statuses = future.result()
+                results.update(group_variants)
+                statuses.update(group_statuses)
+            except Exception as e:
+                print(f"Shared variants connection failed: {e}")
+                results.update({slide["slide_id"]: [] for slide in group})
+                statuses.update({slide["slide_id"]: "error" for slide in group})
+
+        missing = [slide for slide in slides if not results.get(slide["slide_id"])]
+        if cancel is not None and cancel.is_set():
+            missing = []
+        if missing:
+            print(f"Falling back to per-slide connections for {len(missing)} of {len(slides)} slides.")
+
+        def fallback(slide):
+            slide_on_variant = None
+            if on_variant:
+                slide_on_variant = lambda variant: on_variant(slide["slide_id"], variant)
+            outcome = {}
+            slide_variants = stream_slide_variants(
+                auth_token, presentation_id, slide["slide_id"], slide["outline"],
+                starting_slide_order=slide["slide_order"],
+                score_threshold=score_threshold,
+                on_variant=slide_on_variant,
+                outcome=outcome,
+                cancel=cancel,
+            )
+            statuses[slide["slide_id"]] = outcome.get("status", "error")
+            return slide_variants
+
+        for slide, slide_variants in zip(missing, executor.map(carry_step(fallback), missing)):
+            results[slide["slide_id"]] = slide_variants or []
+    if outcomes is not None:
+        outcomes.update(statuses)
+    return results
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+# Progress events emitted by generate_presentation() while a deck is being built.
+#
+# Consumers can register callbacks (called on the pipeline's thread) or iterate events from
+# asyncio with `async for event in events.stream()`.
+
+OUTLINE_RECEIVED = "outline_received"
+SLIDE_CREATED = "slide_created"
+VARIANT_RECEIVED = "variant_received"
+VARIANT_ACTIVATED = "variant_activated"
+SHARE_READY = "share_ready"
+PIPELINE_FINISHED = "pipeline_finished"
+
+_CLOSED = object()
+
+
+class PipelineEvents:
+    def __init__(self):
+        self.callbacks = defaultdict(list)
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def on(self, event_type, callback):
+        """Registers a callback for one event type, or for every event when event_type is None."""
+        with self.lock:
+            self.callbacks[event_type].append(callback)
+        return callback
+
+    def emit(self, event_type, **data):
+        event = {"type": event_type, "time": time.time(), **data}
+        with self.lock:
+            callbacks = self.callbacks[event_type] + self.callbacks[None]
+            subscribers = list(self.subscribers)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error in {event_type} event callback: {e}")
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        return event
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            subscribers = list(self.subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, _CLOSED)
+
+    async def stream(self):
+        """Yields events as they are emitted until close() is called."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        with self.lock:
+            if self.closed:
+                return
+            self.subscribers.append((loop, queue))
+        try:
+            while True:
+                event = await queue.get()
+                if event is _CLOSED:
+                    return
+                yield event
+        finally:
+            with self.lock:
+                self.subscribers.remove((loop, queue))
+
+
+async def generate_presentation_events(auth_token, website_url, **kwargs):
+    """Runs generate_presentation() in a worker thread and yields its events as they happen."""
+    from work import generate_presentation
+
+    events = PipelineEvents()
+    stream = events.stream()
+    # Start the subscription before the pipeline thread can emit anything.
+    first_event = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+
+    def run():
+        result = None
+        try:
+            result = generate_presentation(auth_token, website_url, events=events, **kwargs)
+        finally:
+            events.emit(PIPELINE_FINISHED, result=result)
+            events.close()
+
+    loop = asyncio.get_running_loop()
+    pipeline = loop.run_in_executor(None, run)
+    try:
+        try:
+            yield await first_event
+        except StopAsyncIteration:
+            return
+        async for event in stream:
+            yield event
+    finally:
+        await pipeline
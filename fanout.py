@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from work import (
+    PRESENTATION_INSTRUCTIONS,
+    background_executor,
+    create_new_presentation,
+    generate_presentation,
+    generate_slides_outline,
+    get_calibration_sample,
+    prepare_context,
+    scrape_website_content,
+)
+
+# Fan-out: scrape and outline a site once, then build one presentation per (tone, verbosity)
+# style in parallel from the shared context and outlines. Each style's deck state is saved under
+# its own key, so `python incremental.py <url> --style TONE:VERBOSITY` refreshes any of them.
+#
+#   python fanout.py https://example.com --style PROFESSIONAL:4 --style PROFESSIONAL:2
+
+
+def parse_style(value):
+    tone, _, verbosity = value.partition(":")
+    if not tone or not verbosity.isdigit():
+        raise argparse.ArgumentTypeError(f"Style must look like TONE:VERBOSITY, got {value!r}")
+    return tone.upper(), int(verbosity)
+
+
+def generate_presentation_fanout(auth_token, website_url, styles, scraped_content=None, max_parallel=None,
+                                 slide_connections=0):
+    """Builds one presentation per (tone, verbosity_level) style and returns their results in order.
+
+    slide_connections is passed to every build, which then streams slides 2..n over shared
+    connections and scores all of their variants in one pass.
+    """
+    if not styles:
+        return []
+    if scraped_content is None:
+        scraped_content = scrape_website_content(website_url)
+    topic = prepare_context(website_url, scraped_content)
+
+    # The outline WebSocket needs a presentation, so the first style's presentation is created
+    # up front and used for it. The calibration sample text only depends on the context, so it is
+    # fetched once alongside the outlines and cached for every style.
+    print("\n==== FAN-OUT: CREATING THE FIRST PRESENTATION AND SHARED OUTLINES ====")
+    first_presentation = create_new_presentation(auth_token)
+    if not first_presentation or "id" not in first_presentation:
+        return [None] * len(styles)
+
+    sample_future = background_executor.submit(
+        get_calibration_sample, auth_token, first_presentation["id"], topic, website_url
+    )
+    outlines = generate_slides_outline(auth_token, first_presentation["id"], topic, PRESENTATION_INSTRUCTIONS)
+    if not outlines:
+        print("Failed to generate the shared outlines.")
+        return [None] * len(styles)
+    # Once cached, every style's calibration reuses the sample instead of requesting its own.
+    sample_future.result()
+
+    print(f"\n==== FAN-OUT: BUILDING {len(styles)} PRESENTATIONS FROM {len(outlines)} SHARED OUTLINES ====")
+    # A separate executor: each build itself submits slide creation to background_executor.
+    with ThreadPoolExecutor(max_workers=max_parallel or len(styles), thread_name_prefix="fanout") as executor:
+        futures = [
+            executor.submit(
+                generate_presentation,
+                auth_token,
+                website_url,
+                scraped_content=scraped_content,
+                tone=tone,
+                verbosity_level=verbosity_level,
+                topic=topic,
+                outlines=outlines,
+                presentation_data=first_presentation if i == 0 else None,
+                slide_connections=slide_connections,
+            )
+            for i, (tone, verbosity_level) in enumerate(styles)
+        ]
+        results = []
+        for (tone, verbosity_level), future in zip(styles, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Presentation for tone {tone} and verbosity {verbosity_level} failed: {e}")
+                result = None
+            if result:
+                result = {**result, "tone": tone, "verbosity_level": verbosity_level}
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build several styles of deck from one scrape and one outline.")
+    parser.add_argument("url")
+    parser.add_argument("--style", dest="styles", type=parse_style, action="append", required=True,
+                        help="TONE:VERBOSITY, e.g. PROFESSIONAL:4; repeat for each deck")
+    parser.add_argument("--max-parallel", type=int, default=None)
+    parser.add_argument("--slide-connections", type=int, default=0, metavar="N",
+                        help="Stream the variants of slides 2..n of each deck over N shared WebSocket connections")
+    args = parser.parse_args()
+
+    auth_token = os.getenv("AUTH_TOKEN")
+    if not auth_token:
+        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+        exit(1)
+
+    results = generate_presentation_fanout(auth_token, args.url, args.styles, max_parallel=args.max_parallel,
+                                           slide_connections=args.slide_connections)
+    print(json.dumps([
+        {"tone": tone, "verbosity_level": verbosity, "share_url": result["share_url"] if result else None}
+        for (tone, verbosity), result in zip(args.styles, results)
+    ], indent=2))
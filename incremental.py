@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+from dotenv import load_dotenv
+
+from markdown_sections import map_outline_to_sections, split_sections, text_tokens
+
+# Incremental regeneration for sites that already have a deck.
+#
+# generate_presentation() stores the scraped content and, for every slide, the outline it was
+# built from and the hashes of the source sections that fed it. When the site changes, only the
+# slides fed by changed sections are regenerated in the existing presentation. A site can have one
+# deck per style (tone, verbosity level), as fanout.py builds them; each is stored separately.
+
+load_dotenv()
+
+DECK_STATE_DIR = "deck_state"
+DEFAULT_STYLE = ("PROFESSIONAL", 4)
+
+
+def deck_state_path(url, style=None):
+    # The default style keeps the bare-URL file name, so decks saved before styles were keyed still load.
+    key = url if style is None or tuple(style) == DEFAULT_STYLE else f"{url}\n{style[0]}:{style[1]}"
+    return os.path.join(DECK_STATE_DIR, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def load_deck_state(url, style=None):
+    path = deck_state_path(url, style)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_deck_state(url, scraped_content, presentation_id, slides, style=None):
+    sections = split_sections(scraped_content)
+    for slide in slides:
+        slide["source_sections"] = [sections[i]["hash"] for i in map_outline_to_sections(slide["outline"], sections)]
+    state = {
+        "url": url,
+        "style": list(style or DEFAULT_STYLE),
+        "presentation_id": presentation_id,
+        "scraped_content": scraped_content,
+        "slides": slides,
+    }
+    os.makedirs(DECK_STATE_DIR, exist_ok=True)
+    path = deck_state_path(url, style)
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+    print(f"Saved deck state for {url} to {path}")
+    return state
+
+
+def diff_sections(old_sections, new_sections):
+    """Pairs old and new sections by heading and returns (changed_old_hashes, new_sections_by_old_hash, added)."""
+    new_hashes = {s["hash"] for s in new_sections}
+    new_by_heading = {}
+    for section in new_sections:
+        new_by_heading.setdefault(section["heading"], []).append(section)
+
+    changed = set()
+    replacements = {}
+    matched_new = set()
+    for section in old_sections:
+        if section["hash"] in new_hashes:
+            matched_new.add(section["hash"])
+            continue
+        changed.add(section["hash"])
+        candidates = [s for s in new_by_heading.get(section["heading"], []) if s["hash"] not in matched_new]
+        if candidates:
+            replacements[section["hash"]] = candidates[0]
+            matched_new.add(candidates[0]["hash"])
+    added = [s for s in new_sections if s["hash"] not in matched_new]
+    return changed, replacements, added
+
+
+def find_affected_slides(state, new_content):
+    old_sections = split_sections(state["scraped_content"])
+    new_sections = split_sections(new_content)
+    changed, replacements, added = diff_sections(old_sections, new_sections)
+
+    affected = []
+    for slide in state["slides"]:
+        updated_sections = [replacements[h] for h in slide.get("source_sections", []) if h in replacements]
+        removed = [h for h in slide.get("source_sections", []) if h in changed and h not in replacements]
+        # Brand-new sections go to the slides whose outline they overlap with the most.
+        slide_tokens = text_tokens(f"{slide['outline'].get('heading', '')} {slide['outline'].get('slide_context', '')}")
+        for section in added:
+            section_tokens = text_tokens(f"{section['heading']} {section['text']}")
+            if slide_tokens and len(slide_tokens & section_tokens) / len(slide_tokens) >= 0.2:
+                updated_sections.append(section)
+        if updated_sections or removed:
+            affected.append((slide, updated_sections))
+    return affected
+
+
+def regenerate_changed_slides(auth_token, url, new_content=None, style=None):
+    # Imported here because work.py imports this module to save deck state.
+    from variant_scoring import EARLY_STOP_SCORE, pick_best_variant
+    from work import scrape_website_content, set_active_variant, stream_slide_variants
+
+    state = load_deck_state(url, style)
+    if not state:
+        print(f"No stored deck for {url} in style {style or DEFAULT_STYLE}. Run a full generation first.")
+        return None
+    if new_content is None:
+        # Always rescrape: a cached page would hide exactly the changes this looks for.
+        new_content = scrape_website_content(url, refresh=True)
+    if new_content == state["scraped_content"]:
+        print("Source content is unchanged; nothing to regenerate.")
+        return {"presentation_id": state["presentation_id"], "regenerated": []}
+
+    affected = find_affected_slides(state, new_content)
+    print(f"{len(affected)} of {len(state['slides'])} slides are affected by the site changes.")
+
+    regenerated = []
+    for slide, updated_sections in affected:
+        outline = dict(slide["outline"])
+        if updated_sections:
+            updated_text = "\n\n".join(f"{s['heading']}\n{s['text']}".strip() for s in updated_sections)
+            outline["slide_context"] = f"{outline.get('slide_context', '')}\n\nUpdated source content:\n{updated_text}"
+        print(f"\n--- Regenerating slide {slide['slide_id']}: {outline.get('heading', 'No Heading')} ---")
+        variants = stream_slide_variants(
+            auth_token,
+            state["presentation_id"],
+            slide["slide_id"],
+            outline,
+            starting_slide_order=slide["slide_order"],
+            score_threshold=EARLY_STOP_SCORE
+        )
+        variant = pick_best_variant(variants)
+        if not variant or not variant.get("variant_id"):
+            print(f"Failed to regenerate slide {slide['slide_id']}; keeping the previous variant.")
+            continue
+        if set_active_variant(auth_token, slide["slide_id"], variant["variant_id"]):
+            slide["variant_id"] = variant["variant_id"]
+            regenerated.append(slide["slide_id"])
+
+    save_deck_state(url, new_content, state["presentation_id"], state["slides"], style)
+    return {"presentation_id": state["presentation_id"], "regenerated": regenerated}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Regenerate the slides of a stored deck whose source changed.")
+    parser.add_argument("url", nargs="?", help="Website URL of the deck (prompted for when omitted)")
+    parser.add_argument("--style", default=":".join(map(str, DEFAULT_STYLE)), metavar="TONE:VERBOSITY",
+                        help="Style of the deck to refresh, for sites with one deck per style")
+    args = parser.parse_args()
+    tone, _, verbosity = args.style.partition(":")
+    if not tone or not verbosity.isdigit():
+        parser.error(f"--style must look like TONE:VERBOSITY, got {args.style!r}")
+
+    auth_token = os.getenv("AUTH_TOKEN")
+    if not auth_token:
+        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+        exit(1)
+
+    website_url = args.url or input("Enter the website URL of the deck to refresh: ").strip()
+    if not website_url:
+        print("No website URL provided. Exiting.")
+        exit(1)
+
+    result = regenerate_changed_slides(auth_token, website_url, style=(tone.upper(), int(verbosity)))
+    if result:
+        print(f"Regenerated {len(result['regenerated'])} slides in presentation {result['presentation_id']}")
@@ -0,0 +1,304 @@
+import argparse
+import json
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Durable job table shared by work.py workers on several hosts.
+#
+# Jobs move queued -> leased -> done. A worker holds a lease while it works and extends it with
+# heartbeats; if it dies, the lease expires and another worker picks the job up. A heartbeat that
+# hits a database error is retried until the lease would run out; once the lease is lost the
+# worker abandons the deck it is building (generate_presentation's cancel event) and leaves the
+# job to whoever leased it next. Failed attempts
+# are retried with backoff until max_attempts, after which the job is dead-lettered.
+#
+# The database file must live on storage every worker can reach with working file locks.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_available ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_status_lease ON jobs (status, lease_expires_at);
+"""
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+HEARTBEAT_RETRY_SECONDS = 5
+
+
+class JobQueue:
+    def __init__(self, path="jobs.db", lease_seconds=300, max_attempts=3, retry_backoff=30):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Transaction(conn)
+
+    def enqueue(self, url, max_attempts=None):
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, url, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, url, QUEUED, max_attempts or self.max_attempts, now, now, now),
+            )
+        return job_id
+
+    def _reap_expired_leases(self, conn, now):
+        expired = conn.execute(
+            "SELECT id, attempts, max_attempts FROM jobs WHERE status = ? AND lease_expires_at < ?",
+            (LEASED, now),
+        ).fetchall()
+        for job in expired:
+            if job["attempts"] >= job["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                    (DEAD, "Lease expired on final attempt", now, job["id"]),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, available_at = ?, last_error = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (QUEUED, now, "Lease expired", now, job["id"]),
+                )
+
+    def claim(self, worker_id):
+        now = time.time()
+        with self._connect() as conn:
+            self._reap_expired_leases(conn, now)
+            job = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND available_at <= ? ORDER BY available_at, created_at LIMIT 1",
+                (QUEUED, now),
+            ).fetchone()
+            if not job:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires_at = ?, "
+                "heartbeat_at = ?, updated_at = ? WHERE id = ?",
+                (LEASED, worker_id, now + self.lease_seconds, now, now, job["id"]),
+            )
+            claimed = dict(job)
+            claimed["attempts"] += 1
+            return claimed
+
+    def heartbeat(self, job_id, worker_id):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + self.lease_seconds, now, now, job_id, LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(result), now, job_id, LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error):
+        now = time.time()
+        with self._connect() as conn:
+            job = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_owner = ?",
+                (job_id, LEASED, worker_id),
+            ).fetchone()
+            if not job:
+                return False
+            if job["attempts"] >= job["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                    (DEAD, str(error), now, job_id),
+                )
+            else:
+                backoff = self.retry_backoff * (2 ** (job["attempts"] - 1))
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = NULL, available_at = ?, last_error = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (QUEUED, now + backoff, str(error), now, job_id),
+                )
+            return True
+
+    def requeue_dead(self):
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, now, now, DEAD),
+            )
+            return cursor.rowcount
+
+    def stats(self, jobs_per_worker=5, max_workers=32):
+        now = time.time()
+        with self._connect() as conn:
+            counts = {row["status"]: row["n"] for row in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+            ready = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND available_at <= ?", (QUEUED, now)
+            ).fetchone()[0]
+            active_workers = conn.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM jobs WHERE status = ? AND lease_expires_at >= ?", (LEASED, now)
+            ).fetchone()[0]
+        # Autoscaling hint: enough workers to drain the ready backlog at jobs_per_worker each,
+        # never fewer than the workers already holding leases.
+        wanted = math.ceil((ready + counts.get(LEASED, 0)) / jobs_per_worker) if jobs_per_worker else 0
+        return {
+            "counts": {status: counts.get(status, 0) for status in (QUEUED, LEASED, DONE, DEAD)},
+            "ready": ready,
+            "active_workers": active_workers,
+            "recommended_workers": min(max(wanted, active_workers), max_workers),
+        }
+
+
+class _Transaction:
+    # Wraps a connection so every "with" block is one BEGIN IMMEDIATE transaction; claiming a job
+    # must hold the write lock from SELECT to UPDATE or two workers could lease the same row.
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
+
+
+def keep_lease(job_queue, job_id, worker_id, stop, lease_lost, retry_interval=HEARTBEAT_RETRY_SECONDS):
+    """Heartbeats a leased job until stop is set; sets lease_lost and returns if the lease goes."""
+    interval = job_queue.lease_seconds / 3
+    lease_until = time.monotonic() + job_queue.lease_seconds
+    wait = interval
+    while not stop.wait(wait):
+        try:
+            renewed = job_queue.heartbeat(job_id, worker_id)
+        except sqlite3.Error as e:
+            left = lease_until - time.monotonic()
+            if left <= 0:
+                print(f"Warning: lost lease on job {job_id}; heartbeats failed until it expired ({e})")
+                lease_lost.set()
+                return
+            print(f"Error renewing lease on job {job_id} ({e}); retrying")
+            wait = min(retry_interval, interval, left)
+            continue
+        if not renewed:
+            print(f"Warning: lost lease on job {job_id}")
+            lease_lost.set()
+            return
+        lease_until = time.monotonic() + job_queue.lease_seconds
+        wait = interval
+
+
+def run_worker(job_queue, auth_token, worker_id, poll_interval=5, once=False):
+    from work import generate_presentation
+
+    print(f"Worker {worker_id} pulling jobs from {job_queue.path}")
+    while True:
+        job = job_queue.claim(worker_id)
+        if not job:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        print(f"Worker {worker_id} leased job {job['id']} ({job['url']}), attempt {job['attempts']}/{job['max_attempts']}")
+        stop_heartbeat = threading.Event()
+        lease_lost = threading.Event()
+        heartbeat_thread = threading.Thread(
+            target=keep_lease, args=(job_queue, job["id"], worker_id, stop_heartbeat, lease_lost), daemon=True
+        )
+        heartbeat_thread.start()
+        try:
+            result = generate_presentation(auth_token, job["url"], cancel=lease_lost)
+            if lease_lost.is_set():
+                print(f"Job {job['id']} lost its lease and was abandoned; leaving it to the worker that holds it now")
+            elif result and result.get("share_url"):
+                job_queue.complete(job["id"], worker_id, result)
+                print(f"Job {job['id']} done: {result['share_url']}")
+            else:
+                job_queue.fail(job["id"], worker_id, "Presentation generation failed")
+                print(f"Job {job['id']} failed")
+        except Exception as e:
+            if not lease_lost.is_set():
+                job_queue.fail(job["id"], worker_id, e)
+            print(f"Job {job['id']} raised an error: {e}")
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join(timeout=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared SQLite job queue for deck generation.")
+    parser.add_argument("--db", default="jobs.db", help="Path to the shared job database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add website URLs to the queue")
+    enqueue_parser.add_argument("urls", nargs="+")
+    enqueue_parser.add_argument("--max-attempts", type=int, default=3)
+
+    worker_parser = subparsers.add_parser("worker", help="Pull and run jobs until stopped")
+    worker_parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    worker_parser.add_argument("--lease-seconds", type=int, default=300)
+    worker_parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+
+    stats_parser = subparsers.add_parser("stats", help="Show queue depth and a worker count hint")
+    stats_parser.add_argument("--jobs-per-worker", type=int, default=5)
+
+    subparsers.add_parser("requeue-dead", help="Move dead-lettered jobs back to the queue")
+
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        job_queue = JobQueue(args.db, max_attempts=args.max_attempts)
+        for url in args.urls:
+            print(f"{job_queue.enqueue(url)} {url}")
+    elif args.command == "worker":
+        auth_token = os.getenv("AUTH_TOKEN")
+        if not auth_token:
+            print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+            exit(1)
+        run_worker(JobQueue(args.db, lease_seconds=args.lease_seconds), auth_token, args.worker_id, once=args.once)
+    elif args.command == "stats":
+        print(json.dumps(JobQueue(args.db).stats(jobs_per_worker=args.jobs_per_worker), indent=2))
+    elif args.command == "requeue-dead":
+        print(f"Requeued {JobQueue(args.db).requeue_dead()} dead jobs")
@@ -0,0 +1,204 @@
+import argparse
+import json
+import re
+import time
+
+from markdown_sections import split_sections
+
+# Local outliner for well-structured pages.
+#
+# Docs pages and API collections already carry a usable outline in their heading hierarchy. This
+# builds heading/slide_context/slide_instructions entries straight from that structure, in the
+# same shape generate_slides_outline() returns, and scores how usable the structure is so callers
+# can fall back to the remote outline WebSocket when the page is poorly structured.
+#
+#   python local_outline.py page.md
+
+MIN_SLIDES = 3
+MAX_SLIDES = 12
+MIN_SLIDE_WORDS = 12
+MAX_BULLETS = 6
+MAX_BULLET_CHARS = 220
+MAX_HEADING_WORDS = 12
+MIN_QUALITY = 0.6
+
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+EMPHASIS_RE = re.compile(r"`|\*{1,3}|(?<!\w)_{1,3}|_{1,3}(?!\w)")
+HTTP_METHOD_RE = re.compile(r"^(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\b")
+
+
+def clean_inline(text):
+    return EMPHASIS_RE.sub("", LINK_RE.sub(r"\1", text)).strip()
+
+
+def section_bullets(text):
+    """Turns a section's markdown into up to MAX_BULLETS short bullet points."""
+    bullets = []
+    paragraph = []
+    in_code = False
+
+    def add(line):
+        line = clean_inline(line)
+        if len(line) > MAX_BULLET_CHARS:
+            line = line[:MAX_BULLET_CHARS].rsplit(" ", 1)[0] + "..."
+        if line and line not in bullets:
+            bullets.append(line)
+
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or line.strip().startswith("|"):
+            continue
+        if LIST_ITEM_RE.match(line):
+            if paragraph:
+                add(" ".join(paragraph))
+                paragraph = []
+            add(LIST_ITEM_RE.sub("", line))
+        elif line.strip():
+            paragraph.append(line.strip())
+        elif paragraph:
+            add(" ".join(paragraph))
+            paragraph = []
+    if paragraph:
+        add(" ".join(paragraph))
+    return bullets[:MAX_BULLETS]
+
+
+def slide_instructions(heading, text, is_first):
+    if is_first:
+        return "Use a title layout that introduces the topic."
+    if HTTP_METHOD_RE.match(heading):
+        return "Show the endpoint's method, path and purpose, with a short request example."
+    if "```" in text:
+        return "Summarize the example; show at most a short code snippet."
+    if any(line.strip().startswith("|") for line in text.splitlines()):
+        return "Use a table or comparison layout for the structured data."
+    list_lines = sum(1 for line in text.splitlines() if LIST_ITEM_RE.match(line))
+    if list_lines >= 3:
+        return "Use a bulleted layout with one point per item."
+    return "Use a clean layout with a short heading and supporting points."
+
+
+def choose_slide_level(sections):
+    """Returns the shallowest heading level with enough sections to make a deck, or None."""
+    levels = sorted({section["level"] for section in sections if section["level"]})
+    for level in levels:
+        count = sum(1 for section in sections if section["level"] == level)
+        if count >= MIN_SLIDES - 1:
+            return level
+    return levels[-1] if levels else None
+
+
+def group_sections(sections, level):
+    """Groups sections into slides at `level`; deeper sections are folded into their parent."""
+    slides = []
+    intro = {"heading": "", "text": ""}
+    current = None
+    for section in sections:
+        # Shallower headings before the first slide are the page title; later ones start a slide.
+        if section["level"] == level or (current is not None and section["level"] and section["level"] < level):
+            current = {"heading": section["heading"], "text": section["text"], "subheadings": []}
+            slides.append(current)
+        elif current is None:
+            # Content before the first slide-level heading, including the page title.
+            if section["heading"] and not intro["heading"]:
+                intro["heading"] = section["heading"]
+            intro["text"] = f"{intro['text']}\n\n{section['text']}".strip()
+        else:
+            current["subheadings"].append(section["heading"])
+            current["text"] = f"{current['text']}\n\n{section['text']}".strip()
+    return intro, slides
+
+
+def outline_quality(slides, total_words):
+    """Scores 0-1 how well the heading structure covers the page, with the reasons it lost points."""
+    reasons = []
+    if not slides:
+        return 0.0, ["no headings"]
+    score = 1.0
+    if len(slides) < MIN_SLIDES:
+        score -= 0.5
+        reasons.append(f"only {len(slides)} slide-level sections")
+    thin = sum(1 for slide in slides if len(slide["text"].split()) < MIN_SLIDE_WORDS)
+    if thin:
+        score -= 0.5 * thin / len(slides)
+        reasons.append(f"{thin} sections with under {MIN_SLIDE_WORDS} words")
+    headings = [slide["heading"].lower() for slide in slides]
+    duplicates = len(headings) - len(set(headings))
+    if duplicates:
+        score -= 0.3 * duplicates / len(slides)
+        reasons.append(f"{duplicates} repeated headings")
+    long_headings = sum(1 for slide in slides if len(slide["heading"].split()) > MAX_HEADING_WORDS)
+    if long_headings:
+        score -= 0.2 * long_headings / len(slides)
+        reasons.append(f"{long_headings} headings longer than {MAX_HEADING_WORDS} words")
+    covered = sum(len(slide["text"].split()) for slide in slides)
+    if total_words and covered / total_words < 0.5:
+        score -= 0.3
+        reasons.append(f"headings cover only {covered / total_words:.0%} of the text")
+    return max(score, 0.0), reasons
+
+
+def build_local_outline(markdown, max_slides=MAX_SLIDES):
+    """Returns (outlines, quality, reasons) built from the markdown's heading hierarchy."""
+    sections = split_sections(markdown)
+    level = choose_slide_level(sections)
+    if level is None:
+        return [], 0.0, ["no headings"]
+    intro, slides = group_sections(sections, level)
+    total_words = sum(len(section["text"].split()) for section in sections)
+    quality, reasons = outline_quality(slides, total_words)
+
+    # Long pages keep the sections with the most content, in page order.
+    if len(slides) > max_slides - 1:
+        keep = sorted(range(len(slides)), key=lambda i: len(slides[i]["text"].split()), reverse=True)[:max_slides - 1]
+        slides = [slides[i] for i in sorted(keep)]
+
+    title = clean_inline(intro["heading"]) or (clean_inline(slides[0]["heading"]) if slides else "Overview")
+    outlines = [{
+        "heading": title,
+        "slide_context": "\n".join(f"- {bullet}" for bullet in section_bullets(intro["text"]))
+                         or "\n".join(f"- {clean_inline(slide['heading'])}" for slide in slides),
+        "slide_instructions": slide_instructions(title, intro["text"], True),
+        "images_on_slide": None,
+    }]
+    for slide in slides:
+        bullets = section_bullets(slide["text"])
+        if len(bullets) < 2 and slide["subheadings"]:
+            bullets += [clean_inline(heading) for heading in slide["subheadings"][:MAX_BULLETS - len(bullets)]]
+        heading = clean_inline(slide["heading"])
+        outlines.append({
+            "heading": heading,
+            "slide_context": "\n".join(f"- {bullet}" for bullet in bullets),
+            "slide_instructions": slide_instructions(heading, slide["text"], False),
+            "images_on_slide": None,
+        })
+    return outlines, quality, reasons
+
+
+def local_outline(markdown, min_quality=MIN_QUALITY, max_slides=MAX_SLIDES):
+    """Returns outlines built locally when the page structure is good enough, otherwise None."""
+    outlines, quality, reasons = build_local_outline(markdown, max_slides=max_slides)
+    if quality < min_quality:
+        print(f"Local outline quality {quality:.2f} < {min_quality} ({'; '.join(reasons)}); using the remote outline.")
+        return None
+    print(f"Built {len(outlines)} outlines locally from the page headings (quality {quality:.2f}).")
+    return outlines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a slide outline from a markdown file's headings.")
+    parser.add_argument("markdown_file")
+    parser.add_argument("--max-slides", type=int, default=MAX_SLIDES)
+    args = parser.parse_args()
+
+    with open(args.markdown_file, encoding="utf-8") as f:
+        markdown = f.read()
+    start = time.perf_counter()
+    outlines, quality, reasons = build_local_outline(markdown, max_slides=args.max_slides)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(json.dumps(outlines, indent=2))
+    print(f"quality {quality:.2f}{' (' + '; '.join(reasons) + ')' if reasons else ''}, "
+          f"{'local' if quality >= MIN_QUALITY else 'remote'} outline, {elapsed:.1f} ms")
@@ -0,0 +1,50 @@
+import hashlib
+import re
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+WORD_RE = re.compile(r"[a-z0-9]{4,}")
+
+
+def split_sections(markdown):
+    """Splits scraped markdown into heading-delimited sections, each with a content hash."""
+    sections = []
+    current = {"heading": "", "level": 0, "lines": []}
+
+    def flush():
+        text = "\n".join(current["lines"]).strip()
+        if text or current["heading"]:
+            sections.append({
+                "heading": current["heading"],
+                "level": current["level"],
+                "text": text,
+                "hash": hashlib.sha1(f"{current['heading']}\n{text}".encode("utf-8")).hexdigest(),
+            })
+
+    for line in (markdown or "").splitlines():
+        match = HEADING_RE.match(line)
+        if match:
+            flush()
+            current = {"heading": match.group(2).strip(), "level": len(match.group(1)), "lines": []}
+        else:
+            current["lines"].append(line)
+    flush()
+    return sections
+
+
+def text_tokens(text):
+    return set(WORD_RE.findall((text or "").lower()))
+
+
+def map_outline_to_sections(outline, sections, min_overlap=0.2):
+    """Returns indexes of the sections whose words best cover an outline's heading and context."""
+    outline_tokens = text_tokens(f"{outline.get('heading', '')} {outline.get('slide_context', '')}")
+    if not outline_tokens or not sections:
+        return []
+    overlaps = []
+    for i, section in enumerate(sections):
+        section_tokens = text_tokens(f"{section['heading']} {section['text']}")
+        overlaps.append(len(outline_tokens & section_tokens) / len(outline_tokens))
+    matched = [i for i, overlap in enumerate(overlaps) if overlap >= min_overlap]
+    if not matched and max(overlaps) > 0:
+        matched = [overlaps.index(max(overlaps))]
+    return matched
@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boilerplate import strip_boilerplate
+from catalog import record_deck
+from outline_mapreduce import generate_outline_mapreduce, reduce_outlines
+from payloads import as_encoded_context
+from work import (
+    PRESENTATION_INSTRUCTIONS,
+    background_executor,
+    create_new_presentation,
+    generate_presentation,
+    scrape_website_content,
+)
+
+# Multi-source decks: one presentation built from several URLs (say a product page, its docs and
+# a blog post).
+#
+# The presentation is created while every source is scraped and boilerplate-stripped in parallel.
+# Each source is then outlined concurrently. Every outline keeps the URL it came from in
+# "source_url", and the merged deck shares its slides out by source size. The slides are
+# generated into a single presentation, so the deck takes about as long as its slowest source.
+# Deck state, the catalog and calibration key the deck by source_key() of all its URLs, so it
+# never replaces the single-page deck of any one of them; the catalog also lists every URL.
+#
+#   python multi_source.py https://example.com https://example.com/docs https://example.com/blog/launch
+
+MAX_PARALLEL_SOURCES = 4
+TARGET_SLIDES = 10
+
+
+def source_key(urls):
+    """The key a multi-source deck is stored under: the same set of URLs always maps to the same key."""
+    digest = hashlib.sha1("\n".join(sorted(set(urls))).encode("utf-8")).hexdigest()[:16]
+    return f"multi-source:{digest}"
+
+
+def record_unused_presentation(presentation_data, urls, outlines=None):
+    # The backend has no delete endpoint, so a presentation created for a deck that failed before
+    # generation is recorded as failed in the catalog, where it can be found and cleaned up.
+    print(f"Presentation {presentation_data['id']} was created but not used.")
+    now = time.time()
+    record_deck({
+        "presentation_id": presentation_data["id"],
+        "url": source_key(urls),
+        "sources": urls,
+        "status": "failed",
+        "outline_count": len(outlines or []),
+        "slide_count": 0,
+        "outlines": outlines,
+        "started_at": now,
+        "finished_at": now,
+    }, [])
+
+
+def scrape_sources(urls, max_parallel=MAX_PARALLEL_SOURCES):
+    """Scrapes and strips every URL concurrently; returns [{"url", "content"}] in input order."""
+    def scrape(url):
+        try:
+            return {"url": url, "content": strip_boilerplate(url, scrape_website_content(url)) or ""}
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return {"url": url, "content": ""}
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(urls)), thread_name_prefix="scrape") as executor:
+        return list(executor.map(scrape, urls))
+
+
+def combine_sources(sources):
+    """Joins the sources into one markdown context, each under a heading naming its URL."""
+    return "\n\n".join(f"# Source: {source['url']}\n\n{source['content']}" for source in sources if source["content"])
+
+
+def attribute_outline(outline, url):
+    outline = dict(outline)
+    outline["source_url"] = url
+    instructions = outline.get("slide_instructions", "")
+    outline["slide_instructions"] = f"{instructions} Add a small source note: {url}".strip()
+    return outline
+
+
+def generate_multi_source_outline(auth_token, presentation_id, sources, target_slides=TARGET_SLIDES,
+                                  max_parallel=MAX_PARALLEL_SOURCES):
+    """Outlines every source concurrently and merges them into one attributed outline in source order."""
+    per_source = max(2, -(-target_slides // len(sources)))
+
+    def outline(source):
+        try:
+            return generate_outline_mapreduce(
+                auth_token, presentation_id, source["content"], PRESENTATION_INSTRUCTIONS, target_slides=per_source
+            ) or []
+        except Exception as e:
+            print(f"Outline generation for {source['url']} failed: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(sources)), thread_name_prefix="source-outline") as executor:
+        source_outlines = list(executor.map(outline, sources))
+    for source, outlines in zip(sources, source_outlines):
+        print(f"{len(outlines)} outlines from {source['url']}")
+
+    attributed = [
+        [attribute_outline(o, source["url"]) for o in outlines]
+        for source, outlines in zip(sources, source_outlines)
+    ]
+    return reduce_outlines(attributed, [len(source["content"]) for source in sources], target_slides)
+
+
+def generate_multi_source_presentation(auth_token, urls, target_slides=TARGET_SLIDES, max_parallel=MAX_PARALLEL_SOURCES,
+                                       **kwargs):
+    """Builds one presentation from several URLs; returns generate_presentation()'s result plus "sources"."""
+    if not urls:
+        return None
+    presentation_future = background_executor.submit(create_new_presentation, auth_token)
+    print(f"\n==== MULTI-SOURCE: SCRAPING {len(urls)} SOURCES ====")
+    sources = [source for source in scrape_sources(urls, max_parallel) if source["content"]]
+    presentation_data = presentation_future.result()
+    if not presentation_data or "id" not in presentation_data:
+        return None
+    if not sources:
+        print("None of the sources returned any content.")
+        record_unused_presentation(presentation_data, urls)
+        return None
+
+    print(f"\n==== MULTI-SOURCE: OUTLINING {len(sources)} SOURCES ====")
+    outlines = generate_multi_source_outline(auth_token, presentation_data["id"], sources, target_slides, max_parallel)
+    if not outlines:
+        print("Failed to generate outlines for any source.")
+        record_unused_presentation(presentation_data, [source["url"] for source in sources])
+        return None
+
+    combined = combine_sources(sources)
+    source_urls = [source["url"] for source in sources]
+    result = generate_presentation(
+        auth_token,
+        source_key(source_urls),
+        scraped_content=combined,
+        topic=as_encoded_context(combined),
+        outlines=outlines,
+        presentation_data=presentation_data,
+        sources=source_urls,
+        **kwargs
+    )
+    if result:
+        result = {**result, "sources": source_urls}
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build one presentation from several websites.")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--target-slides", type=int, default=TARGET_SLIDES)
+    parser.add_argument("--max-parallel", type=int, default=MAX_PARALLEL_SOURCES)
+    parser.add_argument("--progressive", action="store_true", help="Publish the share link after the first slide")
+    args = parser.parse_args()
+
+    auth_token = os.getenv("AUTH_TOKEN")
+    if not auth_token:
+        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+        exit(1)
+
+    result = generate_multi_source_presentation(
+        auth_token, args.urls, target_slides=args.target_slides, max_parallel=args.max_parallel,
+        progressive=args.progressive
+    )
+    if not result:
+        print("Presentation generation failed. Exiting.")
+        exit(1)
+    print(json.dumps({
+        "share_url": result["share_url"],
+        "sources": result["sources"],
+        "slides": [{"heading": s["outline"].get("heading"), "source_url": s["outline"].get("source_url")}
+                   for s in result["slides"]],
+    }, indent=2))
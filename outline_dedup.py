@@ -0,0 +1,134 @@
+import argparse
+import json
+import re
+
+# Near-duplicate outline detection.
+#
+# Each outline (heading + slide_context) is reduced to its set of content terms: lowercased words
+# without stop words, with common suffixes cut so "nature"/"natural" or "explore"/"exploring"
+# match. Outlines restate the same points in different words, so word-sequence shingles almost
+# never line up (the recorded "Crazy Nature" outlines share under 4% of their 3-word shingles);
+# single terms do. Two outlines are near-duplicates when the terms they share cover at least
+# `threshold` of the smaller outline (the overlap coefficient), so a short outline repeated inside
+# a longer one is caught, and they share at least MIN_SHARED_TERMS terms. A deck has a handful of
+# outlines, so every pair is compared exactly. Pairs at or above the threshold are grouped, and
+# each group is either merged into its first outline (the other outlines' points are folded into
+# its slide_context) or only flagged with "duplicate_of", so redundant slides never reach
+# stream_slide_variants.
+#
+#   python outline_dedup.py outline_ws_messages.json --threshold 0.4
+
+DEFAULT_THRESHOLD = 0.45
+MIN_SHARED_TERMS = 3
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+STOP_WORDS = frozenset("""
+    a about all also an and any are as at be been but by can do does each for from has have how if in into is it
+    its more most not of on or our so such than that the their them then there these they this those to up us
+    was we were what when where which while who why will with you your
+""".split())
+SUFFIXES = ("ing", "ed", "es", "s", "al", "ly", "e")
+MIN_STEM = 4
+
+
+def outline_text(outline):
+    return f"{outline.get('heading', '')}\n{outline.get('slide_context', '')}"
+
+
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def content_terms(text):
+    return {stem(word) for word in WORD_RE.findall(text.lower()) if word not in STOP_WORDS}
+
+
+def outline_similarity(a, b):
+    """Overlap coefficient of two term sets and the number of terms they share."""
+    if not a or not b:
+        return 0.0, 0
+    shared = len(a & b)
+    return shared / min(len(a), len(b)), shared
+
+
+def find_near_duplicates(outlines, threshold=DEFAULT_THRESHOLD):
+    """Returns (i, j, similarity) for every pair of outlines whose term overlap >= threshold."""
+    terms = [content_terms(outline_text(outline)) for outline in outlines]
+    pairs = []
+    for i in range(len(outlines)):
+        for j in range(i + 1, len(outlines)):
+            similarity, shared = outline_similarity(terms[i], terms[j])
+            if similarity >= threshold and shared >= MIN_SHARED_TERMS:
+                pairs.append((i, j, similarity))
+    return pairs
+
+
+def group_duplicates(count, pairs):
+    """Returns {index of a group's first outline: [indexes of its duplicates]}."""
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        a, b = find(i), find(j)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    groups = {}
+    for i in range(count):
+        root = find(i)
+        if root != i:
+            groups.setdefault(root, []).append(i)
+    return groups
+
+
+def dedupe_outlines(outlines, threshold=DEFAULT_THRESHOLD, merge=True):
+    """Returns (outlines, groups) with near-duplicates merged into their first outline, or only flagged."""
+    pairs = find_near_duplicates(outlines, threshold)
+    groups = group_duplicates(len(outlines), pairs)
+    if not groups:
+        return list(outlines), groups
+    for i, j, similarity in pairs:
+        print(f"Near-duplicate outlines ({similarity:.2f}): {outlines[i].get('heading')!r} / {outlines[j].get('heading')!r}")
+
+    duplicate_of = {dup: root for root, dups in groups.items() for dup in dups}
+    if not merge:
+        return [
+            {**outline, "duplicate_of": duplicate_of[i]} if i in duplicate_of else dict(outline)
+            for i, outline in enumerate(outlines)
+        ], groups
+
+    result = []
+    for i, outline in enumerate(outlines):
+        if i in duplicate_of:
+            continue
+        outline = dict(outline)
+        if i in groups:
+            lines = outline.get("slide_context", "").splitlines()
+            for dup in groups[i]:
+                lines += [line for line in outlines[dup].get("slide_context", "").splitlines() if line not in lines]
+            outline["slide_context"] = "\n".join(lines)
+        result.append(outline)
+    print(f"Merged {len(outlines) - len(result)} near-duplicate outlines; {len(result)} slides remain.")
+    return result, groups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find near-duplicate outlines in a recorded outline file.")
+    parser.add_argument("outline_file", help="JSON list of outlines (or of JSON-encoded outline messages)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--flag-only", action="store_true", help="Mark duplicates instead of merging them")
+    args = parser.parse_args()
+
+    with open(args.outline_file, encoding="utf-8") as f:
+        data = json.load(f)
+    outlines = [json.loads(item) if isinstance(item, str) else item for item in data]
+    outlines = [outline for outline in outlines if isinstance(outline, dict) and "heading" in outline]
+    deduped, groups = dedupe_outlines(outlines, args.threshold, merge=not args.flag_only)
+    print(json.dumps(deduped, indent=2))
@@ -0,0 +1,149 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from markdown_sections import split_sections, text_tokens
+from payloads import as_encoded_context
+from profiling import carry_step
+
+# Map-reduce outline generation for large sources.
+#
+# One outline request over a very long page is slow and only yields a handful of slides for the
+# whole document. Here the page is split into section-aligned chunks, each chunk is outlined by
+# its own concurrent outline request (map), and the results are merged: near-duplicate slides
+# are folded together, slides are put back in document order and the deck is trimmed to the
+# target slide count with slots shared out by chunk size (reduce). Outline latency then depends
+# on the chunk size rather than the page size. The map phase as a whole gets the caller's timeout:
+# a chunk that waits for a free worker gets only what is left of it, and chunks still running when
+# it runs out are left out of the merge.
+
+MAP_CHUNK_CHARS = 12000
+MAX_PARALLEL_CHUNKS = 4
+TARGET_SLIDES = 8
+DUPLICATE_OVERLAP = 0.6
+
+
+def split_for_outline(markdown, chunk_chars=MAP_CHUNK_CHARS):
+    """Packs consecutive heading sections into chunks of at most chunk_chars characters."""
+    pieces = []
+    for section in split_sections(markdown):
+        heading = f"{'#' * section['level']} {section['heading']}\n\n" if section["heading"] else ""
+        text = heading + section["text"]
+        if len(text) <= chunk_chars:
+            pieces.append(text)
+            continue
+        # Oversized sections are split on paragraph boundaries.
+        current = ""
+        for paragraph in text.split("\n\n"):
+            if current and len(current) + len(paragraph) + 2 > chunk_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph[:chunk_chars]
+        if current:
+            pieces.append(current)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def outline_overlap(a, b):
+    tokens_a = text_tokens(f"{a.get('heading', '')} {a.get('slide_context', '')}")
+    tokens_b = text_tokens(f"{b.get('heading', '')} {b.get('slide_context', '')}")
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def reduce_outlines(chunk_outlines, chunk_sizes, target_slides=TARGET_SLIDES):
+    """Merges per-chunk outlines into one deck of at most target_slides, in document order."""
+    merged = []  # (chunk index, rank within the chunk, outline)
+    for chunk_index, outlines in enumerate(chunk_outlines):
+        for outline in outlines or []:
+            duplicate = next((item for item in merged if outline_overlap(item[2], outline) >= DUPLICATE_OVERLAP), None)
+            if duplicate:
+                # Keep the first slide on the topic and fold in any context it was missing.
+                extra = outline.get("slide_context", "")
+                if extra and extra not in duplicate[2].get("slide_context", ""):
+                    duplicate[2]["slide_context"] = f"{duplicate[2].get('slide_context', '')}\n{extra}".strip()
+                continue
+            rank = sum(1 for item in merged if item[0] == chunk_index)
+            merged.append((chunk_index, rank, dict(outline)))
+    if len(merged) <= target_slides:
+        return [outline for _, _, outline in merged]
+
+    # Share the slide budget across chunks by size (largest remainder), at least one slide per
+    # chunk that produced any, and keep each chunk's earliest slides.
+    counts = [sum(1 for item in merged if item[0] == i) for i in range(len(chunk_outlines))]
+    contributing = [i for i, count in enumerate(counts) if count]
+    total_size = sum(chunk_sizes[i] for i in contributing) or 1
+    quotas = {i: target_slides * chunk_sizes[i] / total_size for i in contributing}
+    slots = {i: min(counts[i], max(1, math.floor(quotas[i]))) for i in contributing}
+    for i in sorted(contributing, key=lambda i: quotas[i] - math.floor(quotas[i]), reverse=True):
+        if sum(slots.values()) >= target_slides:
+            break
+        if slots[i] < counts[i]:
+            slots[i] += 1
+    while sum(slots.values()) > target_slides:
+        largest = max(slots, key=lambda i: slots[i])
+        slots[largest] -= 1
+    kept = [item for item in merged if item[1] < slots.get(item[0], 0)]
+    return [outline for _, _, outline in sorted(kept, key=lambda item: (item[0], item[1]))]
+
+
+def generate_outline_mapreduce(auth_token, presentation_id, topic, instructions, target_slides=TARGET_SLIDES,
+                               on_outline=None, chunk_chars=MAP_CHUNK_CHARS, max_parallel=MAX_PARALLEL_CHUNKS, timeout=45):
+    """Outlines a large source chunk by chunk and returns the merged outlines.
+
+    Sources that fit in one chunk go through a single generate_slides_outline() call. timeout bounds
+    the whole map step: each chunk's outline request gets the time left of it when it starts.
+    """
+    from work import generate_slides_outline
+
+    topic = as_encoded_context(topic)
+    chunks = split_for_outline(topic.text, chunk_chars)
+    if len(chunks) <= 1:
+        return generate_slides_outline(auth_token, presentation_id, topic, instructions, on_outline=on_outline,
+                                       timeout=timeout)
+
+    per_chunk = max(1, math.ceil(target_slides / len(chunks)))
+    slide_range = f"1-{per_chunk + 1}"
+    print(f"Outlining {len(topic.text)} characters as {len(chunks)} chunks of up to {chunk_chars} "
+          f"({slide_range} slides each, {target_slides} slides target)")
+    ends_at = time.monotonic() + timeout
+
+    def outline_chunk(chunk):
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0:
+            return []
+        return generate_slides_outline(auth_token, presentation_id, chunk, instructions, slide_range=slide_range,
+                                       timeout=remaining)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_parallel, len(chunks)), thread_name_prefix="outline-map")
+    futures = [executor.submit(carry_step(outline_chunk), chunk) for chunk in chunks]
+    chunk_outlines = []
+    for i, future in enumerate(futures):
+        try:
+            chunk_outlines.append(future.result(timeout=max(0.0, ends_at - time.monotonic())) or [])
+        except FutureTimeoutError:
+            print(f"Outline request for chunk {i + 1} of {len(chunks)} did not finish within {timeout}s")
+            chunk_outlines.append([])
+        except Exception as e:
+            print(f"Outline request for chunk {i + 1} of {len(chunks)} failed: {e}")
+            chunk_outlines.append([])
+    # Requests still running end on their own timeouts; nothing waits for them.
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    outlines = reduce_outlines(chunk_outlines, [len(chunk) for chunk in chunks], target_slides)
+    print(f"Merged {sum(len(o) for o in chunk_outlines)} chunk outlines into {len(outlines)} slides")
+    if on_outline:
+        for outline in outlines:
+            on_outline(outline)
+    return outlines
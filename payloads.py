@@ -0,0 +1,174 @@
+import json
+import zlib
+
+import websocket
+
+# Request payloads that carry the scraped context.
+#
+# The context is JSON-encoded to UTF-8 bytes exactly once, chunk by chunk, into an EncodedContext.
+# Every request body that needs it (the outline WebSocket request and the calibration request) is
+# a PayloadBody: the small encoded fields plus a view of that shared buffer, never joined into a
+# second full-size copy. The log preview reads the first bytes of the same body, HTTP bodies are
+# streamed from it (gzip-compressed incrementally when the endpoint accepts Content-Encoding:
+# gzip; endpoints found to reject it are remembered and sent plain from then on), and WebSocket
+# requests are sent as a fragmented message, one frame per chunk.
+#
+# websocket-client does not implement permessage-deflate (it rejects compressed frames from the
+# server), so WebSocket requests are sent uncompressed.
+
+GZIP_MIN_BYTES = 16 * 1024
+GZIP_LEVEL = 6
+ENCODE_CHUNK_CHARS = 256 * 1024
+SEND_CHUNK_BYTES = 256 * 1024
+SMALL_PART_BYTES = 4 * 1024
+# 415 means the server refused Content-Encoding: gzip. Servers that parse the raw bytes answer an
+# undecodable body with 400 or 422 (FastAPI/pydantic validation), which an ordinary validation
+# error also produces: those are retried plain once, and only count as a gzip rejection when the
+# plain request then succeeds.
+GZIP_REJECTED_STATUS = 415
+GZIP_AMBIGUOUS_STATUSES = (400, 422)
+
+_gzip_unsupported_urls = set()
+
+
+class EncodedContext:
+    def __init__(self, text):
+        self.text = text or ""
+        # Encode slice by slice into one growing buffer, so the whole page never exists as an
+        # escaped str and a bytes copy at the same time.
+        buffer = bytearray(b'"')
+        for start in range(0, len(self.text), ENCODE_CHUNK_CHARS):
+            buffer += json.dumps(self.text[start:start + ENCODE_CHUNK_CHARS])[1:-1].encode("utf-8")
+        buffer += b'"'
+        self.json_bytes = buffer
+
+    def __len__(self):
+        return len(self.text)
+
+
+def as_encoded_context(context):
+    return context if isinstance(context, EncodedContext) else EncodedContext(context)
+
+
+class PayloadBody:
+    """A JSON request body held as a list of byte buffers that are never concatenated."""
+
+    def __init__(self, parts):
+        # Small neighbouring parts (the encoded fields) are merged so they don't become tiny frames.
+        self.parts = []
+        small = bytearray()
+        for part in parts:
+            if len(part) < SMALL_PART_BYTES:
+                small += part
+                continue
+            if small:
+                self.parts.append(memoryview(bytes(small)))
+                small = bytearray()
+            self.parts.append(memoryview(part))
+        if small:
+            self.parts.append(memoryview(bytes(small)))
+        self.length = sum(len(part) for part in self.parts)
+
+    def __len__(self):
+        return self.length
+
+    def iter_chunks(self, chunk_size=SEND_CHUNK_BYTES):
+        for part in self.parts:
+            for start in range(0, len(part), chunk_size):
+                yield part[start:start + chunk_size]
+
+    def reader(self):
+        return _PayloadReader(self)
+
+    def tobytes(self):
+        return b"".join(self.parts)
+
+
+class _PayloadReader:
+    # Minimal file-like view used as a requests body: requests takes the Content-Length from
+    # __len__ and http.client streams it with read().
+    def __init__(self, body):
+        self.body = body
+        self.chunks = body.iter_chunks()
+        self.pending = memoryview(b"")
+
+    def __len__(self):
+        return len(self.body)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = bytes(self.pending) + b"".join(bytes(chunk) for chunk in self.chunks)
+            self.pending = memoryview(b"")
+            return data
+        while not len(self.pending):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return b""
+            self.pending = chunk
+        data = bytes(self.pending[:size])
+        self.pending = self.pending[size:]
+        return data
+
+
+def encode_payload(fields, context=None, context_key="raw_context"):
+    """Builds a PayloadBody from fields, splicing in the pre-encoded context without copying it."""
+    encoded = json.dumps(fields).encode("utf-8")
+    if context is None:
+        return PayloadBody([encoded])
+    prefix = b"{" if encoded == b"{}" else encoded[:-1] + b", "
+    key = json.dumps(context_key).encode("utf-8")
+    return PayloadBody([prefix, key, b": ", as_encoded_context(context).json_bytes, b"}"])
+
+
+def payload_preview(body, limit=500):
+    """Decodes only the first `limit` bytes of an encoded body for logging."""
+    head = bytearray()
+    for chunk in body.iter_chunks(limit):
+        head += chunk[:limit - len(head)]
+        if len(head) >= limit:
+            break
+    preview = head.decode("utf-8", errors="replace")
+    return preview if len(body) <= limit else f"{preview}... ({len(body)} bytes total)"
+
+
+def gzip_body(body):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    compressed = [compressor.compress(chunk) for chunk in body.iter_chunks()]
+    compressed.append(compressor.flush())
+    return b"".join(compressed)
+
+
+def post_json_body(session, url, headers, body, timeout=None):
+    """POSTs a PayloadBody, gzip-compressing it when large and supported by the endpoint."""
+    if len(body) < GZIP_MIN_BYTES or url in _gzip_unsupported_urls:
+        return session.post(url, headers=headers, data=body.reader(), timeout=timeout)
+
+    compressed = gzip_body(body)
+    response = session.post(url, headers={**headers, "Content-Encoding": "gzip"}, data=compressed, timeout=timeout)
+    status = response.status_code
+    if status != GZIP_REJECTED_STATUS and status not in GZIP_AMBIGUOUS_STATUSES:
+        print(f"Sent {len(compressed)} gzip bytes instead of {len(body)} to {url}")
+        return response
+    print(f"{url} answered a gzip body with {status}; retrying uncompressed.")
+    plain_response = session.post(url, headers=headers, data=body.reader(), timeout=timeout)
+    if status == GZIP_REJECTED_STATUS or plain_response.status_code < 400:
+        print(f"{url} does not accept gzip bodies; sending uncompressed from now on.")
+        _gzip_unsupported_urls.add(url)
+    return plain_response
+
+
+def send_ws_payload(ws, body, frame_size=SEND_CHUNK_BYTES):
+    """Sends a PayloadBody over a websocket-client WebSocketApp as one text message."""
+    if len(body) <= frame_size:
+        ws.send(body.tobytes())
+        return
+    # A fragmented message: first frame is text, the rest are continuations, the last has FIN set.
+    # Only one frame's worth of data is copied (and masked) at a time.
+    chunks = body.iter_chunks(frame_size)
+    chunk = next(chunks)
+    opcode = websocket.ABNF.OPCODE_TEXT
+    for next_chunk in chunks:
+        ws.sock.send_frame(websocket.ABNF.create_frame(bytes(chunk), opcode, fin=0))
+        chunk = next_chunk
+        opcode = websocket.ABNF.OPCODE_CONT
+    ws.sock.send_frame(websocket.ABNF.create_frame(bytes(chunk), opcode, fin=1))
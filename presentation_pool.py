@@ -0,0 +1,117 @@
+import collections
+import threading
+import time
+
+from work import create_new_presentation
+
+# Pre-warmed pool of empty presentations (each created with its first slide), so a new job can
+# start generating immediately instead of waiting on create-new-presentation.
+#
+# The pool is filled once on start and after that only refilled on demand: each acquire() asks for
+# one replacement. Entries older than ttl are dropped without being replaced, so an idle daemon
+# stops creating presentations. Failed creations are retried with exponential backoff up to
+# max_backoff seconds. The backend has no delete endpoint we can call, so the most recent
+# expired presentation ids are logged and kept in `expired` for manual cleanup.
+
+EXPIRED_IDS_KEPT = 100
+
+
+class PresentationPool:
+    def __init__(self, auth_token, size=2, ttl=3600, refill_interval=5, max_backoff=300):
+        self.auth_token = auth_token
+        self.size = size
+        self.ttl = ttl
+        self.refill_interval = refill_interval
+        self.max_backoff = max_backoff
+        self.entries = collections.deque()
+        self.expired = collections.deque(maxlen=EXPIRED_IDS_KEPT)
+        self.expired_count = 0
+        self.demand = 0
+        self.failures = 0
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        with self.lock:
+            self.demand = self.size
+        self.thread = threading.Thread(target=self._refill_loop, name="presentation-pool", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def _expire(self):
+        now = time.time()
+        with self.lock:
+            while self.entries and now - self.entries[0][0] >= self.ttl:
+                _, presentation_data = self.entries.popleft()
+                self.expired.append(presentation_data["id"])
+                self.expired_count += 1
+                print(f"Dropping expired pooled presentation {presentation_data['id']}")
+
+    def _fill(self):
+        while not self.stopped.is_set():
+            with self.lock:
+                if not self.demand or len(self.entries) >= self.size:
+                    self.demand = 0
+                    return
+            presentation_data = create_new_presentation(self.auth_token)
+            if not presentation_data or not presentation_data.get("id") or not presentation_data.get("slides"):
+                self.failures += 1
+                backoff = min(self.max_backoff, self.refill_interval * 2 ** (self.failures - 1))
+                self.retry_at = time.monotonic() + backoff
+                print(f"Warning: could not pre-create a presentation for the pool; retrying in {backoff:.0f}s.")
+                return
+            self.failures = 0
+            with self.lock:
+                self.entries.append((time.time(), presentation_data))
+                self.demand -= 1
+            print(f"Pooled presentation {presentation_data['id']} ({len(self.entries)}/{self.size} ready)")
+
+    def _refill_loop(self):
+        while not self.stopped.is_set():
+            self._expire()
+            # An acquire() during a backoff only wakes the loop; the retry still waits it out.
+            delay = self.retry_at - time.monotonic()
+            if delay <= 0:
+                self._fill()
+                delay = self.retry_at - time.monotonic()
+            if delay <= 0:
+                # Nothing to retry: sleep until an acquire() or the oldest entry expires.
+                with self.lock:
+                    delay = self.entries[0][0] + self.ttl - time.time() if self.entries else None
+            self.wake.wait(timeout=None if delay is None else max(0.0, delay))
+            self.wake.clear()
+
+    def acquire(self):
+        """Returns a pre-created presentation's data, or None when the pool is empty."""
+        self._expire()
+        with self.lock:
+            if self.entries:
+                _, presentation_data = self.entries.popleft()
+                self.hits += 1
+            else:
+                presentation_data = None
+                self.misses += 1
+            self.demand += 1
+        self.wake.set()
+        return presentation_data
+
+    def stats(self):
+        with self.lock:
+            return {
+                "ready": len(self.entries),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired_count,
+            }
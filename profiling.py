@@ -0,0 +1,300 @@
+import contextlib
+import contextvars
+import cProfile
+import html
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Per-step profiling for the deck pipeline (python work.py --profile).
+#
+# Each pipeline step runs inside profile_step(name). While a Profiler is active a sampler thread
+# snapshots the stacks of every thread that is working for a step and writes for each step:
+#
+#   NN-<step>.collapsed   folded stacks ("frame;frame;frame count"), for flamegraph.pl or speedscope
+#   NN-<step>.svg         a flame graph of the same samples
+#   NN-<step>.prof        cProfile stats of the step's own thread (with deterministic=True)
+#   summary.json          wall time, CPU time and how many samples were on-CPU vs waiting
+#
+# A sample counts as on-CPU when the thread's CPU clock advanced since its previous sample, and as
+# waiting otherwise; waiting samples get a "[waiting]" leaf frame so off-CPU time shows up in the
+# flame graph. Where per-thread CPU clocks are unavailable (Windows), samples whose innermost
+# frame is a known blocking call count as waiting instead.
+#
+# A sample goes to the steps the sampled thread is running at that moment, not to whichever step
+# started the thread. Work handed to another thread (a WebSocket reader, an executor task) is
+# wrapped with carry_step() or profiled(), which attach the submitting steps to the worker thread
+# for just that call, so a pooled executor thread counts toward whichever task it is running.
+
+DEFAULT_INTERVAL = 0.005
+
+WAIT_FUNCTIONS = {
+    "wait", "sleep", "select", "poll", "recv", "recv_into", "read", "readinto", "readline", "accept",
+    "connect", "create_connection", "do_handshake", "acquire", "get", "result", "join", "_wait_for_tstate_lock",
+}
+
+_active_profiler = None
+_current_steps = contextvars.ContextVar("profile_steps", default=())
+
+
+def thread_cpu_time(thread_id):
+    """Returns a thread's CPU time in seconds, or None when the platform cannot report it."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def collapse_stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels)), frame_name(labels[0]) if labels else ""
+
+
+def frame_name(label):
+    return label.split(" ", 1)[0]
+
+
+class _Step:
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self.stacks = Counter()
+        self.cpu_samples = 0
+        self.wait_samples = 0
+        self.wall_start = time.perf_counter()
+        self.thread_cpu_start = time.thread_time()
+        self.process_cpu_start = time.process_time()
+        self.summary = None
+        self.profile = None
+
+
+class Profiler:
+    def __init__(self, output_dir, interval=DEFAULT_INTERVAL, deterministic=False):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.deterministic = deterministic
+        self.lock = threading.Lock()
+        self.steps = []
+        self.active = {}  # thread id -> steps that thread is currently working for
+        self.stopped = threading.Event()
+        self.sampler = None
+        self.last_cpu = {}
+
+    def start(self):
+        global _active_profiler
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self.sampler.start()
+        _active_profiler = self
+        return self
+
+    def stop(self):
+        global _active_profiler
+        _active_profiler = None
+        self.stopped.set()
+        if self.sampler:
+            self.sampler.join(timeout=2)
+        return self.write_summary()
+
+    def current_step(self):
+        steps = _current_steps.get()
+        return steps[-1] if steps else None
+
+    @contextlib.contextmanager
+    def attach(self, steps):
+        """Counts the calling thread toward steps until the block exits."""
+        thread_id = threading.get_ident()
+        token = _current_steps.set(steps)
+        with self.lock:
+            self.active.setdefault(thread_id, []).extend(steps)
+        try:
+            yield
+        finally:
+            with self.lock:
+                for step in steps:
+                    self.active[thread_id].remove(step)
+                if not self.active[thread_id]:
+                    del self.active[thread_id]
+            _current_steps.reset(token)
+
+    @contextlib.contextmanager
+    def step(self, name):
+        thread_id = threading.get_ident()
+        with self.lock:
+            step = _Step(len(self.steps) + 1, name)
+            self.steps.append(step)
+            self.active.setdefault(thread_id, []).append(step)
+        token = _current_steps.set(_current_steps.get() + (step,))
+        if self.deterministic:
+            step.profile = cProfile.Profile()
+            try:
+                step.profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one deterministic profiler at a time; concurrent steps are sampled only.
+                print(f"Deterministic profiling unavailable for step {name}: {e}")
+                step.profile = None
+        try:
+            yield step
+        finally:
+            _current_steps.reset(token)
+            if step.profile:
+                step.profile.disable()
+            wall = time.perf_counter() - step.wall_start
+            thread_cpu = time.thread_time() - step.thread_cpu_start
+            process_cpu = time.process_time() - step.process_cpu_start
+            with self.lock:
+                self.active[thread_id].remove(step)
+                if not self.active[thread_id]:
+                    del self.active[thread_id]
+                step.summary = {
+                    "step": name,
+                    "wall_seconds": round(wall, 4),
+                    "thread_cpu_seconds": round(thread_cpu, 4),
+                    "process_cpu_seconds": round(process_cpu, 4),
+                    "waiting_seconds": round(max(wall - thread_cpu, 0.0), 4),
+                    "samples": step.cpu_samples + step.wait_samples,
+                    "cpu_samples": step.cpu_samples,
+                    "wait_samples": step.wait_samples,
+                }
+            self._write_step(step)
+            print(f"[profile] {name}: wall {wall:.2f}s, thread CPU {thread_cpu:.2f}s, process CPU {process_cpu:.2f}s")
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self.lock:
+                active = {thread_id: list({id(step): step for step in steps}.values())
+                          for thread_id, steps in self.active.items()}
+            samples = {}
+            for thread_id in active:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                stack, leaf = collapse_stack(frame)
+                cpu = thread_cpu_time(thread_id)
+                if cpu is None:
+                    waiting = leaf in WAIT_FUNCTIONS
+                else:
+                    waiting = cpu - self.last_cpu.get(thread_id, cpu) < self.interval / 2
+                    self.last_cpu[thread_id] = cpu
+                samples[thread_id] = (f"{stack};[waiting]" if waiting else stack, waiting)
+            with self.lock:
+                for thread_id, (stack, waiting) in samples.items():
+                    for step in active[thread_id]:
+                        step.stacks[stack] += 1
+                        if waiting:
+                            step.wait_samples += 1
+                        else:
+                            step.cpu_samples += 1
+
+    def _step_path(self, step, extension):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", step.name)
+        return os.path.join(self.output_dir, f"{step.index:02d}-{safe_name}.{extension}")
+
+    def _write_step(self, step):
+        with self.lock:
+            stacks = dict(step.stacks)
+        with open(self._step_path(step, "collapsed"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        with open(self._step_path(step, "svg"), "w", encoding="utf-8") as f:
+            f.write(flame_graph_svg(stacks, f"{step.name}: {step.summary['wall_seconds']}s wall, "
+                                            f"{step.summary['thread_cpu_seconds']}s CPU"))
+        if step.profile:
+            step.profile.dump_stats(self._step_path(step, "prof"))
+
+    def write_summary(self):
+        with self.lock:
+            summary = [step.summary for step in self.steps if step.summary]
+        with open(os.path.join(self.output_dir, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n===== PROFILE ({self.output_dir}) =====")
+        for entry in summary:
+            samples = entry["samples"] or 1
+            print(f"{entry['step']:<32} wall {entry['wall_seconds']:>7.2f}s  CPU {entry['thread_cpu_seconds']:>6.2f}s  "
+                  f"waiting {entry['wait_samples'] / samples:>4.0%} of samples")
+        return summary
+
+
+def profile_step(name):
+    """Scopes a pipeline step for the active profiler; does nothing when profiling is off."""
+    if _active_profiler is None:
+        return contextlib.nullcontext()
+    return _active_profiler.step(name)
+
+
+def carry_step(func):
+    """Wraps func so that, on whatever thread runs it, it counts toward the steps active where it was wrapped."""
+    steps = _current_steps.get()
+    if _active_profiler is None or not steps:
+        return func
+    profiler = _active_profiler
+
+    def run(*args, **kwargs):
+        with profiler.attach(steps):
+            return func(*args, **kwargs)
+    return run
+
+
+def profiled(name, func):
+    """Wraps func so each call runs inside profile_step(name), nested in the steps active where it was wrapped."""
+    func = carry_step(func)
+
+    def run(*args, **kwargs):
+        with profile_step(name):
+            return func(*args, **kwargs)
+    return run
+
+
+def flame_graph_svg(stacks, title, width=1200, row_height=16):
+    """Renders folded stacks as a simple flame graph (root at the bottom)."""
+    root = {"children": {}, "count": 0}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for label in stack.split(";"):
+            node = node["children"].setdefault(label, {"children": {}, "count": 0})
+            node["count"] += count
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node["children"].values()), default=0)
+
+    rows = depth(root)
+    height = (rows + 2) * row_height
+    total = root["count"] or 1
+    rects = []
+
+    def draw(node, x, level):
+        for label, child in sorted(node["children"].items()):
+            w = width * child["count"] / total
+            y = height - (level + 1) * row_height
+            if w >= 1:
+                hue = 20 + (hash(label) % 40)
+                text = html.escape(label[: int(w / 7)]) if w > 30 else ""
+                rects.append(
+                    f'<g><title>{html.escape(label)} ({child["count"]} samples)</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" fill="hsl({hue},80%,60%)"/>'
+                    f'<text x="{x + 3:.1f}" y="{y + row_height - 4}" font-size="11">{text}</text></g>'
+                )
+                draw(child, x, level + 1)
+            x += w
+
+    draw(root, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace">'
+        f'<text x="4" y="{row_height - 3}" font-size="13">{html.escape(title)} ({root["count"]} samples)</text>'
+        + "".join(rects) + "</svg>\n"
+    )
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from events import SHARE_READY, PipelineEvents
+from presentation_pool import PresentationPool
+from work import generate_presentation, scrape_website_content
+
+# Long-running deck generation daemon.
+#
+#   POST /jobs            {"url": "https://..."}  -> {"job_id": ...}
+#   GET  /jobs/<job_id>                           -> job status
+#   GET  /jobs/<job_id>/share                     -> {"share_url": ...} once the first slide is viewable
+#   GET  /health                                  -> queue depth and worker count
+#
+# The process keeps the backend HTTP session, the Firecrawl client and the auth token in memory,
+# reuses scrapes from the shared cache (see shared_cache) for scrape_cache_ttl seconds, and keeps
+# a pool of pre-created presentations, so each job only pays for the backend work itself.
+# Finished jobs can be polled for job_ttl seconds before they are forgotten. Decks are built progressively: the share link is published as soon as
+# the first slide is ready and the rest of the deck fills in behind it.
+
+
+class DeckService:
+    def __init__(self, auth_token, concurrency=2, scrape_cache_ttl=900, slide_connections=0, fast_outline=False,
+                 job_ttl=3600):
+        self.auth_token = auth_token
+        self.concurrency = concurrency
+        self.slide_connections = slide_connections
+        self.fast_outline = fast_outline
+        self.scrape_cache_ttl = scrape_cache_ttl
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        self.job_queue = queue.Queue()
+        self.workers = []
+        self.presentation_pool = PresentationPool(auth_token, size=concurrency)
+
+    def start(self):
+        self.presentation_pool.start()
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._worker_loop, name=f"deck-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        """Stops refilling the presentation pool; running jobs are daemon threads and end with the process."""
+        self.presentation_pool.stop()
+
+    def submit(self, url):
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "url": url,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "presentation_id": None,
+            "share_url": None,
+            "time_to_first_view": None,
+            "error": None,
+        }
+        with self.jobs_lock:
+            self._evict_jobs(job["submitted_at"])
+            self.jobs[job_id] = job
+        self.job_queue.put(job_id)
+        print(f"Queued job {job_id} for {url}")
+        return job_id
+
+    def get_job(self, job_id):
+        with self.jobs_lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update_job(self, job_id, **fields):
+        with self.jobs_lock:
+            self.jobs[job_id].update(fields)
+
+    def _evict_jobs(self, now):
+        # Called with jobs_lock held; queued and running jobs are always kept.
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job["finished_at"] and now - job["finished_at"] >= self.job_ttl]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def _worker_loop(self):
+        while True:
+            job_id = self.job_queue.get()
+            job = self.get_job(job_id)
+            self._update_job(job_id, status="running", started_at=time.time())
+            try:
+                scraped_content = scrape_website_content(job["url"], max_age=self.scrape_cache_ttl)
+                events = PipelineEvents()
+                events.on(SHARE_READY, lambda event, job_id=job_id: self._update_job(
+                    job_id, share_url=event["share_url"], time_to_first_view=event["time_to_first_view"]
+                ))
+                result = generate_presentation(
+                    self.auth_token, job["url"], scraped_content=scraped_content, presentation_pool=self.presentation_pool,
+                    events=events, progressive=True, slide_connections=self.slide_connections,
+                    fast_outline=self.fast_outline
+                )
+                if result:
+                    self._update_job(
+                        job_id,
+                        status="done" if result["share_url"] else "failed",
+                        presentation_id=result["presentation_id"],
+                        share_url=result["share_url"],
+                        error=None if result["share_url"] else "Share link could not be created",
+                    )
+                else:
+                    self._update_job(job_id, status="failed", error="Presentation generation failed")
+            except Exception as e:
+                print(f"Error running job {job_id}: {e}")
+                self._update_job(job_id, status="failed", error=str(e))
+            finally:
+                self._update_job(job_id, finished_at=time.time())
+                self.job_queue.task_done()
+
+
+def make_handler(service):
+    class DeckServiceHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                self._send_json(400, {"error": "Request body must be JSON"})
+                return
+            url = body.get("url") if isinstance(body, dict) else None
+            if not isinstance(url, str) or not url.strip():
+                self._send_json(400, {"error": "Missing 'url'"})
+                return
+            self._send_json(202, {"job_id": service.submit(url.strip())})
+
+        def do_GET(self):
+            parts = [p for p in self.path.split("/") if p]
+            if parts == ["health"]:
+                self._send_json(200, {
+                    "queued": service.job_queue.qsize(),
+                    "workers": len(service.workers),
+                    "presentation_pool": service.presentation_pool.stats(),
+                })
+                return
+            if len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.get_job(parts[1])
+                if not job:
+                    self._send_json(404, {"error": "Unknown job"})
+                elif len(parts) == 2:
+                    self._send_json(200, job)
+                elif parts[2] == "share":
+                    if job["share_url"]:
+                        self._send_json(200, {"share_url": job["share_url"], "status": job["status"]})
+                    else:
+                        self._send_json(409, {"error": f"Job is {job['status']}"})
+                else:
+                    self._send_json(404, {"error": "Not found"})
+                return
+            self._send_json(404, {"error": "Not found"})
+
+    return DeckServiceHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the deck generation service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=2, help="Number of decks generated in parallel")
+    parser.add_argument("--slide-connections", type=int, default=0,
+                        help="Shared WebSocket connections per deck for slides 2..n (0: one per slide)")
+    parser.add_argument("--fast-outline", action="store_true",
+                        help="Outline well-structured pages locally instead of over the outline WebSocket")
+    args = parser.parse_args()
+
+    auth_token = os.getenv("AUTH_TOKEN")
+    if not auth_token:
+        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+        exit(1)
+
+    service = DeckService(auth_token, concurrency=args.concurrency, slide_connections=args.slide_connections,
+                          fast_outline=args.fast_outline)
+    service.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Deck service listening on http://{args.host}:{args.port} with {args.concurrency} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down deck service.")
+    finally:
+        server.server_close()
+        service.stop()
@@ -0,0 +1,296 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+# Cache shared by every work.py process on a host.
+#
+# Scrape, outline and calibration results live in one SQLite file (WAL mode, so readers never
+# block each other), keyed by namespace and key. get_or_compute() adds single-flight: the first
+# process to miss takes a lease on the key and computes the value, and every other process or
+# thread asking for the same key waits for that value instead of repeating the request. A lease
+# expires after lease_seconds, so a worker that dies mid-request does not block the key. The file
+# is kept under max_bytes by evicting the least recently used entries, and hit/miss counts are
+# kept per namespace. This is the only cache layer for these results: the service's scrapes and
+# calibration sample texts go through it too. SHARED_CACHE_FILE and SHARED_CACHE_MAX_MB are read
+# when the cache is opened, so values loaded from .env after import still apply.
+#
+#   SHARED_CACHE_FILE=/tmp/alai_cache.db python work.py https://example.com
+#   python shared_cache.py stats
+#   python shared_cache.py clear --namespace scrape
+
+DEFAULT_CACHE_FILE = "shared_cache.db"
+DEFAULT_MAX_MB = 256
+LEASE_SECONDS = 120
+POLL_INTERVAL = 0.1
+ACCESS_GRANULARITY = 60  # last_access is only rewritten when older than this, so hits stay read-mostly
+NAMESPACE_TTLS = {
+    "scrape": 6 * 3600,
+    "outline": 7 * 24 * 3600,
+    "calibration": 7 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    namespace TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    shared INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    evictions INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_namespace ON entries (namespace);
+"""
+
+_MISSING = object()
+
+
+def context_fingerprint(text):
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    def __init__(self, path=None, max_bytes=None, poll_interval=POLL_INTERVAL):
+        self.path = path or os.getenv("SHARED_CACHE_FILE", DEFAULT_CACHE_FILE)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("SHARED_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Autocommit mode; multi-statement updates take an explicit BEGIN IMMEDIATE.
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def _count(self, conn, namespace, column):
+        conn.execute("INSERT OR IGNORE INTO stats (namespace) VALUES (?)", (namespace,))
+        conn.execute(f"UPDATE stats SET {column} = {column} + 1 WHERE namespace = ?", (namespace,))
+
+    def _lookup(self, conn, key, fresh_after=0):
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, stored_at, expires_at, last_access FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return _MISSING
+        value, stored_at, expires_at, last_access = row
+        if stored_at < fresh_after:
+            return _MISSING
+        if expires_at <= now:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            return _MISSING
+        if now - last_access > ACCESS_GRANULARITY:
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def get(self, namespace, key, default=None):
+        with self._connect() as conn:
+            value = self._lookup(conn, f"{namespace}:{key}")
+            self._count(conn, namespace, "misses" if value is _MISSING else "hits")
+        return default if value is _MISSING else value
+
+    def put(self, namespace, key, value, ttl=None):
+        ttl = ttl or NAMESPACE_TTLS.get(namespace, DEFAULT_TTL)
+        data = json.dumps(value)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, value, size, stored_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"{namespace}:{key}", namespace, data, len(data), now, now + ttl, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, namespace, size in conn.execute(
+            "SELECT key, namespace, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count(conn, namespace, "evictions")
+            total -= size
+
+    def _acquire(self, conn, key, lease_seconds, fresh_after=0):
+        """Takes the lease on key if nobody holds a live one and no value has landed; returns the owner token or None."""
+        owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex}"
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        # The value may have been stored (and its lease released) since the caller's lookup.
+        if conn.execute(
+            "SELECT 1 FROM entries WHERE key = ? AND expires_at > ? AND stored_at >= ?", (key, now, fresh_after)
+        ).fetchone():
+            conn.execute("COMMIT")
+            return None
+        conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+        acquired = conn.execute(
+            "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)", (key, owner, now + lease_seconds)
+        ).rowcount == 1
+        conn.execute("COMMIT")
+        return owner if acquired else None
+
+    def _release(self, key, owner):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def get_or_compute(self, namespace, key, compute, ttl=None, lease_seconds=LEASE_SECONDS, refresh=False,
+                       max_age=None):
+        """Returns the cached value, or computes it once across all processes and caches it.
+
+        With refresh, entries stored before this call are ignored and overwritten, though a value
+        another worker is computing right now is still shared. max_age (seconds) does the same for
+        entries older than that, for callers that want fresher data than the namespace TTL.
+        Empty results (None, "", []) are returned but not cached, so the next caller retries.
+        Cache errors never fail the caller; compute() is then simply run directly.
+        """
+        full_key = f"{namespace}:{key}"
+        fresh_after = time.time() if refresh else time.time() - max_age if max_age else 0
+        waited = False
+        try:
+            while True:
+                with self._connect() as conn:
+                    value = self._lookup(conn, full_key, fresh_after)
+                    if value is not _MISSING:
+                        self._count(conn, namespace, "shared" if waited else "hits")
+                        return value
+                    owner = self._acquire(conn, full_key, lease_seconds, fresh_after)
+                    if owner:
+                        self._count(conn, namespace, "misses")
+                        break
+                if not waited:
+                    print(f"Waiting for another worker to finish {namespace} for {key[:80]}")
+                    waited = True
+                time.sleep(self.poll_interval)
+        except sqlite3.Error as e:
+            print(f"Shared cache unavailable ({e}); computing {namespace} directly.")
+            return compute()
+
+        try:
+            value = compute()
+            if value:
+                try:
+                    self.put(namespace, key, value, ttl)
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    print(f"Error storing {namespace} result in the shared cache: {e}")
+            return value
+        finally:
+            try:
+                self._release(full_key, owner)
+            except sqlite3.Error as e:
+                print(f"Error releasing shared cache lease for {namespace}: {e}")
+
+    def clear(self, namespace=None):
+        with self._connect() as conn:
+            if namespace:
+                conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+                conn.execute("DELETE FROM stats WHERE namespace = ?", (namespace,))
+            else:
+                conn.execute("DELETE FROM entries")
+                conn.execute("DELETE FROM stats")
+            conn.execute("DELETE FROM leases")
+
+    def stats(self):
+        with self._connect() as conn:
+            counters = conn.execute("SELECT namespace, hits, shared, misses, evictions FROM stats").fetchall()
+            sizes = dict(
+                (row[0], row[1:]) for row in
+                conn.execute("SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace").fetchall()
+            )
+        result = {}
+        for namespace, hits, shared, misses, evictions in counters:
+            lookups = hits + shared + misses
+            entries, size = sizes.get(namespace, (0, 0))
+            result[namespace] = {
+                "hits": hits,
+                "shared": shared,
+                "misses": misses,
+                "hit_rate": round((hits + shared) / lookups, 3) if lookups else None,
+                "evictions": evictions,
+                "entries": entries,
+                "bytes": size or 0,
+            }
+        return result
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SharedCache()
+        return _default_cache
+
+
+def cached(namespace, key, compute, ttl=None, lease_seconds=LEASE_SECONDS, refresh=False, max_age=None):
+    """get_or_compute() on the default cache; runs compute() directly if the cache cannot be opened."""
+    try:
+        cache = get_shared_cache()
+    except sqlite3.Error as e:
+        print(f"Shared cache unavailable ({e}); computing {namespace} directly.")
+        return compute()
+    return cache.get_or_compute(namespace, key, compute, ttl, lease_seconds, refresh, max_age)
+
+
+def lookup(namespace, key):
+    """get() on the default cache; None when there is no entry or the cache cannot be used."""
+    try:
+        return get_shared_cache().get(namespace, key)
+    except sqlite3.Error as e:
+        print(f"Shared cache unavailable ({e}); no cached {namespace}.")
+        return None
+
+
+def store(namespace, key, value, ttl=None):
+    """put() on the default cache; the value is simply not cached when the cache cannot be used."""
+    try:
+        get_shared_cache().put(namespace, key, value, ttl)
+    except sqlite3.Error as e:
+        print(f"Error storing {namespace} result in the shared cache: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect the cache shared by work.py processes.")
+    parser.add_argument("--cache", help="Cache file (default: $SHARED_CACHE_FILE or shared_cache.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Hit rate, entries and size per namespace")
+    clear_parser = subparsers.add_parser("clear", help="Drop cached entries")
+    clear_parser.add_argument("--namespace", help="Only this namespace (scrape, outline or calibration)")
+    args = parser.parse_args()
+
+    cache = SharedCache(args.cache)
+    if args.command == "clear":
+        cache.clear(args.namespace)
+        print(f"Cleared {args.namespace or 'all namespaces'} in {cache.path}")
+    else:
+        print(json.dumps(cache.stats(), indent=2))
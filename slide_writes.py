@@ -0,0 +1,220 @@
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from ws_archive import ARCHIVE_FILE, INDEX_FILE, WSArchive
+
+# Write-behind buffer for update-slide-entity.
+#
+# update() merges each change into the pending changes for its slide instead of posting it. A
+# flusher thread sends one request per slide once max_pending slides are waiting, the oldest
+# change is flush_interval seconds old, or barrier() is called. The request carries the slide's
+# full state (everything written so far with the pending changes merged on top). Only one batch
+# is in flight at a time and a slide appears at most once per batch, so writes to the same slide
+# always reach the backend in the order they were made.
+#
+# With a loader, the first write to a slide whose state is unknown loads the current entity and
+# merges on top of it; a slide that cannot be loaded is not written, so the backend never gets a
+# partial entity. created_at always comes from the existing record. The CLI loads entities from
+# the WebSocket archive (ws_archive.py), where every variants stream starts with the full slide.
+#
+#   python slide_writes.py edits.jsonl     # one {"slide_id": ..., "fields": {...}} per line
+
+
+def deep_merge(base, changes):
+    """Returns a copy of base with changes merged in; nested dicts are merged key by key."""
+    merged = copy.deepcopy(base)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class SlideWriteBuffer:
+    def __init__(self, auth_token, max_pending=20, flush_interval=0.5, max_parallel=4, writer=None, loader=None):
+        if writer is None:
+            from work import update_slide_entity as writer
+        self.auth_token = auth_token
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.writer = writer
+        self.loader = loader  # slide_id -> current full entity or None
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="slide-writes")
+        self.pending = OrderedDict()  # slide_id -> (first_change_time, merged changes)
+        self.states = {}  # slide_id -> full state last written (or loaded)
+        self.failed = {}  # slide_id -> changes from a failed write, reapplied on the next one
+        self.condition = threading.Condition()
+        self.flush_requested = False
+        self.closed = False
+        self.received_seq = 0
+        self.written_seq = 0
+        self.updates = 0
+        self.requests = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._flush_loop, name="slide-write-buffer", daemon=True)
+        self.thread.start()
+
+    def load(self, slide_id, state):
+        """Seeds the known full state of an existing slide without writing it."""
+        with self.condition:
+            self.states[slide_id] = copy.deepcopy(state)
+
+    def update(self, slide_id, fields):
+        """Queues a change to a slide; it is merged with any other pending change to the same slide."""
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("SlideWriteBuffer is closed")
+            if slide_id in self.pending:
+                first_time, changes = self.pending[slide_id]
+                self.pending[slide_id] = (first_time, deep_merge(changes, fields))
+            else:
+                self.pending[slide_id] = (time.monotonic(), deep_merge(self.failed.pop(slide_id, {}), fields))
+            self.updates += 1
+            self.received_seq += 1
+            if len(self.pending) >= self.max_pending:
+                self.condition.notify_all()
+
+    def flush(self):
+        """Asks the flusher to send everything pending now without waiting for it."""
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+
+    def barrier(self, timeout=None):
+        """Flushes and waits until every update made before the call has been sent.
+
+        Returns False if the wait timed out or any slide is holding changes from a failed write.
+        """
+        with self.condition:
+            target = self.received_seq
+            self.flush_requested = True
+            self.condition.notify_all()
+            if not self.condition.wait_for(lambda: self.written_seq >= target, timeout=timeout):
+                return False
+            return not self.failed
+
+    def close(self, timeout=None):
+        self.barrier(timeout=timeout)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout=timeout)
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "updates": self.updates,
+                "requests": self.requests,
+                "errors": self.errors,
+                "pending": len(self.pending),
+                "failed": len(self.failed),
+            }
+
+    def _batch_due(self):
+        if self.flush_requested or len(self.pending) >= self.max_pending:
+            return True
+        if not self.pending:
+            return False
+        first_time, _ = next(iter(self.pending.values()))
+        return time.monotonic() - first_time >= self.flush_interval
+
+    def _flush_loop(self):
+        while True:
+            with self.condition:
+                while not self.closed and not self._batch_due():
+                    if self.pending:
+                        first_time, _ = next(iter(self.pending.values()))
+                        wait = max(0.0, first_time + self.flush_interval - time.monotonic())
+                    else:
+                        wait = None
+                    self.condition.wait(timeout=wait)
+                if self.closed and not self.pending:
+                    return
+                batch = [(slide_id, changes, self.states.get(slide_id)) for slide_id, (_, changes) in self.pending.items()]
+                batch_seq = self.received_seq
+                self.pending.clear()
+                self.flush_requested = False
+
+            results = list(self.executor.map(self._write, batch))
+
+            with self.condition:
+                for (slide_id, changes, _), written in zip(batch, results):
+                    self.requests += 1
+                    if written is not None:
+                        self.states[slide_id] = written
+                    else:
+                        self.errors += 1
+                        # Keep the changes so the next write to this slide still includes them.
+                        self.failed[slide_id] = deep_merge(self.failed.get(slide_id, {}), changes)
+                        if slide_id in self.pending:
+                            first_time, newer = self.pending[slide_id]
+                            self.pending[slide_id] = (first_time, deep_merge(self.failed.pop(slide_id), newer))
+                self.written_seq = batch_seq
+                self.condition.notify_all()
+
+    def _write(self, item):
+        """Writes one slide; returns the full state that was sent, or None if the write failed."""
+        slide_id, changes, state = item
+        try:
+            if state is None and self.loader:
+                state = self.loader(slide_id)
+                if state is None:
+                    print(f"Error writing slide {slide_id}: its current entity could not be loaded")
+                    return None
+            state = state or {}
+            slide_data = deep_merge(state, changes)
+            slide_data["id"] = slide_id
+            if "created_at" in state:
+                slide_data["created_at"] = state["created_at"]
+            # The writer fills in missing fields such as created_at; keep them for the next write.
+            if self.writer(self.auth_token, slide_data) is None:
+                return None
+            return slide_data
+        except Exception as e:
+            print(f"Error writing slide {slide_id}: {e}")
+            return None
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Apply bulk slide edits through the write-behind buffer.")
+    parser.add_argument("edits", help="JSON lines file of {\"slide_id\": ..., \"fields\": {...}}")
+    parser.add_argument("--max-pending", type=int, default=20)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--archive", default=ARCHIVE_FILE, help="WebSocket archive the current slide entities are loaded from")
+    parser.add_argument("--index", default=INDEX_FILE)
+    args = parser.parse_args()
+
+    auth_token = os.getenv("AUTH_TOKEN")
+    if not auth_token:
+        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+        exit(1)
+
+    archive = WSArchive(args.archive, args.index)
+    with SlideWriteBuffer(auth_token, max_pending=args.max_pending, flush_interval=args.flush_interval,
+                          loader=archive.slide_entity) as buffer:
+        with open(args.edits) as f:
+            for line in f:
+                if line.strip():
+                    edit = json.loads(line)
+                    buffer.update(edit["slide_id"], edit["fields"])
+        ok = buffer.barrier()
+    print(json.dumps(buffer.stats(), indent=2))
+    if not ok:
+        exit(1)
@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# work.py imports firecrawl at module level; the tests never scrape, so an empty stand-in is
+# enough when the SDK is not installed.
+try:
+    import firecrawl  # noqa: F401
+except ImportError:
+    firecrawl = types.ModuleType("firecrawl")
+    firecrawl.FirecrawlApp = lambda api_key=None: None
+    sys.modules["firecrawl"] = firecrawl
+
+
+def recording(name):
+    return os.path.join(REPO_ROOT, name)
+
+
+def recorded_messages(name):
+    """The messages of a recorded WebSocket session (a JSON list of parsed messages), as sent on the wire."""
+    with open(recording(name), encoding="utf-8") as f:
+        return [message if isinstance(message, str) else json.dumps(message) for message in json.load(f)]
+
+
+HOLD_OPEN = None  # ends a queued session without closing it, like a server that stops sending
+
+
+class ReplayWebSocketApp:
+    """Stands in for websocket.WebSocketApp and plays back recorded messages instead of connecting."""
+
+    sessions = []
+
+    def __init__(self, url, on_open=None, on_message=None, on_error=None, on_close=None):
+        self.url = url
+        self.on_open = on_open
+        self.on_message = on_message
+        self.on_close = on_close
+        self.sock = None
+        self.sent = []
+        self.closed = False
+        self.client_closed = threading.Event()
+        self.messages = list(self.sessions.pop(0)) if self.sessions else []
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def close(self):
+        self.client_closed.set()
+        if not self.closed:
+            self.closed = True
+            self.on_close(self, 1000, "closed by client")
+
+    def run_forever(self):
+        self.on_open(self)
+        for message in self.messages:
+            if self.closed:
+                return
+            if message is HOLD_OPEN:
+                self.client_closed.wait(timeout=30)
+                return
+            self.on_message(self, message)
+        if not self.closed:
+            self.closed = True
+            self.on_close(self, 1000, "stream complete")
+
+
+@pytest.fixture
+def replay_ws(monkeypatch):
+    """Queues recorded sessions; each WebSocketApp created afterwards replays the next one."""
+    import websocket
+
+    monkeypatch.setattr(ReplayWebSocketApp, "sessions", [])
+    monkeypatch.setattr(websocket, "WebSocketApp", ReplayWebSocketApp)
+    return ReplayWebSocketApp.sessions
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Runs each test in its own directory so the SQLite stores and JSON caches start empty."""
+    monkeypatch.chdir(tmp_path)
+    import catalog
+    import shared_cache
+    monkeypatch.setattr(shared_cache, "_default_cache", None)
+    monkeypatch.setattr(catalog, "_default_catalog", None)
+    return tmp_path
+
+
+class FakeBackend:
+    """Records the backend calls generate_presentation makes and answers them from recorded data."""
+
+    def __init__(self):
+        self.calls = []
+        self.ids = 0
+        self.outlines = [
+            {"heading": heading, "slide_context": context, "slide_instructions": "", "images_on_slide": None}
+            for heading, context in [
+                ("Pricing", "Plans start at ten dollars a month with a free trial for new teams."),
+                ("Security", "Data is encrypted at rest and in transit; audits run every quarter."),
+                ("Integrations", "Connects to Slack, Jira and GitHub through one-click installs."),
+            ]
+        ]
+        with open(recording("variants_ws_messages.log"), encoding="utf-8") as f:
+            self.slide_contents = [m["element_slide"] for m in json.load(f) if "element_slide" in m]
+
+    def next_id(self, prefix):
+        self.ids += 1
+        return f"{prefix}{self.ids}"
+
+    def create_new_presentation(self, auth_token, timeout=None):
+        self.calls.append("create_presentation")
+        return {"id": self.next_id("pres"), "slides": [{"id": self.next_id("slide")}]}
+
+    def create_new_slide(self, auth_token, presentation_id, slide_order, timeout=None):
+        self.calls.append(("create_slide", slide_order))
+        return self.next_id("slide")
+
+    def generate_slides_outline(self, auth_token, presentation_id, topic, instructions, on_outline=None, **kwargs):
+        self.calls.append("outline")
+        for outline in self.outlines:
+            if on_outline:
+                on_outline(outline)
+        return [dict(outline) for outline in self.outlines]
+
+    def stream_slide_variants(self, auth_token, presentation_id, slide_id, outline, starting_slide_order,
+                              score_threshold=None, on_variant=None, outcome=None, **kwargs):
+        self.calls.append(("stream", slide_id))
+        variants = [{"variant_id": f"{slide_id}-v{i}", "slide_id": slide_id, "slide_content": content}
+                    for i, content in enumerate(self.slide_contents)]
+        for variant in variants:
+            if on_variant:
+                on_variant(variant)
+        if outcome is not None:
+            outcome["status"] = "complete"
+        return variants
+
+    def set_active_variant(self, auth_token, slide_id, variant_id, timeout=None):
+        self.calls.append(("activate", slide_id, variant_id))
+        return {"ok": True}
+
+    def create_share_link(self, auth_token, presentation_id, timeout=None):
+        self.calls.append("share")
+        return f"https://app.getalai.com/view/{presentation_id}"
+
+    def calibrate_presentation(self, *args, **kwargs):
+        self.calls.append("calibrate")
+        return {"ok": True}
+
+    def scrape_website_content(self, url, refresh=False, timeout=None, max_age=None):
+        self.calls.append(("scrape", url))
+        return f"# {url}\n\n## Pricing\n\nPlans start at ten dollars a month.\n\n## Security\n\nEncrypted at rest.\n"
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    import work
+
+    backend = FakeBackend()
+    for name in ["create_new_presentation", "create_new_slide", "generate_slides_outline", "stream_slide_variants",
+                 "set_active_variant", "create_share_link", "calibrate_presentation", "scrape_website_content"]:
+        monkeypatch.setattr(work, name, getattr(backend, name))
+    return backend
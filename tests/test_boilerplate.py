@@ -0,0 +1,58 @@
+from boilerplate import BoilerplateStore, chunk_content, page_key, strip_boilerplate
+
+NAV = "[Home](/) | [Pricing](/pricing) | [Blog](/blog)\n\n"
+FOOTER = "\n\nCopyright 2025 Example Inc. All rights reserved.\n"
+
+
+def article(topic, updated="May 1"):
+    paragraphs = [f"Paragraph {i} explains how {topic} works in detail, with numbers {i * 7} and {i * 11}." for i in range(8)]
+    return f"{NAV}# {topic}\n\nLast updated {updated}\n\n" + "\n\n".join(paragraphs) + FOOTER
+
+
+def test_page_key_ignores_query_fragment_and_trailing_slash():
+    assert page_key("https://Example.com/blog/post/?utm=x#top") == "example.com/blog/post"
+    assert page_key("https://example.com") == "example.com/"
+
+
+def test_rescraping_an_edited_page_does_not_strip_its_own_content(tmp_path):
+    store = BoilerplateStore(str(tmp_path / "boilerplate.db"))
+    url = "https://example.com/blog/launch"
+    for day in range(1, 6):
+        content = article("launch", updated=f"May {day}")
+        stripped = strip_boilerplate(url, content, store)
+
+    assert stripped == content
+    assert store.stats()[0]["pages"] == 1
+
+
+def test_blocks_shared_by_most_pages_of_a_domain_are_stripped(tmp_path):
+    store = BoilerplateStore(str(tmp_path / "boilerplate.db"))
+    topics = ["pricing", "security", "integrations", "roadmap"]
+    for topic in topics:
+        stripped = strip_boilerplate(f"https://example.com/{topic}", article(topic), store)
+
+    assert "[Home](/)" not in stripped
+    assert "Copyright 2025" not in stripped
+    assert "Paragraph 3 explains how roadmap works" in stripped
+    # Other domains learn separately.
+    other = article("pricing")
+    assert strip_boilerplate("https://other.example/pricing", other, store) == other
+
+
+def test_removed_blocks_stop_counting_for_a_page(tmp_path):
+    store = BoilerplateStore(str(tmp_path / "boilerplate.db"))
+    for topic in ["a", "b", "c"]:
+        strip_boilerplate(f"https://example.com/{topic}", article(topic), store)
+    # Every page drops the old footer, so it is no longer on any page.
+    for topic in ["a", "b", "c"]:
+        strip_boilerplate(f"https://example.com/{topic}", article(topic).replace(FOOTER, "\n"), store)
+
+    content = article("d")
+    stripped = strip_boilerplate("https://example.com/d", content, store)
+    assert "Copyright 2025" in stripped
+    assert "[Home](/)" not in stripped
+
+
+def test_chunks_cover_the_whole_content():
+    content = article("chunks")
+    assert "".join(chunk_content(content)) == content
@@ -0,0 +1,62 @@
+import shared_cache
+import work
+
+
+def use_fake_calibration(monkeypatch, sample=None):
+    sample_calls = []
+    verbosity_calls = []
+
+    def fake_sample_text(auth_token, presentation_id, raw_context):
+        sample_calls.append(presentation_id)
+        return sample
+
+    def fake_calibrate_verbosity(auth_token, presentation_id, original_text, verbosity_level,
+                                 previous_verbosity_level=None, tone_type="PROFESSIONAL", tone_instructions=None):
+        verbosity_calls.append((original_text, verbosity_level, previous_verbosity_level, tone_type))
+        return {"calibrated": True}
+
+    monkeypatch.setattr(work, "get_calibration_sample_text", fake_sample_text)
+    monkeypatch.setattr(work, "calibrate_verbosity", fake_calibrate_verbosity)
+    return sample_calls, verbosity_calls
+
+
+def test_calibration_miss_fetches_sample_text_once_and_caches_it(monkeypatch):
+    sample_calls, verbosity_calls = use_fake_calibration(monkeypatch, {"sample_text": "Sample text", "verbosity_level": 2})
+
+    result = work.calibrate_presentation("token", "pres1", "# Page\n\nSome content", "https://example.com/a",
+                                         tone="CASUAL", verbosity_level=2)
+    assert result == {"calibrated": True}
+    assert sample_calls == ["pres1"]
+    assert verbosity_calls == [("Sample text", 2, 2, "CASUAL")]
+
+    # Another presentation for the same page reuses the sample text, whatever its style.
+    assert work.calibrate_presentation("token", "pres2", "# Page\n\nSome content", "https://example.com/a",
+                                       tone="PROFESSIONAL", verbosity_level=4) == {"calibrated": True}
+    assert sample_calls == ["pres1"]
+    assert verbosity_calls[1] == ("Sample text", 4, 2, "PROFESSIONAL")
+
+    # One entry per context plus one per domain, and nothing else.
+    stats = shared_cache.get_shared_cache().stats()["calibration"]
+    assert stats["entries"] == 2
+
+
+def test_other_pages_of_a_domain_reuse_its_sample_text(monkeypatch):
+    sample_calls, verbosity_calls = use_fake_calibration(monkeypatch, {"sample_text": "Sample text", "verbosity_level": 2})
+
+    work.calibrate_presentation("token", "pres1", "first page", "https://example.com/a")
+    work.calibrate_presentation("token", "pres2", "second page", "https://example.com/b")
+    work.calibrate_presentation("token", "pres3", "third page", "https://other.example/")
+
+    assert sample_calls == ["pres1", "pres3"]
+    assert [call[0] for call in verbosity_calls] == ["Sample text"] * 3
+
+
+def test_failed_sample_text_falls_back_and_is_not_cached(monkeypatch):
+    sample_calls, verbosity_calls = use_fake_calibration(monkeypatch, None)
+
+    assert work.calibrate_presentation("token", "pres1", "content", "https://example.com") == {"calibrated": True}
+    assert work.calibrate_presentation("token", "pres2", "content", "https://example.com") == {"calibrated": True}
+
+    assert sample_calls == ["pres1", "pres2"]
+    assert verbosity_calls[0][0].startswith("Sample fallback text")
+    assert work.get_calibration_sample("token", "pres3", "content", "https://example.com") is None
@@ -0,0 +1,31 @@
+import sqlite3
+
+import catalog
+import work
+
+
+def test_every_streamed_variant_id_is_recorded(fake_backend):
+    result = work.generate_presentation("token", "https://example.com", dedupe_threshold=None)
+
+    deck = catalog.PresentationCatalog().deck(result["presentation_id"])
+    assert len(deck["slides"]) == len(fake_backend.outlines)
+    for slide in deck["slides"]:
+        assert slide["variant_count"] == len(slide["variant_ids"]) > 1
+        assert all(variant_id.startswith(slide["slide_id"]) for variant_id in slide["variant_ids"])
+        assert slide["variant_id"] in slide["variant_ids"]
+
+
+def test_catalog_adds_variant_ids_to_an_existing_database(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE slides (slide_id TEXT PRIMARY KEY, presentation_id TEXT NOT NULL, "
+                     "slide_order INTEGER NOT NULL, heading TEXT, outline TEXT, status TEXT NOT NULL, "
+                     "variant_id TEXT, variant_count INTEGER, stream_seconds REAL)")
+
+    deck_catalog = catalog.PresentationCatalog(path)
+    deck_catalog.record_deck(
+        {"presentation_id": "pres1", "url": "https://example.com", "status": "complete", "started_at": 0},
+        [{"slide_id": "s1", "slide_order": 0, "outline": {"heading": "Intro"}, "status": "complete",
+          "variant_id": "v2", "variant_count": 2, "variant_ids": ["v1", "v2"]}],
+    )
+    assert deck_catalog.deck("pres1")["slides"][0]["variant_ids"] == ["v1", "v2"]
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+
+import incremental
+import work
+from conftest import HOLD_OPEN, recorded_messages
+from deadline import Deadline, as_deadline
+from variant_scoring import EARLY_STOP_SCORE
+
+
+def test_budget_and_threshold_follow_the_time_left():
+    deadline = Deadline(10, reserve=2)
+    try:
+        assert deadline.budget(100) == pytest.approx(8, abs=0.1)
+        assert deadline.budget(3) == 3
+        assert deadline.budget(100, 0.25) == pytest.approx(2, abs=0.1)
+        assert deadline.variant_threshold(EARLY_STOP_SCORE) == EARLY_STOP_SCORE
+        assert deadline.slide_capacity(2) == 1
+        assert deadline.publish_timeout() == pytest.approx(10, abs=0.1)
+        assert not deadline.expired()
+    finally:
+        deadline.close()
+
+    deadline = Deadline(0.4, reserve=0.1)
+    time.sleep(0.35)
+    assert deadline.cancel.is_set()
+    assert deadline.expired()
+    # Past the cancel point a publishing request still gets the rest of the reserve.
+    assert 0 < deadline.publish_timeout() <= 0.1
+    assert deadline.variant_threshold(EARLY_STOP_SCORE) == float("-inf")
+    deadline.variant_threshold(EARLY_STOP_SCORE)
+    report = deadline.report()
+    assert [d["degradation"] for d in report["degradations"]] == ["first_variant"]
+    assert report["deadline_met"]
+
+
+def test_as_deadline_accepts_seconds_or_a_deadline():
+    assert as_deadline(None) is None
+    deadline = as_deadline(5)
+    assert isinstance(deadline, Deadline) and as_deadline(deadline) is deadline
+    deadline.close()
+
+
+def test_stream_takes_a_variant_it_already_has_once_past_halfway(replay_ws):
+    # Only the 8.30 variant arrives, then the server goes quiet.
+    messages = recorded_messages("variants_ws_messages.log")
+    replay_ws.append([messages[0], messages[2], HOLD_OPEN])
+    deadline = Deadline(2, reserve=0.5)
+    outcome = {}
+    started = time.monotonic()
+    variants = work.stream_slide_variants(
+        "token", "pres1", "slide1", {"heading": "Crazy Nature"}, starting_slide_order=0,
+        score_threshold=lambda: deadline.variant_threshold(EARLY_STOP_SCORE), outcome=outcome,
+        timeout=10, cancel=deadline.cancel
+    )
+    deadline.close()
+
+    assert outcome["status"] == "early_stop"
+    assert len(variants) == 1
+    assert time.monotonic() - started < 1.5
+
+
+def test_slow_scrape_falls_back_to_the_previous_deck(monkeypatch, fake_backend):
+    url = "https://example.com/slow"
+    previous_page = "# Product\n\n## Pricing\n\nPlans start at ten dollars.\n\n## Security\n\nEncrypted at rest.\n"
+    incremental.save_deck_state(url, previous_page, "old-pres", [])
+
+    def slow_scrape(url, refresh=False, timeout=None):
+        time.sleep(3)
+        return "too late"
+
+    monkeypatch.setattr(work, "scrape_website_content", slow_scrape)
+    started = time.monotonic()
+    result = work.generate_presentation("token", url, deadline=6, dedupe_threshold=None)
+
+    assert time.monotonic() - started < 6
+    assert result["share_url"]
+    degradations = [d["degradation"] for d in result["deadline"]["degradations"]]
+    assert "scrape_fallback" in degradations
+    assert result["deadline"]["deadline_met"]
+    state = incremental.load_deck_state(url)
+    assert state["presentation_id"] == "old-pres"
+    assert state["scraped_content"] == previous_page
+
+
+def test_failed_scrape_without_a_previous_deck_saves_no_state(monkeypatch, fake_backend):
+    url = "https://example.com/down"
+
+    def failing_scrape(url, refresh=False, timeout=None):
+        raise RuntimeError("site down")
+
+    monkeypatch.setattr(work, "scrape_website_content", failing_scrape)
+    result = work.generate_presentation("token", url, deadline=30, dedupe_threshold=None)
+
+    assert result["share_url"]
+    assert incremental.load_deck_state(url) is None
+
+
+def test_publishing_calls_are_bounded_by_the_deadline(monkeypatch, fake_backend):
+    timeouts = []
+    set_active_variant = fake_backend.set_active_variant
+    create_share_link = fake_backend.create_share_link
+
+    def timed_set_active_variant(auth_token, slide_id, variant_id, timeout=None):
+        timeouts.append(("activate", timeout))
+        return set_active_variant(auth_token, slide_id, variant_id, timeout)
+
+    def timed_create_share_link(auth_token, presentation_id, timeout=None):
+        timeouts.append(("share", timeout))
+        return create_share_link(auth_token, presentation_id, timeout)
+
+    monkeypatch.setattr(work, "set_active_variant", timed_set_active_variant)
+    monkeypatch.setattr(work, "create_share_link", timed_create_share_link)
+    result = work.generate_presentation("token", "https://example.com", deadline=60, dedupe_threshold=None)
+
+    assert result["share_url"]
+    assert {kind for kind, _ in timeouts} == {"activate", "share"}
+    assert all(timeout is not None and 0 < timeout <= 60 for _, timeout in timeouts)
+
+
+def test_deadline_without_degradations_builds_the_whole_deck(fake_backend):
+    result = work.generate_presentation("token", "https://example.com", deadline=300, dedupe_threshold=None)
+    assert len(result["slides"]) == len(fake_backend.outlines)
+    assert result["deadline"]["deadline_met"]
+    assert "fewer_slides" not in [d["degradation"] for d in result["deadline"]["degradations"]]
+
+
+def test_shared_connection_slides_are_resolved_once(monkeypatch, fake_backend):
+    # Slide 3 is never created in time; its creation budget must only be spent (and reported) once.
+    release = threading.Event()
+    create_new_slide = fake_backend.create_new_slide
+
+    def stuck_create_new_slide(auth_token, presentation_id, slide_order, timeout=None):
+        if slide_order == 3:
+            release.wait(5)
+        return create_new_slide(auth_token, presentation_id, slide_order, timeout)
+
+    def fake_stream_deck_variants(auth_token, presentation_id, slides, outcomes=None, **kwargs):
+        for slide in slides:
+            outcomes[slide["slide_id"]] = "complete"
+        return {slide["slide_id"]: fake_backend.stream_slide_variants(
+            auth_token, presentation_id, slide["slide_id"], slide["outline"], slide["slide_order"]) for slide in slides}
+
+    class ShortBudgets(Deadline):
+        def budget(self, cap, share=1.0):
+            return min(super().budget(cap, share), 0.3)
+
+    monkeypatch.setattr(work, "create_new_slide", stuck_create_new_slide)
+    monkeypatch.setattr(work, "stream_deck_variants", fake_stream_deck_variants)
+    started = time.monotonic()
+    try:
+        result = work.generate_presentation("token", "https://example.com", scraped_content="# Page\n\nText.",
+                                            deadline=ShortBudgets(60), slide_connections=2, dedupe_threshold=None)
+    finally:
+        release.set()
+
+    degradations = [d["degradation"] for d in result["deadline"]["degradations"]]
+    assert degradations.count("slide_not_created") == 1
+    assert [slide["slide_order"] for slide in result["slides"]] == [0, 2]
+    assert time.monotonic() - started < 2
@@ -0,0 +1,75 @@
+import json
+import threading
+
+from conftest import HOLD_OPEN, recorded_messages
+from deck_stream import parse_variant_message, stream_deck_variants
+from variant_scoring import EARLY_STOP_SCORE
+
+RECORDED_SLIDE = "77407ad5-00eb-4f6a-97cf-8007ed3eacbe"
+
+
+def session_for(slide_id, messages=None):
+    """The recorded variants session, re-addressed to slide_id."""
+    messages = messages or recorded_messages("variants_ws_messages.log")
+    return [message.replace(RECORDED_SLIDE, slide_id) for message in messages]
+
+
+def deck(*slide_ids):
+    return [{"slide_id": slide_id, "outline": {"heading": slide_id}, "slide_order": order}
+            for order, slide_id in enumerate(slide_ids, start=2)]
+
+
+def interleaved(*slide_ids):
+    sessions = [session_for(slide_id) for slide_id in slide_ids]
+    return [message for messages in zip(*sessions) for message in messages]
+
+
+def test_parse_variant_message_handles_recorded_formats():
+    messages = [json.loads(message) for message in recorded_messages("variants_ws_messages.log")]
+    assert parse_variant_message(messages[0]) is None
+    parsed = parse_variant_message(messages[1])
+    assert parsed[0]["slide_id"] == RECORDED_SLIDE
+    assert parsed[0]["variant_id"] == messages[1]["id"]
+    assert parse_variant_message([{"id": "v1"}], "s1") == [{"variant_id": "v1", "slide_id": "s1", "slide_content": {}}]
+
+
+def test_shared_connection_reports_early_stop_per_slide(replay_ws):
+    replay_ws.append(interleaved("s2", "s3"))
+    outcomes = {}
+    results = stream_deck_variants("token", "pres1", deck("s2", "s3"), score_threshold=EARLY_STOP_SCORE,
+                                   outcomes=outcomes, timeout=5, idle_timeout=1)
+    assert outcomes == {"s2": "early_stop", "s3": "early_stop"}
+    assert all(results[slide_id] for slide_id in ("s2", "s3"))
+
+
+def test_shared_connection_without_threshold_completes(replay_ws):
+    replay_ws.append(interleaved("s2", "s3"))
+    outcomes = {}
+    results = stream_deck_variants("token", "pres1", deck("s2", "s3"), outcomes=outcomes, timeout=5, idle_timeout=1)
+    assert outcomes == {"s2": "complete", "s3": "complete"}
+    assert [len(results["s2"]), len(results["s3"])] == [4, 4]
+
+
+def test_slides_missing_from_the_shared_connection_fall_back(replay_ws):
+    replay_ws.append(session_for("s2"))
+    replay_ws.append(session_for("s3"))
+    outcomes = {}
+    results = stream_deck_variants("token", "pres1", deck("s2", "s3"), score_threshold=EARLY_STOP_SCORE,
+                                   outcomes=outcomes, timeout=5, idle_timeout=1)
+    assert outcomes["s3"] == "early_stop"
+    assert results["s3"][0]["slide_id"] == "s3"
+    assert replay_ws == []
+
+
+def test_cancel_ends_the_shared_stream_without_fallback(replay_ws):
+    replay_ws.append(session_for("s2")[:2] + [HOLD_OPEN])
+    replay_ws.append(session_for("s3"))
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    outcomes = {}
+    results = stream_deck_variants("token", "pres1", deck("s2", "s3"), outcomes=outcomes, timeout=10,
+                                   idle_timeout=10, cancel=cancel)
+    assert outcomes == {"s2": "cancelled", "s3": "cancelled"}
+    assert len(results["s2"]) == 1
+    assert results["s3"] == []
+    assert len(replay_ws) == 1
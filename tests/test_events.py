@@ -0,0 +1,42 @@
+import asyncio
+
+from events import (
+    OUTLINE_RECEIVED,
+    PIPELINE_FINISHED,
+    SHARE_READY,
+    SLIDE_CREATED,
+    VARIANT_ACTIVATED,
+    VARIANT_RECEIVED,
+    generate_presentation_events,
+)
+
+
+async def collect(**kwargs):
+    return [event async for event in generate_presentation_events("token", "https://example.com", **kwargs)]
+
+
+def test_events_follow_the_pipeline_and_end_with_pipeline_finished(fake_backend):
+    events = asyncio.run(collect(dedupe_threshold=None))
+
+    variant_count = len(fake_backend.slide_contents)
+    per_slide = [SLIDE_CREATED] + [VARIANT_RECEIVED] * variant_count + [VARIANT_ACTIVATED]
+    expected = (
+        [SLIDE_CREATED]
+        + [OUTLINE_RECEIVED] * len(fake_backend.outlines)
+        + [VARIANT_RECEIVED] * variant_count + [VARIANT_ACTIVATED]
+        + per_slide * (len(fake_backend.outlines) - 1)
+        + [SHARE_READY, PIPELINE_FINISHED]
+    )
+    assert [event["type"] for event in events] == expected
+
+    result = events[-1]["result"]
+    assert [event["slide_order"] for event in events if event["type"] == SLIDE_CREATED] == [0, 2, 3]
+    assert {event["presentation_id"] for event in events[:-1]} == {result["presentation_id"]}
+    assert events[-2]["share_url"] == result["share_url"]
+
+
+def test_pipeline_finished_is_emitted_when_generation_fails(monkeypatch, fake_backend):
+    monkeypatch.setattr(fake_backend, "outlines", [])
+    events = asyncio.run(collect(dedupe_threshold=None))
+    assert [event["type"] for event in events] == [SLIDE_CREATED, PIPELINE_FINISHED]
+    assert events[-1]["result"] is None
@@ -0,0 +1,39 @@
+import fanout
+import incremental
+import work
+
+URL = "https://example.com/product"
+STYLES = [("PROFESSIONAL", 4), ("CASUAL", 2)]
+
+
+def test_each_style_keeps_its_own_deck_state(monkeypatch, fake_backend):
+    for name in ["create_new_presentation", "generate_slides_outline", "scrape_website_content"]:
+        monkeypatch.setattr(fanout, name, getattr(fake_backend, name))
+    sample_calls = []
+
+    def fake_sample_text(auth_token, presentation_id, raw_context):
+        sample_calls.append(presentation_id)
+        return {"sample_text": "Sample", "verbosity_level": 3}
+
+    monkeypatch.setattr(work, "get_calibration_sample_text", fake_sample_text)
+
+    results = fanout.generate_presentation_fanout("token", URL, STYLES)
+
+    assert len(sample_calls) == 1
+
+    states = [incremental.load_deck_state(URL, style) for style in STYLES]
+    assert [state["presentation_id"] for state in states] == [result["presentation_id"] for result in results]
+    assert [tuple(state["style"]) for state in states] == STYLES
+    assert len({result["presentation_id"] for result in results}) == 2
+    # The default style is still found by URL alone.
+    assert incremental.load_deck_state(URL)["presentation_id"] == results[0]["presentation_id"]
+
+
+def test_regenerate_uses_the_requested_style(monkeypatch):
+    page = "# Product\n\n## Pricing\n\nPlans start at ten dollars.\n"
+    incremental.save_deck_state(URL, page, "professional-pres", [])
+    incremental.save_deck_state(URL, page, "casual-pres", [], style=("CASUAL", 2))
+
+    result = incremental.regenerate_changed_slides("token", URL, new_content=page, style=("CASUAL", 2))
+    assert result == {"presentation_id": "casual-pres", "regenerated": []}
+    assert incremental.regenerate_changed_slides("token", URL, new_content=page, style=("CASUAL", 5)) is None
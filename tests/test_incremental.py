@@ -0,0 +1,23 @@
+import incremental
+import shared_cache
+import work
+
+PAGE = "# Product\n\n## Pricing\n\nStarts at $10 a month.\n\n## Support\n\nEmail us any time.\n"
+
+
+def test_regenerate_rescrapes_past_the_shared_cache(monkeypatch):
+    slides = [{"slide_id": "s1", "slide_order": 0, "variant_id": "v0",
+               "outline": {"heading": "Pricing", "slide_context": "Starts at $10 a month."}}]
+    incremental.save_deck_state("https://example.com", PAGE, "pres1", slides)
+    shared_cache.get_shared_cache().put("scrape", "https://example.com", PAGE)
+
+    changed = PAGE.replace("$10", "$12")
+    monkeypatch.setattr(work, "fetch_website_content", lambda url, timeout=None: changed)
+    monkeypatch.setattr(work, "stream_slide_variants",
+                        lambda *args, **kwargs: [{"variant_id": "v1", "slide_content": {}}])
+    monkeypatch.setattr(work, "set_active_variant", lambda *args: {"ok": True})
+
+    result = incremental.regenerate_changed_slides("token", "https://example.com")
+    assert result["regenerated"] == ["s1"]
+    assert incremental.load_deck_state("https://example.com")["scraped_content"] == changed
+    assert shared_cache.get_shared_cache().get("scrape", "https://example.com") == changed
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+
+import work
+from job_queue import JobQueue, keep_lease, run_worker
+
+
+def leased_job(tmp_path, lease_seconds=0.3):
+    job_queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=lease_seconds)
+    job_queue.enqueue("https://example.com")
+    return job_queue, job_queue.claim("worker-1")
+
+
+def run_keep_lease(job_queue, job, duration, retry_interval=0.02):
+    stop, lease_lost = threading.Event(), threading.Event()
+    thread = threading.Thread(target=keep_lease, args=(job_queue, job["id"], "worker-1", stop, lease_lost, retry_interval))
+    thread.start()
+    lease_lost.wait(duration)
+    stop.set()
+    thread.join(timeout=2)
+    return lease_lost.is_set()
+
+
+def test_heartbeat_retries_after_database_errors(tmp_path, monkeypatch):
+    job_queue, job = leased_job(tmp_path)
+    heartbeat = job_queue.heartbeat
+    calls = []
+
+    def flaky_heartbeat(job_id, worker_id):
+        calls.append(job_id)
+        if len(calls) <= 2:
+            raise sqlite3.OperationalError("database is locked")
+        return heartbeat(job_id, worker_id)
+
+    monkeypatch.setattr(job_queue, "heartbeat", flaky_heartbeat)
+    assert not run_keep_lease(job_queue, job, 0.6)
+    assert len(calls) > 3
+    assert job_queue.claim("worker-2") is None
+
+
+def test_lease_lost_when_errors_outlast_the_lease(tmp_path, monkeypatch):
+    job_queue, job = leased_job(tmp_path)
+
+    def locked(job_id, worker_id):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(job_queue, "heartbeat", locked)
+    assert run_keep_lease(job_queue, job, 2)
+
+
+def test_lease_lost_when_another_worker_took_the_job(tmp_path):
+    job_queue, job = leased_job(tmp_path, lease_seconds=0.15)
+    with job_queue._connect() as conn:
+        conn.execute("UPDATE jobs SET lease_owner = 'worker-2' WHERE id = ?", (job["id"],))
+    assert run_keep_lease(job_queue, job, 2)
+
+
+def test_worker_abandons_the_deck_when_its_lease_is_lost(tmp_path, monkeypatch, fake_backend):
+    job_queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.3)
+    job_id = job_queue.enqueue("https://example.com")
+    stream = fake_backend.stream_slide_variants
+
+    def stream_while_another_worker_takes_over(*args, cancel=None, **kwargs):
+        with job_queue._connect() as conn:
+            conn.execute("UPDATE jobs SET lease_owner = 'worker-2' WHERE id = ?", (job_id,))
+        assert cancel.wait(2)
+        return stream(*args, **kwargs)
+
+    monkeypatch.setattr(work, "stream_slide_variants", stream_while_another_worker_takes_over)
+    run_worker(job_queue, "token", "worker-1", once=True)
+
+    assert "share" not in fake_backend.calls
+    assert [call for call in fake_backend.calls if call[0] == "stream"] == [("stream", "slide2")]
+    with job_queue._connect() as conn:
+        job = conn.execute("SELECT status, lease_owner, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    assert (job["status"], job["lease_owner"], job["result"]) == ("leased", "worker-2", None)
@@ -0,0 +1,30 @@
+import work
+from local_outline import MIN_QUALITY, build_local_outline, local_outline
+
+STRUCTURED = "# Acme Analytics\n\n" + "\n\n".join(
+    f"## {heading}\n\n- {heading} point one explains the feature in a full sentence.\n"
+    f"- {heading} point two adds the numbers customers ask about.\n"
+    f"- {heading} point three covers rollout and support."
+    for heading in ["Dashboards", "Alerts", "Integrations", "Pricing", "Security"]
+)
+
+
+def test_structured_page_is_outlined_from_its_headings():
+    outlines, quality, reasons = build_local_outline(STRUCTURED)
+    assert quality >= MIN_QUALITY, reasons
+    assert [o["heading"] for o in outlines] == ["Acme Analytics", "Dashboards", "Alerts", "Integrations", "Pricing",
+                                               "Security"]
+
+
+def test_unstructured_page_is_left_to_the_outline_websocket():
+    assert local_outline("Just one long paragraph without any headings at all. " * 20) is None
+
+
+def test_fast_outline_skips_the_outline_websocket(monkeypatch, fake_backend):
+    monkeypatch.setattr(fake_backend, "scrape_website_content", lambda url, refresh=False, timeout=None: STRUCTURED)
+    monkeypatch.setattr(work, "scrape_website_content", fake_backend.scrape_website_content)
+
+    result = work.generate_presentation("token", "https://acme.example", fast_outline=True, dedupe_threshold=None)
+
+    assert "outline" not in fake_backend.calls
+    assert [slide["outline"]["heading"] for slide in result["slides"]][:2] == ["Acme Analytics", "Dashboards"]
@@ -0,0 +1,45 @@
+import catalog
+import incremental
+import multi_source
+
+URLS = ["https://example.com/product", "https://example.com/docs"]
+
+
+def use_fake_backend(monkeypatch, fake_backend, outline=True):
+    monkeypatch.setattr(multi_source, "create_new_presentation", fake_backend.create_new_presentation)
+    monkeypatch.setattr(multi_source, "scrape_website_content", fake_backend.scrape_website_content)
+
+    def fake_mapreduce(auth_token, presentation_id, topic, instructions, target_slides=8, **kwargs):
+        return fake_backend.generate_slides_outline(auth_token, presentation_id, topic, instructions) if outline else []
+
+    monkeypatch.setattr(multi_source, "generate_outline_mapreduce", fake_mapreduce)
+
+
+def test_source_key_ignores_order_and_duplicates():
+    assert multi_source.source_key(URLS) == multi_source.source_key(list(reversed(URLS)) + URLS[:1])
+    assert multi_source.source_key(URLS) != multi_source.source_key(URLS[:1])
+
+
+def test_multi_source_deck_is_stored_under_its_own_key(monkeypatch, fake_backend):
+    use_fake_backend(monkeypatch, fake_backend)
+    single_page_state = incremental.save_deck_state(URLS[0], "# Product\n\nSingle page.", "single-pres", [])
+
+    result = multi_source.generate_multi_source_presentation("token", URLS, target_slides=4)
+
+    assert result["sources"] == URLS
+    assert incremental.load_deck_state(URLS[0]) == single_page_state
+    state = incremental.load_deck_state(multi_source.source_key(URLS))
+    assert state["presentation_id"] == result["presentation_id"]
+    deck = catalog.PresentationCatalog().deck(result["presentation_id"])
+    assert deck["url"] == multi_source.source_key(URLS)
+    assert deck["sources"] == URLS
+
+
+def test_failed_outlining_records_the_unused_presentation(monkeypatch, fake_backend):
+    use_fake_backend(monkeypatch, fake_backend, outline=False)
+
+    assert multi_source.generate_multi_source_presentation("token", URLS) is None
+
+    deck = catalog.PresentationCatalog().latest_deck(multi_source.source_key(URLS), status="failed")
+    assert deck["sources"] == URLS
+    assert deck["slides"] == []
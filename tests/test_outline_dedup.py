@@ -0,0 +1,72 @@
+import json
+
+import work
+from conftest import recorded_messages
+from outline_dedup import DEFAULT_THRESHOLD, content_terms, dedupe_outlines, find_near_duplicates
+
+DISTINCT = [
+    {"heading": "Pricing", "slide_context": "Plans start at ten dollars a month with a free trial for new teams."},
+    {"heading": "Security", "slide_context": "Data is encrypted at rest and in transit; audits run every quarter."},
+    {"heading": "Integrations", "slide_context": "Connects to Slack, Jira and GitHub through one-click installs."},
+]
+
+
+def recorded_outlines():
+    return [json.loads(message) for message in recorded_messages("outline_ws_messages.json")]
+
+
+def test_terms_ignore_stop_words_and_word_endings():
+    assert content_terms("Exploring the natural worlds") == {"explor", "natur", "world"}
+    assert content_terms("Explore nature and the world") == {"explor", "natur", "world"}
+
+
+def test_restated_title_slide_is_flagged_in_the_recorded_stream(replay_ws):
+    replay_ws.append(recorded_messages("outline_ws_messages.json"))
+    outlines = work.stream_slides_outline("token", "pres1", "Crazy Nature", "instructions", timeout=5)
+    assert [o["heading"] for o in outlines] == [
+        "Crazy Nature", "Exploring the Wonders of Crazy Nature", "Why Crazy Nature Matters"
+    ]
+
+    pairs = find_near_duplicates(outlines)
+
+    assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+    assert pairs[0][2] >= DEFAULT_THRESHOLD
+
+
+def test_duplicates_are_merged_into_the_first_outline():
+    outlines = recorded_outlines()
+
+    deduped, groups = dedupe_outlines(outlines)
+
+    assert groups == {0: [1]}
+    assert [o["heading"] for o in deduped] == ["Crazy Nature", "Why Crazy Nature Matters"]
+    for line in outlines[1]["slide_context"].splitlines():
+        assert line in deduped[0]["slide_context"]
+    assert deduped[1] == outlines[2]
+
+
+def test_flag_only_keeps_every_outline():
+    outlines = recorded_outlines()
+
+    flagged, groups = dedupe_outlines(outlines, merge=False)
+
+    assert groups == {0: [1]}
+    assert [o.get("duplicate_of") for o in flagged] == [None, 0, None]
+
+
+def test_distinct_outlines_and_small_overlaps_are_kept():
+    assert find_near_duplicates(DISTINCT) == []
+    # Two shared terms make a high overlap for tiny outlines, but not a duplicate.
+    assert find_near_duplicates([{"heading": "Crazy Nature"}, {"heading": "Crazy Nature Quiz"}]) == []
+    deduped, groups = dedupe_outlines(DISTINCT)
+    assert deduped == DISTINCT and groups == {}
+
+
+def test_pipeline_creates_no_slide_for_a_duplicate_outline(fake_backend):
+    fake_backend.outlines = recorded_outlines()
+
+    result = work.generate_presentation("token", "https://example.com")
+
+    assert result is not None
+    assert sum(1 for call in fake_backend.calls if call == "create_presentation") == 1
+    assert sum(1 for call in fake_backend.calls if isinstance(call, tuple) and call[0] == "stream") == 2
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import outline_mapreduce
+import work
+
+SOURCE = "\n\n".join(
+    f"# {topic}\n\n{topic} overview. " + f"Details about {topic.lower()} and how teams use them. " * 6
+    for topic in ["Pricing", "Security", "Integrations"]
+)
+
+
+def outline_for(chunk):
+    heading = chunk.split("\n", 1)[0].lstrip("# ")
+    return [{"heading": heading, "slide_context": f"All about {heading}.", "slide_instructions": ""}]
+
+
+def use_backend(monkeypatch, seconds_per_chunk=0.0, hang=None):
+    calls = []
+
+    def generate_slides_outline(auth_token, presentation_id, topic, instructions, slide_range="2-5", timeout=45,
+                                **kwargs):
+        calls.append({"chunk": topic, "timeout": timeout, "slide_range": slide_range})
+        if hang is not None and "Integrations" in topic:
+            hang.wait()  # a request that ignores its timeout
+            return []
+        # Like the real stream, a request gives up (with nothing) when its timeout runs out first.
+        time.sleep(min(seconds_per_chunk, timeout))
+        return outline_for(topic) if seconds_per_chunk <= timeout else []
+
+    monkeypatch.setattr(work, "generate_slides_outline", generate_slides_outline)
+    return calls
+
+
+def test_chunks_are_outlined_and_merged_in_document_order(monkeypatch):
+    calls = use_backend(monkeypatch)
+    received = []
+
+    outlines = outline_mapreduce.generate_outline_mapreduce(
+        "token", "pres", SOURCE, "instructions", target_slides=6, on_outline=received.append, chunk_chars=400
+    )
+
+    assert len(calls) == 3
+    assert {call["slide_range"] for call in calls} == {"1-3"}
+    assert [o["heading"] for o in outlines] == ["Pricing", "Security", "Integrations"]
+    assert received == outlines
+
+
+def test_map_phase_shares_one_timeout(monkeypatch):
+    calls = use_backend(monkeypatch, seconds_per_chunk=0.3)
+
+    started = time.monotonic()
+    outlines = outline_mapreduce.generate_outline_mapreduce(
+        "token", "pres", SOURCE, "instructions", chunk_chars=400, max_parallel=1, timeout=0.5
+    )
+    elapsed = time.monotonic() - started
+
+    # One worker: the first chunk fits, the second gets only what is left and the third none of it.
+    assert elapsed < 0.7
+    assert [o["heading"] for o in outlines] == ["Pricing"]
+    assert calls[0]["timeout"] <= 0.5
+    assert all(call["timeout"] < 0.25 for call in calls[1:])
+
+
+def test_map_phase_does_not_wait_for_a_request_past_the_timeout(monkeypatch):
+    hang = threading.Event()
+    use_backend(monkeypatch, hang=hang)
+    try:
+        started = time.monotonic()
+        outlines = outline_mapreduce.generate_outline_mapreduce(
+            "token", "pres", SOURCE, "instructions", chunk_chars=400, timeout=0.3
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        hang.set()
+
+    assert elapsed < 0.6
+    assert [o["heading"] for o in outlines] == ["Pricing", "Security"]
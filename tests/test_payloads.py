@@ -0,0 +1,85 @@
+import gzip
+import json
+
+import pytest
+
+import payloads
+from conftest import recording
+from payloads import EncodedContext, encode_payload, payload_preview, post_json_body
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeSession:
+    def __init__(self, gzip_status, plain_status=200):
+        self.gzip_status = gzip_status
+        self.plain_status = plain_status
+        self.posts = []
+
+    def post(self, url, headers, data, timeout=None):
+        gzipped = headers.get("Content-Encoding") == "gzip"
+        body = gzip.decompress(data) if gzipped else data.read()
+        self.posts.append({"gzip": gzipped, "body": json.loads(body), "timeout": timeout})
+        return FakeResponse(self.gzip_status if gzipped else self.plain_status)
+
+
+@pytest.fixture
+def large_body():
+    with open(recording("outline_ws_messages.json"), encoding="utf-8") as f:
+        outlines = [json.loads(message) for message in json.load(f)]
+    # Real outline text from the recorded session, repeated past the gzip threshold.
+    text = "\n\n".join(o["slide_context"] for o in outlines) * 40
+    assert len(text) > payloads.GZIP_MIN_BYTES
+    return encode_payload({"presentation_id": "pres1"}, context=text)
+
+
+@pytest.fixture(autouse=True)
+def fresh_gzip_state(monkeypatch):
+    monkeypatch.setattr(payloads, "_gzip_unsupported_urls", set())
+
+
+def test_encoded_body_matches_json_dumps():
+    text = 'Quotes " and unicode é and newlines\n' * 10
+    body = encode_payload({"presentation_id": "p", "slide_order": 0}, context=EncodedContext(text))
+    assert json.loads(body.tobytes()) == {"presentation_id": "p", "slide_order": 0, "raw_context": text}
+    assert json.loads(body.reader().read()) == json.loads(body.tobytes())
+    assert payload_preview(body, limit=20).endswith(f"({len(body)} bytes total)")
+
+
+def test_large_bodies_are_gzipped_when_accepted(large_body):
+    session = FakeSession(gzip_status=200)
+    assert post_json_body(session, "https://api.example/calibrate", {}, large_body, timeout=7).status_code == 200
+    assert [(post["gzip"], post["timeout"]) for post in session.posts] == [(True, 7)]
+    assert session.posts[0]["body"]["presentation_id"] == "pres1"
+
+
+@pytest.mark.parametrize("status", [400, 415, 422])
+def test_rejected_gzip_falls_back_and_is_remembered(large_body, status):
+    session = FakeSession(gzip_status=status)
+    url = "https://api.example/calibrate"
+    assert post_json_body(session, url, {}, large_body, timeout=7).status_code == 200
+    assert [(post["gzip"], post["timeout"]) for post in session.posts] == [(True, 7), (False, 7)]
+    assert session.posts[1]["body"] == session.posts[0]["body"]
+
+    post_json_body(session, url, {}, large_body)
+    assert [post["gzip"] for post in session.posts] == [True, False, False]
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_validation_errors_do_not_disable_gzip(large_body, status):
+    # The body itself is invalid: the plain retry fails the same way, so gzip was not the problem.
+    session = FakeSession(gzip_status=status, plain_status=status)
+    url = "https://api.example/calibrate"
+    assert post_json_body(session, url, {}, large_body).status_code == status
+    post_json_body(session, url, {}, large_body)
+    assert [post["gzip"] for post in session.posts] == [True, False, True, False]
+    assert url not in payloads._gzip_unsupported_urls
+
+
+def test_small_bodies_are_sent_plain():
+    session = FakeSession(gzip_status=200)
+    post_json_body(session, "https://api.example/calibrate", {}, encode_payload({"a": 1}, context="short"))
+    assert [post["gzip"] for post in session.posts] == [False]
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+import presentation_pool
+import work
+from presentation_pool import PresentationPool
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def created(monkeypatch, fake_backend):
+    monkeypatch.setattr(presentation_pool, "create_new_presentation", fake_backend.create_new_presentation)
+    return lambda: fake_backend.calls.count("create_presentation")
+
+
+def test_idle_pool_does_not_replace_expired_presentations(created):
+    pool = PresentationPool("token", size=1, ttl=0.1, refill_interval=0.01).start()
+    try:
+        wait_for(lambda: pool.stats()["ready"] == 1)
+        wait_for(lambda: pool.stats()["expired"] == 1)
+        time.sleep(0.2)
+        assert created() == 1
+        assert pool.stats()["ready"] == 0
+
+        # Demand brings it back: a miss asks for a replacement.
+        assert pool.acquire() is None
+        wait_for(lambda: pool.stats()["ready"] == 1)
+        assert created() == 2
+    finally:
+        pool.stop()
+
+
+def test_failed_creations_back_off(monkeypatch):
+    attempts = []
+    monkeypatch.setattr(presentation_pool, "create_new_presentation", lambda auth_token: attempts.append(1))
+    pool = PresentationPool("token", size=1, refill_interval=0.02, max_backoff=0.16).start()
+    try:
+        time.sleep(0.6)
+        for _ in range(5):
+            pool.acquire()
+        time.sleep(0.05)
+    finally:
+        pool.stop()
+    # 0.02 + 0.04 + 0.08 + 0.16 + 0.16 ... seconds apart, and acquire() does not cut a backoff short.
+    assert 3 <= len(attempts) <= 7
+
+
+def test_expired_ids_are_bounded(monkeypatch):
+    pool = PresentationPool("token", ttl=0)
+    pool.entries.extend((0, {"id": f"pres{i}"}) for i in range(presentation_pool.EXPIRED_IDS_KEPT + 5))
+    pool._expire()
+    assert len(pool.expired) == presentation_pool.EXPIRED_IDS_KEPT
+    assert pool.stats()["expired"] == presentation_pool.EXPIRED_IDS_KEPT + 5
+
+
+def test_no_slides_are_created_when_the_first_slide_fails(monkeypatch, fake_backend):
+    monkeypatch.setattr(work, "stream_slide_variants", lambda *args, **kwargs: [])
+    assert work.generate_presentation("token", "https://example.com", dedupe_threshold=None) is None
+    assert not [call for call in fake_backend.calls if call[0] == "create_slide"]
@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import Profiler, profile_step, profiled
+
+
+def spin_in_first(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def spin_in_second(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_pooled_thread_samples_go_to_the_step_it_is_running(tmp_path):
+    profiler = Profiler(str(tmp_path), interval=0.002).start()
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with profile_step("pipeline"):
+                executor.submit(profiled("first", spin_in_first), 0.2).result()
+                executor.submit(profiled("second", spin_in_second), 0.2).result()
+            # The worker outlives the steps; its later work belongs to none of them.
+            executor.submit(spin_in_first, 0.1).result()
+    finally:
+        profiler.stop()
+
+    steps = {step.name: step for step in profiler.steps}
+    first = "".join(steps["first"].stacks)
+    second = "".join(steps["second"].stacks)
+    assert "spin_in_first" in first and "spin_in_second" not in first
+    assert "spin_in_second" in second and "spin_in_first" not in second
+    pipeline = steps["pipeline"].stacks
+    assert any("spin_in_first" in stack for stack in pipeline)
+    assert any("spin_in_second" in stack for stack in pipeline)
+    # Work after the pipeline step ended is not counted toward it.
+    assert sum(count for stack, count in pipeline.items() if "spin_in_first" in stack) == \
+        sum(count for stack, count in steps["first"].stacks.items() if "spin_in_first" in stack)
+    assert (tmp_path / "02-first.collapsed").read_text().count("spin_in_first") >= 1
+
+
+def test_profiled_without_a_profiler_just_calls(tmp_path):
+    assert profiled("noop", lambda x: x + 1)(1) == 2
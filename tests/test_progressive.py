@@ -0,0 +1,29 @@
+import time
+
+import work
+
+
+def test_progressive_deck_is_shared_before_the_rest_is_built(monkeypatch, fake_backend):
+    stream = fake_backend.stream_slide_variants
+
+    def slow_later_slides(auth_token, presentation_id, slide_id, outline, starting_slide_order, **kwargs):
+        if starting_slide_order > 0:
+            time.sleep(0.2)
+        return stream(auth_token, presentation_id, slide_id, outline, starting_slide_order, **kwargs)
+
+    monkeypatch.setattr(work, "stream_slide_variants", slow_later_slides)
+    result = work.generate_presentation("token", "https://example.com", progressive=True, dedupe_threshold=None)
+
+    calls = [call if isinstance(call, str) else call[0] for call in fake_backend.calls]
+    first_later_stream = calls.index("stream", calls.index("stream") + 1)
+    assert calls.index("share") < first_later_stream
+    assert calls.count("share") == 1
+    assert len(result["slides"]) == len(fake_backend.outlines)
+    assert result["time_to_first_view"] is not None
+    assert result["time_to_first_view"] + 0.2 <= result["total_time"]
+
+
+def test_without_progressive_the_share_link_waits_for_the_whole_deck(fake_backend):
+    result = work.generate_presentation("token", "https://example.com", dedupe_threshold=None)
+    assert fake_backend.calls[-1] == "share"
+    assert result["time_to_first_view"] is not None
@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import presentation_pool
+import service
+
+
+@pytest.fixture
+def deck_service(monkeypatch, fake_backend):
+    monkeypatch.setattr(service, "scrape_website_content", fake_backend.scrape_website_content)
+    monkeypatch.setattr(presentation_pool, "create_new_presentation", fake_backend.create_new_presentation)
+    deck_service = service.DeckService("token", concurrency=1)
+    deck_service.start()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), service.make_handler(deck_service))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield deck_service, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    deck_service.presentation_pool.stop()
+
+
+def request(base_url, path, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(base_url + path, data=data), timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_posted_job_can_be_polled_until_its_deck_is_shared(deck_service, fake_backend):
+    _, base_url = deck_service
+    status, body = request(base_url, "/jobs", {"url": " https://example.com "})
+    assert status == 202
+
+    deadline = time.monotonic() + 10
+    while True:
+        status, job = request(base_url, f"/jobs/{body['job_id']}")
+        if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert status == 200
+    assert job["status"] == "done", job
+    assert job["url"] == "https://example.com"
+    assert job["share_url"] == f"https://app.getalai.com/view/{job['presentation_id']}"
+    assert job["time_to_first_view"] is not None
+    assert request(base_url, f"/jobs/{body['job_id']}/share") == (200, {"share_url": job["share_url"], "status": "done"})
+
+
+@pytest.mark.parametrize("body", [{"url": 42}, {"url": ["https://example.com"]}, {"url": "  "}, {}, ["https://example.com"]])
+def test_post_without_a_url_string_is_rejected(deck_service, body):
+    _, base_url = deck_service
+    assert request(base_url, "/jobs", body)[0] == 400
+
+
+def test_finished_jobs_are_forgotten_after_job_ttl(monkeypatch):
+    deck_service = service.DeckService("token", job_ttl=60)
+    old_job = deck_service.submit("https://example.com/old")
+    running_job = deck_service.submit("https://example.com/running")
+    deck_service._update_job(old_job, status="done", finished_at=time.time() - 61)
+    deck_service._update_job(running_job, status="running")
+
+    deck_service.submit("https://example.com/new")
+    assert deck_service.get_job(old_job) is None
+    assert deck_service.get_job(running_job)["status"] == "running"
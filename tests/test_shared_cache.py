@@ -0,0 +1,140 @@
+import multiprocessing
+import time
+
+import shared_cache
+from shared_cache import SharedCache
+
+
+def test_get_or_compute_caches_non_empty_results(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"markdown": "# Page"}
+
+    assert cache.get_or_compute("scrape", "https://example.com", compute) == {"markdown": "# Page"}
+    assert cache.get_or_compute("scrape", "https://example.com", compute) == {"markdown": "# Page"}
+    assert len(calls) == 1
+    assert cache.get_or_compute("outline", "empty", lambda: []) == []
+    assert cache.get_or_compute("outline", "empty", lambda: ["retried"]) == ["retried"]
+
+    stats = cache.stats()
+    assert stats["scrape"]["hits"] == 1
+    assert stats["scrape"]["misses"] == 1
+    assert stats["scrape"]["hit_rate"] == 0.5
+
+
+def test_refresh_skips_the_cached_entry_and_replaces_it(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    cache.put("scrape", "https://example.com", "old page")
+
+    assert cache.get_or_compute("scrape", "https://example.com", lambda: "new page", refresh=True) == "new page"
+    assert cache.get("scrape", "https://example.com") == "new page"
+
+
+def test_max_age_skips_older_entries(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    cache.put("scrape", "https://example.com", "old page")
+    time.sleep(0.05)
+    assert cache.get_or_compute("scrape", "https://example.com", lambda: "new page", max_age=60) == "old page"
+    assert cache.get_or_compute("scrape", "https://example.com", lambda: "new page", max_age=0.01) == "new page"
+    assert cache.get("scrape", "https://example.com") == "new page"
+
+
+def test_eviction_keeps_the_cache_under_max_bytes(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"), max_bytes=2000)
+    for i in range(30):
+        cache.put("outline", str(i), "x" * 200)
+
+    stats = cache.stats()["outline"]
+    assert stats["bytes"] <= 2000
+    assert stats["evictions"] == 30 - stats["entries"]
+    assert cache.get("outline", "29") == "x" * 200
+    assert cache.get("outline", "0") is None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    cache.put("scrape", "https://example.com", "page", ttl=0.01)
+    time.sleep(0.05)
+    assert cache.get("scrape", "https://example.com") is None
+
+
+def _slow_compute(path, results):
+    cache = SharedCache(path, poll_interval=0.02)
+
+    def compute():
+        results.put("computed")
+        time.sleep(0.5)
+        return "page"
+
+    results.put(cache.get_or_compute("scrape", "https://example.com", compute))
+
+
+def test_concurrent_processes_compute_once(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SharedCache(path)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_slow_compute, args=(path, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    outputs = [results.get(timeout=5) for _ in range(5)]
+    assert outputs.count("computed") == 1
+    assert outputs.count("page") == 4
+    stats = SharedCache(path).stats()["scrape"]
+    assert stats["misses"] == 1
+    assert stats["shared"] + stats["hits"] == 3
+
+
+def test_cache_errors_fall_back_to_computing(monkeypatch):
+    def broken():
+        raise shared_cache.sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(shared_cache, "get_shared_cache", broken)
+    assert shared_cache.cached("scrape", "https://example.com", lambda: "page") == "page"
+
+
+def test_no_lease_once_the_value_has_landed(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    # Another worker stores the value between this worker's lookup and its lease attempt.
+    cache.put("scrape", "https://example.com", "page")
+    with cache._connect() as conn:
+        assert cache._acquire(conn, "scrape:https://example.com", 60) is None
+        assert cache._acquire(conn, "scrape:https://example.com", 60, fresh_after=time.time() + 1) is not None
+
+
+def test_cache_file_and_size_come_from_the_environment_when_opened(tmp_path, monkeypatch):
+    # work.py imports shared_cache before load_dotenv() runs, so the settings must not be read at import.
+    monkeypatch.setenv("SHARED_CACHE_FILE", str(tmp_path / "from_env.db"))
+    monkeypatch.setenv("SHARED_CACHE_MAX_MB", "0.5")
+
+    cache = shared_cache.get_shared_cache()
+
+    assert cache.path == str(tmp_path / "from_env.db")
+    assert cache.max_bytes == 512 * 1024
+    assert (tmp_path / "from_env.db").exists()
+
+
+def _put_entries(path, worker):
+    cache = SharedCache(path)
+    for i in range(20):
+        cache.put("calibration", f"context:{worker}-{i}", {"sample_text": f"{worker}-{i}"})
+
+
+def test_concurrent_processes_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SharedCache(path)
+    workers = [multiprocessing.Process(target=_put_entries, args=(path, worker)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    cache = SharedCache(path)
+    for worker in range(4):
+        for i in range(20):
+            assert cache.get("calibration", f"context:{worker}-{i}")["sample_text"] == f"{worker}-{i}"
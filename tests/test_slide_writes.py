@@ -0,0 +1,56 @@
+from conftest import recording
+from slide_writes import SlideWriteBuffer
+from ws_archive import WSArchive
+
+SLIDE_ID = "77407ad5-00eb-4f6a-97cf-8007ed3eacbe"
+CREATED_AT = "2025-04-07T15:37:27.711647+00:00"
+
+
+def archive_with_recording(tmp_path):
+    archive = WSArchive(str(tmp_path / "ws_archive.bin"), str(tmp_path / "ws_archive.sqlite"))
+    archive.import_file(recording("variants_ws_messages.log"))
+    return archive
+
+
+def test_writes_merge_onto_the_archived_entity(tmp_path):
+    archive = archive_with_recording(tmp_path)
+    written = []
+
+    def writer(auth_token, slide_data):
+        written.append(slide_data)
+        slide_data.setdefault("created_at", "now")
+        return {"ok": True}
+
+    with SlideWriteBuffer("token", writer=writer, loader=archive.slide_entity) as buffer:
+        buffer.update(SLIDE_ID, {"slide_instructions": "Shorter"})
+        assert buffer.barrier(timeout=5)
+        buffer.update(SLIDE_ID, {"slide_status": "DONE"})
+        assert buffer.barrier(timeout=5)
+
+    first, second = written
+    assert first["presentation_id"] == "34871a03-9e91-4199-92c3-16f6a1bf1291"
+    assert first["slide_context"].startswith("- McQueen's work")
+    assert first["slide_instructions"] == "Shorter"
+    assert first["created_at"] == second["created_at"] == CREATED_AT
+    assert second["slide_instructions"] == "Shorter" and second["slide_status"] == "DONE"
+
+
+def test_slide_without_a_known_entity_is_not_written(tmp_path):
+    archive = archive_with_recording(tmp_path)
+    written = []
+
+    with SlideWriteBuffer("token", writer=lambda token, data: written.append(data) or {},
+                          loader=archive.slide_entity) as buffer:
+        buffer.update("00000000-0000-4000-8000-000000000000", {"slide_instructions": "Shorter"})
+        assert not buffer.barrier(timeout=5)
+        assert buffer.stats()["failed"] == 1
+    assert written == []
+
+
+def test_loaded_state_keeps_created_at():
+    written = []
+    with SlideWriteBuffer("token", writer=lambda token, data: written.append(data) or {}) as buffer:
+        buffer.load(SLIDE_ID, {"created_at": CREATED_AT, "slide_order": 4})
+        buffer.update(SLIDE_ID, {"created_at": "2030-01-01T00:00:00+00:00", "slide_order": 5})
+        assert buffer.barrier(timeout=5)
+    assert written == [{"id": SLIDE_ID, "created_at": CREATED_AT, "slide_order": 5}]
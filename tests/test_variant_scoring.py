@@ -0,0 +1,78 @@
+import json
+
+from conftest import recorded_messages, recording
+from variant_scoring import EARLY_STOP_SCORE, pick_best_variant, pick_best_variants, score_variant
+import work
+
+
+def recorded_variants():
+    with open(recording("variants_ws_messages.log"), encoding="utf-8") as f:
+        messages = json.load(f)
+    return [{"variant_id": m["id"], "slide_content": m["element_slide"]} for m in messages if "element_slide" in m]
+
+
+def test_early_stop_threshold_is_reachable_by_recorded_variants():
+    scores = [score_variant(variant) for variant in recorded_variants()]
+    assert len(scores) == 4
+    assert max(scores) >= EARLY_STOP_SCORE > min(scores)
+
+
+def test_pick_best_variant_takes_the_highest_score():
+    variants = recorded_variants()
+    best = max(variants, key=score_variant)
+    assert pick_best_variant(variants) is best
+    assert pick_best_variants({"a": variants, "b": variants[:2], "c": []})["b"][0] is max(variants[:2], key=score_variant)
+
+
+def test_replayed_stream_stops_early(replay_ws):
+    replay_ws.append(recorded_messages("variants_ws_messages.log"))
+    outcome = {}
+    received = []
+    variants = work.stream_slide_variants(
+        "token", "pres1", "slide1", {"heading": "Crazy Nature"}, starting_slide_order=0,
+        score_threshold=EARLY_STOP_SCORE, on_variant=received.append, outcome=outcome, timeout=5
+    )
+
+    assert outcome["status"] == "early_stop"
+    scores = [score_variant(variant) for variant in variants]
+    assert scores[-1] >= EARLY_STOP_SCORE
+    assert all(score < EARLY_STOP_SCORE for score in scores[:-1])
+    assert len(variants) < len(recorded_variants())
+    assert received == variants
+
+
+def test_replayed_stream_without_threshold_completes(replay_ws):
+    replay_ws.append(recorded_messages("variants_ws_messages.log"))
+    outcome = {}
+    variants = work.stream_slide_variants("token", "pres1", "slide1", {"heading": "Crazy Nature"},
+                                          starting_slide_order=0, outcome=outcome, timeout=5)
+    assert outcome["status"] == "complete"
+    assert len(variants) == len(recorded_variants())
+
+
+def test_shared_connection_slides_are_scored_in_one_pass(monkeypatch, fake_backend):
+    def fake_stream_deck_variants(auth_token, presentation_id, slides, outcomes=None, **kwargs):
+        results = {}
+        for slide in slides:
+            outcome = {}
+            results[slide["slide_id"]] = fake_backend.stream_slide_variants(
+                auth_token, presentation_id, slide["slide_id"], slide["outline"], slide["slide_order"], outcome=outcome
+            )
+            outcomes[slide["slide_id"]] = outcome["status"]
+        return results
+
+    batches = []
+
+    def spy_pick_best_variants(variants_by_slide):
+        batches.append(sorted(variants_by_slide))
+        return pick_best_variants(variants_by_slide)
+
+    monkeypatch.setattr(work, "stream_deck_variants", fake_stream_deck_variants)
+    monkeypatch.setattr(work, "pick_best_variants", spy_pick_best_variants)
+    result = work.generate_presentation("token", "https://example.com", slide_connections=2, dedupe_threshold=None)
+
+    later_slides = [slide["slide_id"] for slide in result["slides"][1:]]
+    assert batches == [sorted(later_slides)]
+    best = max(recorded_variants(), key=score_variant)
+    best_index = [v["variant_id"] for v in recorded_variants()].index(best["variant_id"])
+    assert [slide["variant_id"] for slide in result["slides"][1:]] == [f"{s}-v{best_index}" for s in later_slides]
@@ -0,0 +1,27 @@
+import shutil
+
+from conftest import recording
+from ws_archive import WSArchive, extract_keys, read_recording
+
+# A slide id that appears nowhere in the recorded messages, only in the file name.
+SLIDE_ID = "5e0b1c2d-3f4a-4b5c-8d6e-7f8091a2b3c4"
+
+
+def test_slide_id_from_file_name_survives_reindex(tmp_path):
+    path = tmp_path / f"stream_variants_ws_messages_{SLIDE_ID}.log"
+    shutil.copy(recording("stream_variants_ws_messages.log"), path)
+    archive = WSArchive(str(tmp_path / "ws_archive.bin"), str(tmp_path / "ws_archive.sqlite"))
+    session_id = archive.import_file(str(path))
+    archive.import_file(recording("outline_ws_messages.log"))
+
+    assert [s["session_id"] for s in archive.lookup("slide_id", SLIDE_ID)] == [session_id]
+    assert archive.reindex() == 2
+    assert [s["session_id"] for s in archive.lookup("slide_id", SLIDE_ID)] == [session_id]
+    assert archive.read_session(session_id)["messages"] == read_recording(str(path))
+
+
+def test_keys_extracted_from_a_recorded_variants_stream():
+    keys = extract_keys(read_recording(recording("variants_ws_messages.log")))
+    assert ("slide_id", "77407ad5-00eb-4f6a-97cf-8007ed3eacbe") in keys
+    assert ("presentation_id", "34871a03-9e91-4199-92c3-16f6a1bf1291") in keys
+    assert ("variant_id", "ba887262-10fa-4429-a678-3ea6e7a77339") in keys
@@ -0,0 +1,167 @@
+import numpy as np
+
+# Feature columns extracted from a variant's element_slide tree.
+FEATURE_NAMES = [
+    "element_count",
+    "textbox_count",
+    "heading_count",
+    "container_count",
+    "image_count",
+    "row_count",
+    "total_text_length",
+    "max_text_length",
+    "mean_text_length",
+    "grid_coverage",
+]
+
+# Linear weights applied to the feature columns, in FEATURE_NAMES order.
+FEATURE_WEIGHTS = np.array([
+    0.15,   # element_count
+    0.25,   # textbox_count
+    1.50,   # heading_count
+    0.60,   # container_count
+    0.80,   # image_count
+    0.30,   # row_count
+    0.0,    # total_text_length (scored through the target band below)
+    0.0,    # max_text_length (scored through the overflow penalty below)
+    0.0,    # mean_text_length
+    1.00,   # grid_coverage
+])
+
+TARGET_TEXT_LENGTH = 600
+MAX_BOX_TEXT_LENGTH = 350
+TEXT_BAND_WEIGHT = 2.0
+OVERFLOW_WEIGHT = 1.5
+CROWDING_ELEMENT_COUNT = 12
+CROWDING_WEIGHT = 0.5
+GRID_COLUMNS = 24
+
+# A variant scoring at least this much is good enough to stop waiting for more. Calibrated on the
+# recorded variants in variants_ws_messages.log (9.11, 8.30, 9.67, 9.32): the best layouts of a
+# typical stream clear it, so most streams end before the server sends every variant.
+EARLY_STOP_SCORE = 9.5
+
+
+def _walk_elements(elements, rows, leaves, containers):
+    for item in elements or []:
+        if isinstance(item, list):
+            rows.append(item)
+            _walk_elements(item, rows, leaves, containers)
+        elif isinstance(item, dict):
+            if item.get("elements"):
+                containers.append(item)
+                _walk_elements(item["elements"], rows, leaves, containers)
+            else:
+                leaves.append(item)
+
+
+def extract_variant_features(element_slide):
+    rows, leaves, containers = [], [], []
+    if isinstance(element_slide, dict):
+        _walk_elements(element_slide.get("elements"), rows, leaves, containers)
+
+    text_lengths = [len(leaf.get("content") or "") for leaf in leaves if leaf.get("type") == "textbox"]
+    headings = [leaf for leaf in leaves if leaf.get("subtype") == "heading"]
+    images = [leaf for leaf in leaves if leaf.get("type") == "image" or "image" in str(leaf.get("subtype") or "")]
+
+    grid_columns = []
+    for row in rows:
+        row_columns = 0
+        for item in row:
+            columns = (item.get("dimensions") or {}).get("gridColumnCount") if isinstance(item, dict) else None
+            if isinstance(columns, (int, float)):
+                row_columns += columns
+        if row_columns:
+            grid_columns.append(min(row_columns, GRID_COLUMNS) / GRID_COLUMNS)
+
+    return [
+        len(leaves) + len(containers),
+        len(text_lengths),
+        len(headings),
+        len(containers),
+        len(images),
+        len(rows),
+        sum(text_lengths),
+        max(text_lengths, default=0),
+        sum(text_lengths) / len(text_lengths) if text_lengths else 0.0,
+        sum(grid_columns) / len(grid_columns) if grid_columns else 0.0,
+    ]
+
+
+def _variant_slide_content(variant):
+    if not isinstance(variant, dict):
+        return {}
+    return variant.get("slide_content") or variant.get("element_slide") or {}
+
+
+def build_feature_matrix(variants):
+    if not variants:
+        return np.zeros((0, len(FEATURE_NAMES)))
+    return np.array(
+        [extract_variant_features(_variant_slide_content(v)) for v in variants],
+        dtype=np.float64,
+    )
+
+
+def score_feature_matrix(features):
+    if features.shape[0] == 0:
+        return np.zeros(0)
+    total_text = features[:, FEATURE_NAMES.index("total_text_length")]
+    max_text = features[:, FEATURE_NAMES.index("max_text_length")]
+    element_count = features[:, FEATURE_NAMES.index("element_count")]
+
+    text_band = 1.0 - np.minimum(np.abs(total_text - TARGET_TEXT_LENGTH) / TARGET_TEXT_LENGTH, 1.0)
+    overflow = np.maximum(max_text - MAX_BOX_TEXT_LENGTH, 0) / MAX_BOX_TEXT_LENGTH
+    crowding = np.maximum(element_count - CROWDING_ELEMENT_COUNT, 0)
+
+    return (
+        features @ FEATURE_WEIGHTS
+        + TEXT_BAND_WEIGHT * text_band
+        - OVERFLOW_WEIGHT * overflow
+        - CROWDING_WEIGHT * crowding
+    )
+
+
+def score_variants(variants):
+    return score_feature_matrix(build_feature_matrix(variants))
+
+
+def score_variant(variant):
+    return float(score_variants([variant])[0])
+
+
+def pick_best_variants(variants_by_slide):
+    """Scores every variant of every slide in one pass and returns {slide_id: (variant, score)}."""
+    slide_ids = []
+    flat_variants = []
+    group_index = []
+    for slide_id, variants in variants_by_slide.items():
+        if not variants:
+            continue
+        group = len(slide_ids)
+        slide_ids.append(slide_id)
+        flat_variants.extend(variants)
+        group_index.extend([group] * len(variants))
+
+    if not flat_variants:
+        return {}
+
+    scores = score_variants(flat_variants)
+    groups = np.array(group_index)
+    # Sort by group, then by descending score; stable so earlier variants win ties.
+    order = np.lexsort((-scores, groups))
+    first_of_group = np.ones(len(order), dtype=bool)
+    first_of_group[1:] = groups[order][1:] != groups[order][:-1]
+
+    best = {}
+    for position in order[first_of_group]:
+        best[slide_ids[groups[position]]] = (flat_variants[position], float(scores[position]))
+    return best
+
+
+def pick_best_variant(variants):
+    if not variants:
+        return None
+    variant, score = pick_best_variants({None: variants})[None]
+    print(f"Selected variant {variant.get('variant_id', 'No ID')} with score {score:.2f} out of {len(variants)} variants")
+    return variant
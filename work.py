@@ -4,12 +4,36 @@ import uuid
 import os
 import time
 import threading
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
 import websocket
+from deck_stream import build_variant_request, parse_variant_message, stream_deck_variants
+from variant_scoring import EARLY_STOP_SCORE, pick_best_variant, pick_best_variants, score_variant
+from incremental import load_deck_state, save_deck_state
+from local_outline import build_local_outline, local_outline
+from outline_dedup import DEFAULT_THRESHOLD as DEDUPE_THRESHOLD, dedupe_outlines
+from outline_mapreduce import generate_outline_mapreduce
+from profiling import Profiler, carry_step, profile_step, profiled
+from boilerplate import strip_boilerplate
+from payloads import as_encoded_context, encode_payload, payload_preview, post_json_body, send_ws_payload
+from catalog import record_deck
+from shared_cache import cached, context_fingerprint, lookup, store
+from deadline import CALIBRATION_MIN_SECONDS, as_deadline
+from ws_archive import archive_session
+from events import OUTLINE_RECEIVED, SHARE_READY, SLIDE_CREATED, VARIANT_ACTIVATED, VARIANT_RECEIVED
 
 load_dotenv()
 
-def create_new_presentation(auth_token):
+# Shared across every request so connections to the backend stay warm between calls.
+http_session = requests.Session()
+http_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Runs pipeline steps that are kept off the critical path, such as calibration.
+background_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="background")
+
+def create_new_presentation(auth_token, timeout=None):
     url = "https://alai-standalone-backend.getalai.com/create-new-presentation"
     headers = {
         "Content-Type": "application/json",
@@ -25,7 +49,7 @@ def create_new_presentation(auth_token):
     }
     try:
         print(f"Creating new presentation with payload: {json.dumps(payload, indent=2)}")
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_session.post(url, headers=headers, json=payload, timeout=timeout)
         response.raise_for_status()
         presentation_data = response.json()
         print(f"Successfully created presentation! Response: {json.dumps(presentation_data, indent=2)}")
@@ -37,7 +61,7 @@ def create_new_presentation(auth_token):
             print(f"Response: {e.response.text}")
         return None
 
-def create_new_slide(auth_token, presentation_id, slide_order):
+def create_new_slide(auth_token, presentation_id, slide_order, timeout=None):
     url = "https://alai-standalone-backend.getalai.com/create-new-slide"
     headers = {
         "Content-Type": "application/json",
@@ -54,7 +78,7 @@ def create_new_slide(auth_token, presentation_id, slide_order):
     }
     try:
         print(f"Creating new slide with payload: {json.dumps(payload, indent=2)}")
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_session.post(url, headers=headers, json=payload, timeout=timeout)
         response.raise_for_status()
         slide_data = response.json()
         print(f"Successfully created slide! Response: {json.dumps(slide_data, indent=2)}")
@@ -66,12 +90,29 @@ def create_new_slide(auth_token, presentation_id, slide_order):
             print(f"Response: {e.response.text}")
         return None
 
-def generate_slides_outline(auth_token, presentation_id, topic, instructions):
+def generate_slides_outline(auth_token, presentation_id, topic, instructions, on_outline=None, slide_range="2-5", timeout=45):
+    """Outlines topic once per context across all workers (see shared_cache); other callers get the same outlines."""
+    topic = as_encoded_context(topic)
+    streamed = []
+
+    def compute():
+        streamed.append(True)
+        return stream_slides_outline(auth_token, presentation_id, topic, instructions, on_outline, slide_range, timeout)
+
+    key = context_fingerprint(f"{instructions}\n{slide_range}\n{topic.text}")
+    outlines = cached("outline", key, compute, lease_seconds=timeout + 15)
+    if outlines and on_outline and not streamed:
+        for outline in outlines:
+            on_outline(outline)
+    return outlines
+
+def stream_slides_outline(auth_token, presentation_id, topic, instructions, on_outline=None, slide_range="2-5", timeout=45):
     ws_url = f"wss://alai-standalone-backend.getalai.com/ws/generate-slides-outline?token={auth_token}"
     outlines = []
     ws_messages = []
     connection_closed = threading.Event()
     ws_error = None
+    emitted_count = [0]
 
     def on_message(ws, message):
         nonlocal ws_messages, outlines
@@ -92,6 +133,12 @@ def generate_slides_outline(auth_token, presentation_id, topic, instructions):
         except Exception as e:
             print(f"Error processing outline message: {e}")
 
+        if on_outline and emitted_count[0] < len(outlines):
+            new_outlines = outlines[emitted_count[0]:]
+            emitted_count[0] = len(outlines)
+            for outline in new_outlines:
+                on_outline(outline)
+
     def on_error(ws, error):
         nonlocal ws_error
         print(f"Outline WebSocket error: {error}")
@@ -108,13 +155,13 @@ def generate_slides_outline(auth_token, presentation_id, topic, instructions):
             "auth_token": auth_token,
             "presentation_id": presentation_id,
             "presentation_instructions": instructions,
-            "raw_context": topic,
             "slide_order": 0,
-            "slide_range": "2-5"
+            "slide_range": slide_range
         }
-        print(f"Sending outline request: {json.dumps(request_data, indent=2)}")
+        request_body = encode_payload(request_data, context=topic)
+        print(f"Sending outline request: {payload_preview(request_body)}")
         try:
-            ws.send(json.dumps(request_data))
+            send_ws_payload(ws, request_body)
         except Exception as e:
             print(f"Error sending outline request: {e}")
             on_error(ws, e)
@@ -127,12 +174,11 @@ def generate_slides_outline(auth_token, presentation_id, topic, instructions):
         on_close=on_close
     )
 
-    wst = threading.Thread(target=ws.run_forever)
+    wst = threading.Thread(target=carry_step(ws.run_forever))
     wst.daemon = True
     wst.start()
 
     print("Waiting for outline WebSocket connection to close or timeout...")
-    timeout = 45
     connection_closed.wait(timeout=timeout)
 
     if ws_error:
@@ -157,6 +203,7 @@ def generate_slides_outline(auth_token, presentation_id, topic, instructions):
         print("Outline WebSocket messages saved to outline_ws_messages.log")
     except Exception as e:
         print(f"Error saving outline WS messages: {e}")
+    archive_session(ws_messages, route="generate-slides-outline", source=presentation_id)
 
     print("\nDETAILED OUTLINES")
     for i, outline in enumerate(outlines):
@@ -167,7 +214,7 @@ def generate_slides_outline(auth_token, presentation_id, topic, instructions):
 
     return outlines
 
-def get_calibration_sample_text(auth_token, presentation_id, raw_context):
+def get_calibration_sample_text(auth_token, presentation_id, raw_context, timeout=60):
     url = "https://alai-standalone-backend.getalai.com/get-calibration-sample-text"
     headers = { 
         "Content-Type": "application/json", 
@@ -175,12 +222,12 @@ def get_calibration_sample_text(auth_token, presentation_id, raw_context):
         "Authorization": f"Bearer {auth_token}" 
     }
     payload = {
-        "presentation_id": presentation_id,
-        "raw_context": raw_context
+        "presentation_id": presentation_id
     }
+    body = encode_payload(payload, context=raw_context)
     try:
-        print(f"Requesting calibration sample text with payload: {json.dumps(payload, indent=2)}")
-        response = requests.post(url, headers=headers, json=payload)
+        print(f"Requesting calibration sample text with payload: {payload_preview(body)}")
+        response = post_json_body(http_session, url, headers, body, timeout=timeout)
         response.raise_for_status()
         calibration_data = response.json()
         print(f"Successfully retrieved calibration data: {json.dumps(calibration_data, indent=2)}")
@@ -207,7 +254,7 @@ def calibrate_verbosity(auth_token, presentation_id, original_text, verbosity_le
         payload["tone_instructions"] = tone_instructions
     try:
         print(f"Calibrating verbosity with payload: {json.dumps(payload, indent=2)}")
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_session.post(url, headers=headers, json=payload)
         response.raise_for_status()
         result = response.json()
         print(f"Successfully calibrated verbosity! Response: {json.dumps(result, indent=2)}")
@@ -219,12 +266,19 @@ def calibrate_verbosity(auth_token, presentation_id, original_text, verbosity_le
             print(f"Response: {e.response.text}")
         return None
 
-def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starting_slide_order):
+def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starting_slide_order, score_threshold=None, on_variant=None,
+                          outcome=None, timeout=120, cancel=None):
+    """Streams variants for one slide. When an outcome dict is given, outcome["status"] records how the stream
+    ended: complete, early_stop, timed_out, cancelled (the cancel event was set) or error.
+    score_threshold may be a callable; it is then re-read for every variant and while waiting, so the
+    stream ends as soon as a variant already received meets the current threshold."""
     ws_url = f"wss://alai-standalone-backend.getalai.com/ws/create-and-stream-slide-variants?token={auth_token}"
     variants = []
     ws_messages = []
     connection_closed = threading.Event()
     ws_error = None
+    seen_count = [0]
+    stopped_early = threading.Event()
 
     def on_message(ws, message):
         nonlocal ws_messages, variants
@@ -232,31 +286,32 @@ def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starti
         ws_messages.append(message)
         try:
             data = json.loads(message)
-            if isinstance(data, dict) and "variant_id" in data:
-                variants.append(data)
-            elif isinstance(data, dict) and "id" in data and "slide_id" in data:
-                variant_info = {
-                    "variant_id": data.get("id"),
-                    "slide_id": data.get("slide_id"),
-                    "slide_content": data.get("element_slide", {})
-                }
-                variants.append(variant_info)
-            elif isinstance(data, list):
-                for item in data:
-                    if isinstance(item, dict) and "id" in item:
-                        variant_info = {
-                            "variant_id": item["id"],
-                            "slide_id": item.get("slide_id", slide_id),
-                            "slide_content": item.get("element_slide", {})
-                        }
-                        variants.append(variant_info)
-            else:
+            parsed = parse_variant_message(data, slide_id)
+            if parsed is None:
                 print(f"Received message in unexpected format: {message[:100]}...")
+            else:
+                variants.extend(parsed)
         except json.JSONDecodeError as e:
             print(f"Error decoding JSON in variants WS: {e}")
         except Exception as e:
             print(f"Error processing variants message: {e}")
 
+        if seen_count[0] < len(variants):
+            new_variants = variants[seen_count[0]:]
+            seen_count[0] = len(variants)
+            for variant in new_variants:
+                if on_variant:
+                    on_variant(variant)
+                threshold = score_threshold() if callable(score_threshold) else score_threshold
+                if threshold is None:
+                    continue
+                score = score_variant(variant)
+                if score >= threshold:
+                    print(f"Variant {variant.get('variant_id')} scored {score:.2f} >= {threshold}; ending stream early.")
+                    stopped_early.set()
+                    ws.close()
+                    break
+
     def on_error(ws, error):
         nonlocal ws_error
         print(f"Variants WebSocket error: {error}")
@@ -269,18 +324,7 @@ def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starti
 
     def on_open(ws):
         print("Variants WebSocket connection opened for creating slide variants")
-        request_data = {
-            "auth_token": auth_token,
-            "presentation_id": presentation_id,
-            "slide_id": slide_id,
-            "layout_type": "AI_GENERATED_LAYOUT",
-            "images_on_slide": [],
-            "slide_specific_context": outline.get("slide_context", "ww3"),
-            "additional_instructions": "ww3",
-            "update_tone_verbosity_calibration_status": False,
-            "starting_slide_order": starting_slide_order,
-            "presentation_instructions": outline.get("slide_instructions", "")
-        }
+        request_data = build_variant_request(auth_token, presentation_id, slide_id, outline, starting_slide_order)
         print(f"Sending variants request: {json.dumps(request_data, indent=2)}")
         try:
             ws.send(json.dumps(request_data))
@@ -296,13 +340,37 @@ def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starti
         on_close=on_close
     )
 
-    wst = threading.Thread(target=ws.run_forever)
+    wst = threading.Thread(target=carry_step(ws.run_forever))
     wst.daemon = True
     wst.start()
 
     print("Waiting for variants WebSocket connection to close or timeout...")
-    timeout = 120
-    connection_closed.wait(timeout=timeout)
+    if cancel is None and not callable(score_threshold):
+        finished = connection_closed.wait(timeout=timeout)
+    else:
+        wait_until = time.monotonic() + timeout
+        finished = False
+        while not (cancel is not None and cancel.is_set()) and time.monotonic() < wait_until:
+            if connection_closed.wait(timeout=min(0.5, max(0.0, wait_until - time.monotonic()))):
+                finished = True
+                break
+            received = list(variants)
+            if callable(score_threshold) and received and not stopped_early.is_set():
+                threshold = score_threshold()
+                best = max(score_variant(variant) for variant in received)
+                if threshold is not None and best >= threshold:
+                    print(f"Best variant so far scores {best:.2f} >= {threshold}; ending stream early.")
+                    stopped_early.set()
+                    ws.close()
+    if outcome is not None:
+        if ws_error:
+            outcome["status"] = "error"
+        elif not finished and cancel is not None and cancel.is_set():
+            outcome["status"] = "cancelled"
+        elif stopped_early.is_set():
+            outcome["status"] = "early_stop"
+        else:
+            outcome["status"] = "complete" if finished else "timed_out"
 
     if ws_error:
         print("Variants generation failed due to WebSocket error.")
@@ -334,6 +402,7 @@ def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starti
         print("Variants WebSocket messages saved to variants_ws_messages.log")
     except Exception as e:
         print(f"Error saving variants WS messages: {e}")
+    archive_session(ws_messages, route="create-and-stream-slide-variants", source=slide_id)
 
     print("\n===== SLIDE VARIANTS =====")
     for i, variant in enumerate(variants):
@@ -346,7 +415,7 @@ def stream_slide_variants(auth_token, presentation_id, slide_id, outline, starti
 
     return variants
 
-def set_active_variant(auth_token, slide_id, variant_id):
+def set_active_variant(auth_token, slide_id, variant_id, timeout=None):
     url = "https://alai-standalone-backend.getalai.com/set-active-variant"
     headers = {
         "Content-Type": "application/json",
@@ -359,7 +428,7 @@ def set_active_variant(auth_token, slide_id, variant_id):
     }
     try:
         print(f"Setting active variant with payload: {json.dumps(payload, indent=2)}")
-        response = requests.post(url, headers=headers, json=payload)
+        response = http_session.post(url, headers=headers, json=payload, timeout=timeout)
         response.raise_for_status()
         result = response.json()
         print(f"Successfully set active variant! Response: {json.dumps(result, indent=2)}")
@@ -371,13 +440,102 @@ def set_active_variant(auth_token, slide_id, variant_id):
             print(f"Response: {e.response.text}")
         return None
 
+def update_slide_entity(auth_token, slide_data):
+    """Updates slide entity with new data."""
+    url = "https://alai-standalone-backend.getalai.com/update-slide-entity"
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "Authorization": f"Bearer {auth_token}"
+    }
+    
+    # Generate a unique slide ID if not provided
+    if "id" not in slide_data or not slide_data["id"]:
+        slide_data["id"] = str(uuid.uuid4())
+    
+    # Format created_at as ISO 8601 timestamp with timezone if not present
+    if "created_at" not in slide_data:
+        current_time = datetime.now(timezone.utc)
+        slide_data["created_at"] = current_time.isoformat()
+    
+    # Ensure other required fields are present
+    if "presentation_context" not in slide_data:
+        slide_data["presentation_context"] = None
+    
+    # Format slide_outline based on the expected payload format
+    # Add this field to the slide_outline object
+    if "slide_outline" in slide_data:
+        # Add image_on_slide field if it doesn't exist
+        if "image_on_slide" not in slide_data["slide_outline"]:
+            slide_data["slide_outline"]["image_on_slide"] = None
+        if "slide_context" not in slide_data["slide_outline"] and "slide_context" in slide_data:
+            slide_data["slide_outline"]["slide_context"] = slide_data["slide_context"]
+        
+        if "slide_instructions" not in slide_data["slide_outline"] and "slide_instructions" in slide_data:
+            slide_data["slide_outline"]["slide_instructions"] = slide_data["slide_instructions"]
+        
+        if "slide_id" not in slide_data["slide_outline"]:
+            slide_data["slide_outline"]["slide_id"] = slide_data["id"]
+        
+        # Rename heading to slide_title if needed
+        if "heading" in slide_data["slide_outline"]:
+            slide_data["slide_outline"]["slide_title"] = slide_data["slide_outline"].pop("heading")
+        
+        # Rename content to slide_context if needed
+        if "content" in slide_data["slide_outline"]:
+            slide_data["slide_outline"]["slide_context"] = slide_data["slide_outline"].pop("content")
+    # Create slide_outline if not present
+    elif "heading" in slide_data or "slide_context" in slide_data:
+        slide_outline_id = str(uuid.uuid4())
+        slide_data["slide_outline"] = {
+            "id": slide_outline_id,
+            "created_at": slide_data["created_at"],
+            "slide_id": slide_data["id"],
+            "slide_title": slide_data.pop("heading", "New Slide"),
+            "slide_context": slide_data.get("slide_context", ""),
+            "slide_instructions": slide_data.get("slide_instructions", "")
+        }
+    
+    try:
+        print(f"Updating slide entity with payload: {json.dumps(slide_data, indent=2)}")
+        response = http_session.post(url, headers=headers, json=slide_data)
+        response.raise_for_status()
+        result = response.json()
+        print(f"Successfully updated slide entity! Response: {json.dumps(result, indent=2)}")
+        return result
+    except requests.exceptions.RequestException as e:
+        print(f"Error updating slide entity: {e}")
+        if hasattr(e, "response") and e.response is not None:
+            print(f"Status code: {e.response.status_code}")
+            print(f"Response: {e.response.text}")
+        return None
+
 
 from firecrawl import FirecrawlApp
 
-def scrape_website_content(url):
-    firecrawl_app = FirecrawlApp(api_key='fc-61d509944b194cceb9e3e0bc0ee9e49e')
+_firecrawl_app = None
+
+def get_firecrawl_app():
+    global _firecrawl_app
+    if _firecrawl_app is None:
+        _firecrawl_app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY", 'fc-61d509944b194cceb9e3e0bc0ee9e49e'))
+    return _firecrawl_app
+
+def scrape_website_content(url, refresh=False, timeout=None, max_age=None):
+    """Scrapes url as markdown, at most once at a time across all workers (see shared_cache).
+
+    With refresh, a cached scrape is never returned and the fresh one replaces it; with max_age
+    (seconds), neither is a cached scrape older than that.
+    """
+    return cached("scrape", url, lambda: fetch_website_content(url, timeout), refresh=refresh, max_age=max_age)
+
+def fetch_website_content(url, timeout=None):
+    firecrawl_app = get_firecrawl_app()
     print(f"Scraping website: {url}")
-    response = firecrawl_app.scrape_url(url=url, params={'formats': ['markdown']})
+    params = {'formats': ['markdown']}
+    if timeout:
+        params['timeout'] = int(timeout * 1000)
+    response = firecrawl_app.scrape_url(url=url, params=params)
     if 'markdown' in response:
         content = response['markdown']
         print("Successfully scraped website content.")
@@ -386,29 +544,210 @@ def scrape_website_content(url):
         print("Markdown content not found in response; using empty context.")
         return ""
 
+def create_share_link(auth_token, presentation_id, timeout=None):
+    share_url = "https://alai-standalone-backend.getalai.com/upsert-presentation-share"
+    headers = {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "Authorization": f"Bearer {auth_token}"
+    }
+    payload = {
+        "presentation_id": presentation_id
+    }
+    try:
+        response = http_session.post(share_url, headers=headers, json=payload, timeout=timeout)
+        response.raise_for_status()
+        share_str = response.text.strip()
+        share_str = share_str.strip('"')
+        return f"https://app.getalai.com/view/{share_str}"
+    except requests.exceptions.RequestException as e:
+        print(f"Error calling presentation share endpoint: {e}")
+        if hasattr(e, "response") and e.response is not None:
+            print(f"Status code: {e.response.status_code}")
+            print(f"Response: {e.response.text}")
+        return None
 
-if __name__ == "__main__":
-    auth_token = os.getenv("AUTH_TOKEN")
-    if not auth_token:
-        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
-        exit(1)
+PROGRESSIVE_PARALLEL = 2
 
-    website_url = input("Enter the website URL to use as input context: ").strip()
-    if not website_url:
-        print("No website URL provided. Exiting.")
-        exit(1)
+PRESENTATION_INSTRUCTIONS = "Generate detailed and descriptive slides based on the provided website content."
+
+def prepare_context(website_url, scraped_content):
+    """Strips boilerplate from scraped content and encodes it once for every request that sends it."""
+    return as_encoded_context(strip_boilerplate(website_url, scraped_content))
+
+def get_calibration_sample(auth_token, presentation_id, topic, website_url):
+    """Returns {"sample_text", "default_verbosity"} for a context, or None if the API gave no sample text.
+
+    The sample only depends on the context, so it is fetched once per context across all workers and
+    styles (see shared_cache). A page without its own entry reuses a sample from another page of the
+    same domain.
+    """
+    topic = as_encoded_context(topic)
+    domain = urlparse(website_url or "").netloc.lower()
+
+    def fetch_sample():
+        by_domain = lookup("calibration", f"domain:{domain}") if domain else None
+        if by_domain:
+            print(f"Using calibration sample text from another page of {domain}.")
+            return by_domain
+        # 3. Get calibration text using scraped website content as the raw context
+        print("\nSTEP 3: GETTING CALIBRATION SAMPLE TEXT")
+        data = get_calibration_sample_text(auth_token, presentation_id, topic)
+        if not (isinstance(data, dict) and "sample_text" in data):
+            return None
+        sample = {"sample_text": data["sample_text"], "default_verbosity": data.get("verbosity_level", 3)}
+        if domain:
+            store("calibration", f"domain:{domain}", sample)
+        return sample
+
+    return cached("calibration", f"context:{context_fingerprint(topic.text)}", fetch_sample)
+
+def calibrate_presentation(auth_token, presentation_id, topic, website_url, tone="PROFESSIONAL", verbosity_level=4):
+    """Runs calibration steps 3-4, reusing a cached sample text for the same source."""
+    sample = get_calibration_sample(auth_token, presentation_id, topic, website_url)
+    if sample:
+        sample_text = sample["sample_text"]
+        default_verbosity = sample["default_verbosity"]
+    else:
+        print("Failed to get calibration sample text from API. Using fallback sample text.")
+        sample_text = ("Sample fallback text for calibration. Adjust this text as needed for verbosity calibration.")
+        default_verbosity = 3
+
+    # 4. Calibrate verbosity
+    print("\nSTEP 4: CALIBRATING VERBOSITY")
+    print(f"Attempting to calibrate to verbosity level {verbosity_level} and tone {tone}")
+    return calibrate_verbosity(auth_token, presentation_id, sample_text, verbosity_level, default_verbosity, tone)
 
-    scraped_content = scrape_website_content(website_url)
-    topic = scraped_content  # Replace with a shortened version if needed.
-    instructions = "Generate detailed and descriptive slides based on the provided website content."
+def generate_presentation(auth_token, website_url, scraped_content=None, tone="PROFESSIONAL", verbosity_level=4, presentation_pool=None, events=None,
+                          topic=None, outlines=None, presentation_data=None, slide_connections=0,
+                          fast_outline=False, progressive=False, map_reduce_outline=False,
+                          dedupe_threshold=DEDUPE_THRESHOLD, deadline=None, sources=None, cancel=None):
+    """Runs the whole pipeline for one website and returns {"presentation_id", "share_url", ...}, or None on failure.
+
+    When events (an events.PipelineEvents) is given, progress is emitted to it as it happens.
+    Callers that already hold intermediate results can pass the prepared topic (see
+    prepare_context), the outlines and a created presentation_data to skip those steps.
+    With slide_connections > 0, the variants for slides 2..n are generated over that many shared
+    WebSocket connections (see deck_stream) instead of one new connection per slide.
+    With fast_outline, well-structured pages are outlined locally from their headings (see
+    local_outline) and only poorly structured ones go to the outline WebSocket.
+    With map_reduce_outline, large sources are outlined in concurrent chunks and merged (see
+    outline_mapreduce) instead of in one outline request.
+    Near-duplicate outlines (term overlap >= dedupe_threshold, see outline_dedup) are merged
+    before any slide is created; pass dedupe_threshold=None to keep every outline.
+    With progressive, the share link is published as soon as the first slide is active and the
+    remaining slides are filled in behind it. The result reports time_to_first_view (seconds until
+    the share link existed) and total_time.
+    With deadline (seconds, or a deadline.Deadline), every step gets a share of the time left and
+    the pipeline degrades to stay inside it: local outlines, skipped or abandoned calibration,
+    fewer slides, taking the first variant, cancelling in-flight streams. A share link is still
+    published, and the result's "deadline" entry lists the degradations that were applied. When
+    the scrape had to fall back, the deck state saved for website_url (see incremental) is left as
+    it was rather than replaced by one built without the page.
+    For a deck built from several pages, sources lists their URLs and website_url is the key the
+    deck is stored under (see multi_source.source_key) rather than any one page.
+    Setting the cancel event (a threading.Event) abandons the deck: no further presentations,
+    slides or streams are started, running streams stop, no share link is published and None is
+    returned. Under a deadline, running streams follow the deadline's own cancel event instead and
+    the cancel event is checked between steps.
+    """
+    def emit(event_type, **data):
+        if events:
+            events.emit(event_type, presentation_id=presentation_id, **data)
+
+    def publish_kwargs():
+        # Publishing calls run after the deadline's cancel event may have fired, so they get the reserve.
+        return {"timeout": deadline.publish_timeout()} if deadline else {}
+
+    def cancelled(step):
+        if cancel is None or not cancel.is_set():
+            return False
+        print(f"Presentation generation cancelled before {step}.")
+        if presentation_id:
+            record_catalog("cancelled")
+        return True
+
+    presentation_id = None
+    deadline = as_deadline(deadline)
+    stream_cancel = deadline.cancel if deadline else cancel
+    if deadline:
+        # Under a deadline the share link goes out with the first slide and local outlines are tried first.
+        progressive = True
+        fast_outline = True
+    started_at = time.time()
+    time_to_first_view = None
+    slide_log = []
+
+    def log_slide(slide_id, slide_order, outline, status, variants, variant_id, stream_started):
+        slide_log.append({
+            "slide_id": slide_id,
+            "slide_order": slide_order,
+            "outline": outline,
+            "status": "no_variants" if not variants and status in (None, "complete") else status,
+            "variant_id": variant_id,
+            "variant_count": len(variants or []),
+            "variant_ids": [variant.get("variant_id") for variant in variants or []],
+            "stream_seconds": time.time() - stream_started,
+        })
+
+    def record_catalog(status, share_url=None, total_time=None):
+        record_deck({
+            "presentation_id": presentation_id,
+            "url": website_url,
+            "sources": sources,
+            "context_hash": context_fingerprint(topic.text),
+            "tone": tone,
+            "verbosity_level": verbosity_level,
+            "status": status,
+            "share_url": share_url,
+            "outline_count": len(outlines or []),
+            "slide_count": sum(1 for slide in slide_log if slide["variant_id"]),
+            "outlines": outlines,
+            "started_at": started_at,
+            "time_to_first_view": time_to_first_view,
+            "total_time": total_time,
+        }, slide_log)
+
+    scrape_degraded = False
+    if topic is None:
+        if scraped_content is None and deadline:
+            # Firecrawl gets the budget as its own timeout too, but the wait here is what bounds it.
+            budget = deadline.budget(30, 0.3)
+            scrape_future = background_executor.submit(
+                profiled("scrape", scrape_website_content), website_url, timeout=budget
+            )
+            try:
+                scraped_content = scrape_future.result(timeout=budget)
+            except Exception as e:
+                scrape_degraded = True
+                previous = load_deck_state(website_url, (tone, verbosity_level))
+                scraped_content = previous["scraped_content"] if previous else ""
+                reason = "timed out" if isinstance(e, FutureTimeoutError) else f"failed: {e}"
+                deadline.degrade("scrape_fallback",
+                                 f"scrape {reason}; using {'the previous deck' if previous else 'no page content'}")
+        if scraped_content is None:
+            scraped_content = profiled("scrape", scrape_website_content)(website_url)
+        topic = prepare_context(website_url, scraped_content)
+    elif scraped_content is None:
+        scraped_content = topic.text
+    instructions = PRESENTATION_INSTRUCTIONS
+    if cancelled("creating the presentation"):
+        return None
 
     print("Starting presentation generation process...")
 
     # 1. Create presentation
     print("\nSTEP 1: CREATE NEW PRESENTATION")
-    presentation_data = create_new_presentation(auth_token)
+    if not presentation_data and presentation_pool:
+        presentation_data = presentation_pool.acquire()
+        if presentation_data:
+            print("Using a pre-created presentation from the pool.")
+    if not presentation_data:
+        presentation_data = create_new_presentation(
+            auth_token, **({"timeout": deadline.budget(15, 0.2)} if deadline else {})
+        )
     if not presentation_data or "id" not in presentation_data:
-        exit(1)
+        return None
     presentation_id = presentation_data.get("id")
     first_slide_id = None
     if presentation_data.get("slides") and isinstance(presentation_data["slides"], list) and len(presentation_data["slides"]) > 0:
@@ -418,142 +757,363 @@ if __name__ == "__main__":
     print(f"Created presentation with ID: {presentation_id}")
     if first_slide_id:
         print(f"Detected first slide ID: {first_slide_id}")
+        emit(SLIDE_CREATED, slide_id=first_slide_id, slide_order=0)
     else:
         print("Warning: Could not detect ID of the initially created slide.")
 
+    # 3-4. Calibrate tone and verbosity concurrently with outline generation
+    calibration_future = None
+    if deadline and deadline.remaining() < CALIBRATION_MIN_SECONDS:
+        deadline.degrade("calibration_skipped", f"{deadline.remaining():.0f}s left")
+    else:
+        calibration_future = background_executor.submit(
+            profiled("calibration", calibrate_presentation), auth_token, presentation_id, topic, website_url, tone, verbosity_level
+        )
+
     # 2. Generate outlines using the website content as context
-    print(f"\n==== STEP 2: GENERATING OUTLINES FOR THE SCRAPED WEBSITE CONTENT ====")
-    outlines = generate_slides_outline(auth_token, presentation_id, topic, instructions)
+    if not outlines and fast_outline:
+        outlines = profiled("outline", local_outline)(topic.text)
+    if outlines:
+        outlines = list(outlines)
+        print(f"\n==== STEP 2: USING {len(outlines)} OUTLINES PREPARED WITHOUT THE OUTLINE WEBSOCKET ====")
+        for outline in outlines:
+            emit(OUTLINE_RECEIVED, outline=outline)
+    else:
+        print(f"\n==== STEP 2: GENERATING OUTLINES FOR THE SCRAPED WEBSITE CONTENT ====")
+        outline_func = generate_outline_mapreduce if map_reduce_outline else generate_slides_outline
+        outline_kwargs = {"timeout": deadline.budget(45, 0.35)} if deadline else {}
+        outlines = profiled("outline", outline_func)(
+            auth_token, presentation_id, topic, instructions,
+            on_outline=lambda outline: emit(OUTLINE_RECEIVED, outline=outline),
+            **outline_kwargs
+        )
+    if not outlines and deadline:
+        outlines, _, _ = build_local_outline(topic.text)
+        if outlines:
+            deadline.degrade("local_outline_fallback", "outline WebSocket returned nothing in time")
+        else:
+            outlines = [{
+                "heading": website_url,
+                "slide_context": topic.text[:1000],
+                "slide_instructions": "Summarize the page on a single slide.",
+                "images_on_slide": None,
+            }]
+            deadline.degrade("single_slide", "no outline could be built in time")
     if not outlines:
-        print("Failed to generate outlines. Check outline_ws_messages.log. Exiting.")
-        exit(1)
+        print("Failed to generate outlines. Check outline_ws_messages.log.")
+        record_catalog("failed")
+        return None
+    if cancelled("creating slides"):
+        return None
+    if dedupe_threshold is not None:
+        outlines, _ = dedupe_outlines(outlines, dedupe_threshold)
+    if deadline:
+        capacity = deadline.slide_capacity(PROGRESSIVE_PARALLEL)
+        if len(outlines) > capacity:
+            deadline.degrade("fewer_slides", f"kept {capacity} of {len(outlines)} outlines")
+            outlines = outlines[:capacity]
     print(f"\nGenerated {len(outlines)} outlines:")
     for i, outline in enumerate(outlines):
         print(f"- {outline.get('heading', f'Outline {i+1}')}")
     selected_outlines = outlines
 
-    # 3. Get calibration text using scraped website content as the raw context
-    print("\nSTEP 3: GETTING CALIBRATION SAMPLE TEXT")
-    calibration_data = get_calibration_sample_text(auth_token, presentation_id, topic)
-    sample_text = None
-    default_verbosity = 3
-    if calibration_data and isinstance(calibration_data, dict) and "sample_text" in calibration_data:
-        sample_text = calibration_data.get("sample_text")
-        default_verbosity = calibration_data.get("verbosity_level", 3)
-        print("Using sample text from API.")
-    else:
-        print("Failed to get calibration sample text from API. Using fallback sample text.")
-        sample_text = ("Sample fallback text for calibration. Adjust this text as needed for verbosity calibration.")
+    created_slide_ids = {}
 
-    # 4. Calibrate verbosity
-    print("\nSTEP 4: CALIBRATING VERBOSITY")
-    target_verbosity = 4
-    tone = "PROFESSIONAL"
-    print(f"Attempting to calibrate to verbosity level {target_verbosity} and tone {tone}")
-    verbosity_result = calibrate_verbosity(auth_token, presentation_id, sample_text, target_verbosity, default_verbosity, tone)
+    def created_slide(slide_future, slide_order):
+        # Resolved once per slide: the shared-connection path needs the ids before process_slide does.
+        if slide_order in created_slide_ids:
+            return created_slide_ids[slide_order]
+        if not deadline:
+            slide_id = slide_future.result()
+        else:
+            try:
+                slide_id = slide_future.result(timeout=deadline.budget(20))
+            except FutureTimeoutError:
+                deadline.degrade("slide_not_created", f"slide {slide_order} was not created in time")
+                slide_id = None
+        created_slide_ids[slide_order] = slide_id
+        return slide_id
+
+    # Under a deadline the early-stop score is re-read for every variant, so a stream that runs
+    # past the halfway point takes the next variant (or the best one it already has).
+    variant_threshold = (lambda: deadline.variant_threshold(EARLY_STOP_SCORE)) if deadline else EARLY_STOP_SCORE
+
+    # 3-4. Calibration was started in the background before outline generation
+    print("\nSTEPS 3-4: WAITING FOR CALIBRATION")
+    verbosity_result = None
+    if calibration_future:
+        try:
+            verbosity_result = calibration_future.result(timeout=deadline.budget(10, 0.15) if deadline else None)
+        except FutureTimeoutError:
+            deadline.degrade("calibration_abandoned", "still running when slides had to start")
     if verbosity_result:
-        print("Verbosity calibration request sent successfully.")
+        print("Verbosity calibration completed.")
     else:
         print("Verbosity calibration request failed.")
 
     # 5. Generate slide variants for the first slide
     print("\nSTEP 5: GENERATING SLIDE VARIANTS FOR FIRST SLIDE")
     if not first_slide_id:
-        print("Missing first slide ID. Cannot generate variants. Exiting.")
-        exit(1)
+        print("Missing first slide ID. Cannot generate variants.")
+        record_catalog("failed")
+        return None
+    if cancelled("the first slide"):
+        return None
     
-    variants = stream_slide_variants(
+    stream_started = time.time()
+    outcome = {}
+    variants = profiled("stream_slide_variants-0", stream_slide_variants)(
         auth_token, 
         presentation_id, 
         first_slide_id, 
         selected_outlines[0], 
-        starting_slide_order=0
+        starting_slide_order=0,
+        score_threshold=variant_threshold,
+        on_variant=lambda variant: emit(VARIANT_RECEIVED, slide_id=first_slide_id, variant=variant),
+        outcome=outcome,
+        cancel=stream_cancel,
+        **({"timeout": deadline.budget(120, 0.6)} if deadline else {})
     )
     
-    if not variants:
-        print("Failed to generate slide variants for first slide. Check variants_ws_messages.log. Exiting.")
-        exit(1)
+    variant_id = None
+    if variants:
+        variant_to_set = pick_best_variant(variants)
+        print("\nSTEP 6: SETTING ACTIVE VARIANT FOR FIRST SLIDE")
+        variant_id = variant_to_set.get("variant_id")
+    log_slide(first_slide_id, 0, selected_outlines[0], outcome.get("status"), variants, variant_id, stream_started)
 
-    # Choose the 4th variant if available, else fallback to the last variant
-    if len(variants) >= 4:
-        variant_to_set = variants[3]
-    else:
-        variant_to_set = variants[-1]
-    
-    print("\nSTEP 6: SETTING ACTIVE VARIANT FOR FIRST SLIDE")
-    variant_id = variant_to_set.get("variant_id")
-    
+    if not variants:
+        print("Failed to generate slide variants for first slide. Check variants_ws_messages.log.")
+    elif not variant_id:
+        print("Could not find variant ID in the selected variant.")
+    if not variant_id and not deadline:
+        record_catalog("failed")
+        return None
     if not variant_id:
-        print("Could not find variant ID in the selected variant. Exiting.")
-        exit(1)
-    
-    set_active_result = set_active_variant(auth_token, first_slide_id, variant_id)
-    if set_active_result:
-        print(f"Successfully set active variant {variant_id} for slide {first_slide_id}")
+        # The share link must still go out before the deadline, even for a deck without a first slide design.
+        deadline.degrade("first_slide_without_variant", outcome.get("status"))
+        slides = []
     else:
-        print("Failed to set active variant for first slide.")
+        set_active_result = set_active_variant(auth_token, first_slide_id, variant_id, **publish_kwargs())
+        if set_active_result:
+            print(f"Successfully set active variant {variant_id} for slide {first_slide_id}")
+            emit(VARIANT_ACTIVATED, slide_id=first_slide_id, variant_id=variant_id)
+        else:
+            print("Failed to set active variant for first slide.")
+        slides = [{"slide_id": first_slide_id, "slide_order": 0, "outline": selected_outlines[0], "variant_id": variant_id}]
+
+    def create_slide(slide_order):
+        if (deadline and deadline.expired()) or (cancel is not None and cancel.is_set()):
+            return None
+        return create_new_slide(auth_token, presentation_id, slide_order,
+                                **({"timeout": deadline.budget(20)} if deadline else {}))
+
+    # The remaining slides are only created once the first one has a design, so a deck that fails
+    # (or runs out of time) on its first slide leaves no empty slides behind. They are created in
+    # the background while the share link is published.
+    slide_futures = []
+    if variant_id:
+        slide_futures = [
+            background_executor.submit(carry_step(create_slide), slide_order)
+            for slide_order in range(2, len(selected_outlines) + 1)
+        ]
+
+    share_url = None
+    if cancelled("publishing the share link"):
+        return None
+    if progressive:
+        print("\nPUBLISHING SHARE LINK FOR THE FIRST SLIDE")
+        share_url = profiled("share", create_share_link)(auth_token, presentation_id, **publish_kwargs())
+        if share_url:
+            time_to_first_view = time.time() - started_at
+            print(f"Share link ready after {time_to_first_view:.1f}s: {share_url}")
+            emit(SHARE_READY, share_url=share_url, time_to_first_view=time_to_first_view)
 
     print("\nSTEP 7: PROCESSING REMAINING OUTLINES")
-    slide_order = 2
-    for outline in selected_outlines[1:]:
+    variants_by_slide = None
+    best_by_slide = {}
+    deck_outcomes = {}
+    if slide_connections and slide_futures:
+        deck_slides = []
+        for slide_order, (outline, slide_future) in enumerate(zip(selected_outlines[1:], slide_futures), start=2):
+            new_slide_id = created_slide(slide_future, slide_order)
+            if new_slide_id:
+                emit(SLIDE_CREATED, slide_id=new_slide_id, slide_order=slide_order)
+                deck_slides.append({"slide_id": new_slide_id, "outline": outline, "slide_order": slide_order})
+        print(f"Streaming variants for {len(deck_slides)} slides over {slide_connections} shared connection(s)")
+        variants_by_slide = profiled("stream_deck_variants", stream_deck_variants)(
+            auth_token,
+            presentation_id,
+            deck_slides,
+            connections=slide_connections,
+            score_threshold=variant_threshold,
+            cancel=stream_cancel,
+            **({"timeout": deadline.budget(180)} if deadline else {}),
+            on_variant=lambda slide_id, variant: emit(VARIANT_RECEIVED, slide_id=slide_id, variant=variant),
+            outcomes=deck_outcomes
+        )
+        # Every slide's variants are in hand at once, so they are all scored in one pass.
+        best_by_slide = pick_best_variants(variants_by_slide)
+
+    def process_slide(outline, slide_future, slide_order):
         print(f"\n--- Processing outline: {outline.get('heading', 'No Heading')} ---")
-        new_slide_id = create_new_slide(auth_token, presentation_id, slide_order)
+        new_slide_id = created_slide(slide_future, slide_order)
         if not new_slide_id:
             print("Failed to create new slide. Skipping to next outline.")
-            slide_order += 1
-            continue
-
-        new_variants = stream_slide_variants(
-            auth_token, 
-            presentation_id, 
-            new_slide_id, 
-            outline, 
-            starting_slide_order=slide_order
-        )
+            return None
+        if deadline and deadline.expired():
+            deadline.degrade("slide_skipped", f"slide {slide_order} was created but left empty")
+            return None
+        if cancel is not None and cancel.is_set():
+            return None
+        stream_started = time.time()
+        outcome = {}
+        if variants_by_slide is not None:
+            new_variants = variants_by_slide.get(new_slide_id)
+            outcome["status"] = deck_outcomes.get(new_slide_id)
+        else:
+            emit(SLIDE_CREATED, slide_id=new_slide_id, slide_order=slide_order)
+            new_variants = profiled(f"stream_slide_variants-{slide_order}", stream_slide_variants)(
+                auth_token, 
+                presentation_id, 
+                new_slide_id, 
+                outline, 
+                starting_slide_order=slide_order,
+                score_threshold=variant_threshold,
+                on_variant=lambda variant: emit(VARIANT_RECEIVED, slide_id=new_slide_id, variant=variant),
+                outcome=outcome,
+                cancel=stream_cancel,
+                **({"timeout": deadline.budget(120)} if deadline else {})
+            )
         if not new_variants:
             print("Failed to generate slide variants for the new slide. Skipping to next outline.")
-            slide_order += 1
-            continue
+            log_slide(new_slide_id, slide_order, outline, outcome.get("status"), new_variants, None, stream_started)
+            return None
 
-
-        if len(new_variants) >= 4:
-            variant_to_set = new_variants[3]
+        if new_slide_id in best_by_slide:
+            variant_to_set, score = best_by_slide[new_slide_id]
+            print(f"Selected variant {variant_to_set.get('variant_id', 'No ID')} with score {score:.2f} "
+                  f"out of {len(new_variants)} variants")
         else:
-            variant_to_set = new_variants[-1]
+            variant_to_set = pick_best_variant(new_variants)
         new_variant_id = variant_to_set.get("variant_id")
+        log_slide(new_slide_id, slide_order, outline, outcome.get("status"), new_variants, new_variant_id, stream_started)
         if not new_variant_id:
             print("Could not find variant ID for new slide. Skipping to next outline.")
-            slide_order += 1
-            continue
+            return None
 
-        set_active_result = set_active_variant(auth_token, new_slide_id, new_variant_id)
+        set_active_result = set_active_variant(auth_token, new_slide_id, new_variant_id, **publish_kwargs())
         if set_active_result:
             print(f"Successfully set active variant {new_variant_id} for new slide {new_slide_id}")
+            emit(VARIANT_ACTIVATED, slide_id=new_slide_id, variant_id=new_variant_id)
         else:
             print("Failed to set active variant for new slide.")
+        return {"slide_id": new_slide_id, "slide_order": slide_order, "outline": outline, "variant_id": new_variant_id}
 
-        slide_order += 1
+    remaining = [
+        (outline, slide_future, slide_order)
+        for slide_order, (outline, slide_future) in enumerate(zip(selected_outlines[1:], slide_futures), start=2)
+    ]
+    if progressive:
+        # Slides are queued in deck order, so the next slide a viewer reaches is finished first.
+        with ThreadPoolExecutor(max_workers=PROGRESSIVE_PARALLEL, thread_name_prefix="progressive") as executor:
+            slide_results = [executor.submit(carry_step(process_slide), *item) for item in remaining]
+            slide_results = [future.result() for future in slide_results]
+    else:
+        slide_results = [process_slide(*item) for item in remaining]
+    slides.extend(slide for slide in slide_results if slide)
 
+    if cancelled("publishing the deck"):
+        return None
     print("\n==== PRESENTATION GENERATION COMPLETE ====")
-    
-    share_url = "https://alai-standalone-backend.getalai.com/upsert-presentation-share"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Authorization": f"Bearer {auth_token}"
-    }
-    payload = {
-        "presentation_id": presentation_id
+
+    if scrape_degraded:
+        print("Keeping the saved deck state: this deck was built without a fresh scrape.")
+    else:
+        save_deck_state(website_url, scraped_content, presentation_id, slides, (tone, verbosity_level))
+
+    if not share_url:
+        share_url = profiled("share", create_share_link)(auth_token, presentation_id, **publish_kwargs())
+        if share_url:
+            time_to_first_view = time.time() - started_at
+            emit(SHARE_READY, share_url=share_url, time_to_first_view=time_to_first_view)
+    total_time = time.time() - started_at
+    if time_to_first_view is not None:
+        print(f"Time to first view: {time_to_first_view:.1f}s (deck complete after {total_time:.1f}s)")
+    record_catalog("complete" if len(slides) == len(selected_outlines) else "partial", share_url, total_time)
+    result = {
+        "presentation_id": presentation_id,
+        "share_url": share_url,
+        "slides": slides,
+        "time_to_first_view": time_to_first_view,
+        "total_time": total_time,
     }
+    if deadline:
+        cancelled = sum(1 for slide in slide_log if slide["status"] == "cancelled")
+        if cancelled:
+            deadline.degrade("cancelled_streams", f"{cancelled} variant streams stopped at the deadline")
+        deadline.close()
+        result["deadline"] = deadline.report()
+        print(f"Deadline report: {json.dumps(result['deadline'], indent=2)}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a presentation from a website.")
+    parser.add_argument("url", nargs="?", help="Website URL (prompted for when omitted)")
+    parser.add_argument("--fast-outline", action="store_true",
+                        help="Outline well-structured pages locally from their headings")
+    parser.add_argument("--map-reduce-outline", action="store_true",
+                        help="Outline large pages in concurrent chunks and merge the results")
+    parser.add_argument("--dedupe-threshold", type=float, default=DEDUPE_THRESHOLD,
+                        help="Merge outlines sharing at least this fraction of their terms (0-1)")
+    parser.add_argument("--no-dedupe", action="store_true", help="Keep near-duplicate outlines")
+    parser.add_argument("--slide-connections", type=int, default=0, metavar="N",
+                        help="Stream the variants of slides 2..n over N shared WebSocket connections")
+    parser.add_argument("--progressive", action="store_true",
+                        help="Publish the share link as soon as the first slide is ready")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="Publish a share link within SECONDS, degrading the deck as needed")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="Profile each pipeline step and write flame graphs to DIR (default: profiles/<timestamp>)")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="Sampling interval in seconds")
+    parser.add_argument("--profile-deterministic", action="store_true",
+                        help="Also record cProfile stats for each step's own thread")
+    args = parser.parse_args()
+
+    auth_token = os.getenv("AUTH_TOKEN")
+    if not auth_token:
+        print("AUTH_TOKEN environment variable not found. Please create a .env file with AUTH_TOKEN='your_token'")
+        exit(1)
+
+    website_url = args.url or input("Enter the website URL to use as input context: ").strip()
+    if not website_url:
+        print("No website URL provided. Exiting.")
+        exit(1)
+
+    profiler = None
+    if args.profile is not None:
+        profile_dir = args.profile or os.path.join("profiles", time.strftime("%Y%m%d-%H%M%S"))
+        profiler = Profiler(profile_dir, interval=args.profile_interval, deterministic=args.profile_deterministic).start()
     try:
-        response = requests.post(share_url, headers=headers, json=payload)
-        response.raise_for_status()
-        share_str = response.text.strip()
-        share_str = share_str.strip('"')
-        final_url = f"https://app.getalai.com/view/{share_str}"
-        print(final_url)
-    except requests.exceptions.RequestException as e:
-        print(f"Error calling presentation share endpoint: {e}")
-        if hasattr(e, "response") and e.response is not None:
-            print(f"Status code: {e.response.status_code}")
-            print(f"Response: {e.response.text}")
+        with profile_step("generate_presentation"):
+            result = generate_presentation(
+                auth_token, website_url, map_reduce_outline=args.map_reduce_outline,
+                dedupe_threshold=None if args.no_dedupe else args.dedupe_threshold,
+                deadline=args.deadline,
+                slide_connections=args.slide_connections,
+                fast_outline=args.fast_outline,
+                progressive=args.progressive
+            )
+    finally:
+        if profiler:
+            profiler.stop()
+    if not result:
+        print("Presentation generation failed. Exiting.")
+        exit(1)
+    if result["time_to_first_view"] is not None:
+        print(f"Time to first view: {result['time_to_first_view']:.1f}s of {result['total_time']:.1f}s")
+    if result["share_url"]:
+        print(result["share_url"])
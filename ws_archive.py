@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import struct
+import sys
+import time
+import uuid
+import zlib
+from contextlib import closing
+
+# Compressed, append-only archive of recorded WebSocket sessions.
+#
+# ws_archive.bin holds one record per session: b"WSA1", a 4-byte big-endian length, then the
+# zlib-compressed JSON session ({"session_id", "route", "source", "recorded_at", "keys", "messages"};
+# "keys" holds the ids that are not in the messages themselves, such as a slide id taken from the
+# recording's file name).
+# ws_archive.sqlite indexes every session by the presentation, slide and variant ids found in its
+# messages, so a lookup reads one record instead of scanning files. The index can always be
+# rebuilt from the data file with `reindex`.
+#
+#   python ws_archive.py import variants_ws_messages_raw.log stream_variants_ws_messages_*.log
+#   python ws_archive.py lookup --slide-id 77407ad5-00eb-4f6a-97cf-8007ed3eacbe
+#   python ws_archive.py export <session_id> --out session.log
+
+ARCHIVE_FILE = "ws_archive.bin"
+INDEX_FILE = "ws_archive.sqlite"
+RECORD_MAGIC = b"WSA1"
+RECORD_HEADER = struct.Struct(">4sI")
+
+UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+RECEIVED_RE = re.compile(r"^[A-Z ]*MESSAGE RECEIVED:\s*")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    route TEXT,
+    source TEXT,
+    recorded_at REAL NOT NULL,
+    message_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_keys (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    PRIMARY KEY (kind, value, session_id)
+);
+CREATE INDEX IF NOT EXISTS sessions_recorded_at ON sessions (recorded_at);
+"""
+
+
+def read_recording(path):
+    """Returns the raw messages of a recording in any of the formats the scripts have written."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    # Older recordings were written with the platform's default encoding.
+    for encoding in ("utf-8", "cp1252", "latin-1"):
+        try:
+            text = raw.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, list):
+        return [item if isinstance(item, str) else json.dumps(item) for item in data]
+    if isinstance(data, dict):
+        return [json.dumps(data)]
+
+    messages = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or set(line) == {"="}:
+            continue
+        messages.append(RECEIVED_RE.sub("", line))
+    return messages
+
+
+def guess_route(path):
+    name = os.path.basename(path)
+    if "outline" in name:
+        return "generate-slides-outline"
+    if "variants" in name:
+        return "create-and-stream-slide-variants"
+    if "slides" in name:
+        return "create-slides-from-outlines"
+    return None
+
+
+def file_name_keys(name):
+    """Ids a recording's file name carries: stream_variants_ws_messages_<slide_id>.log names its slide."""
+    name_ids = UUID_RE.findall(os.path.basename(name or ""))
+    if name_ids and "variants" in os.path.basename(name):
+        return {("slide_id", name_ids[0])}
+    return set()
+
+
+def extract_keys(messages):
+    keys = set()
+    for message in messages:
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if not isinstance(item, dict):
+                continue
+            if item.get("presentation_id"):
+                keys.add(("presentation_id", item["presentation_id"]))
+            if item.get("slide_id"):
+                keys.add(("slide_id", item["slide_id"]))
+            if item.get("variant_id"):
+                keys.add(("variant_id", item["variant_id"]))
+            if item.get("id"):
+                if "element_slide" in item:
+                    keys.add(("variant_id", item["id"]))
+                elif "slide_order" in item:
+                    keys.add(("slide_id", item["id"]))
+                elif "presentation_title" in item:
+                    keys.add(("presentation_id", item["id"]))
+            for variant in item.get("variants") or []:
+                if isinstance(variant, dict) and variant.get("id"):
+                    keys.add(("variant_id", variant["id"]))
+            # Error messages such as "Slide not found for id <uuid>" still identify the slide.
+            if isinstance(item.get("error"), str) and "slide" in item["error"].lower():
+                keys.update(("slide_id", value) for value in UUID_RE.findall(item["error"]))
+    return keys
+
+
+class WSArchive:
+    def __init__(self, archive_path=ARCHIVE_FILE, index_path=INDEX_FILE):
+        self.archive_path = archive_path
+        self.index_path = index_path
+        with closing(sqlite3.connect(self.index_path, timeout=30)) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.index_path, timeout=30, isolation_level=None))
+
+    def _index(self, conn, session, offset, length):
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, offset, length, route, source, recorded_at, message_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session["session_id"], offset, length, session.get("route"), session.get("source"),
+             session["recorded_at"], len(session["messages"])),
+        )
+        if "keys" in session:
+            extra_keys = {tuple(key) for key in session["keys"]}
+        else:
+            # Records archived before "keys" was stored: derive them from the file name again.
+            extra_keys = file_name_keys(session.get("source"))
+        keys = extract_keys(session["messages"]) | extra_keys
+        conn.executemany(
+            "INSERT OR IGNORE INTO session_keys (kind, value, session_id) VALUES (?, ?, ?)",
+            [(kind, value, session["session_id"]) for kind, value in keys],
+        )
+
+    def append(self, messages, route=None, source=None, keys=(), recorded_at=None):
+        session = {
+            "session_id": str(uuid.uuid4()),
+            "route": route,
+            "source": source,
+            "recorded_at": recorded_at or time.time(),
+            "keys": sorted(list(key) for key in keys),
+            "messages": list(messages),
+        }
+        payload = zlib.compress(json.dumps(session).encode("utf-8"), 9)
+        record = RECORD_HEADER.pack(RECORD_MAGIC, len(payload)) + payload
+        with self._connect() as conn:
+            # The index write lock also serializes appends from other processes.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                with open(self.archive_path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(record)
+                self._index(conn, session, offset, len(record))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return session["session_id"]
+
+    def import_file(self, path):
+        messages = read_recording(path)
+        return self.append(messages, route=guess_route(path), source=os.path.basename(path),
+                           keys=file_name_keys(path), recorded_at=os.path.getmtime(path))
+
+    def read_session(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT offset, length FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if not row:
+            return None
+        with open(self.archive_path, "rb") as f:
+            f.seek(row[0])
+            record = f.read(row[1])
+        magic, length = RECORD_HEADER.unpack_from(record)
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"Corrupt archive record at offset {row[0]}")
+        return json.loads(zlib.decompress(record[RECORD_HEADER.size:RECORD_HEADER.size + length]))
+
+    def lookup(self, kind=None, value=None, limit=50):
+        with self._connect() as conn:
+            if kind:
+                rows = conn.execute(
+                    "SELECT s.session_id, s.route, s.source, s.recorded_at, s.message_count FROM session_keys k "
+                    "JOIN sessions s ON s.session_id = k.session_id WHERE k.kind = ? AND k.value = ? "
+                    "ORDER BY s.recorded_at DESC LIMIT ?",
+                    (kind, value, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT session_id, route, source, recorded_at, message_count FROM sessions "
+                    "ORDER BY recorded_at DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+        return [
+            {"session_id": r[0], "route": r[1], "source": r[2], "recorded_at": r[3], "message_count": r[4]}
+            for r in rows
+        ]
+
+    def slide_entity(self, slide_id):
+        """The latest archived state of a slide entity (as sent at the start of a variants stream), or None."""
+        for summary in self.lookup("slide_id", slide_id):
+            session = self.read_session(summary["session_id"]) or {}
+            for message in reversed(session.get("messages", [])):
+                try:
+                    data = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                for item in data if isinstance(data, list) else [data]:
+                    if isinstance(item, dict) and item.get("id") == slide_id and "slide_order" in item:
+                        return item
+        return None
+
+    def reindex(self):
+        """Rebuilds the index by scanning the data file."""
+        count = 0
+        with self._connect() as conn, open(self.archive_path, "rb") as f:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM session_keys")
+            conn.execute("DELETE FROM sessions")
+            while True:
+                offset = f.tell()
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                magic, length = RECORD_HEADER.unpack(header)
+                if magic != RECORD_MAGIC:
+                    print(f"Stopping at corrupt record at offset {offset}")
+                    break
+                payload = f.read(length)
+                if len(payload) < length:
+                    print(f"Stopping at truncated record at offset {offset}")
+                    break
+                self._index(conn, json.loads(zlib.decompress(payload)), offset, RECORD_HEADER.size + length)
+                count += 1
+            conn.execute("COMMIT")
+        return count
+
+
+_default_archive = None
+
+
+def archive_session(messages, route, source=None):
+    """Appends a live session to the default archive; failures are reported but never raised."""
+    global _default_archive
+    try:
+        if _default_archive is None:
+            _default_archive = WSArchive()
+        return _default_archive.append(messages, route=route, source=source)
+    except Exception as e:
+        print(f"Error archiving {route} WebSocket session: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compressed archive of recorded WebSocket sessions.")
+    parser.add_argument("--archive", default=ARCHIVE_FILE)
+    parser.add_argument("--index", default=INDEX_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import existing recording files")
+    import_parser.add_argument("files", nargs="+")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Find sessions by id")
+    lookup_group = lookup_parser.add_mutually_exclusive_group()
+    lookup_group.add_argument("--presentation-id")
+    lookup_group.add_argument("--slide-id")
+    lookup_group.add_argument("--variant-id")
+    lookup_parser.add_argument("--limit", type=int, default=50)
+
+    export_parser = subparsers.add_parser("export", help="Write a session's messages for replay")
+    export_parser.add_argument("session_id")
+    export_parser.add_argument("--out", help="Output file (default: stdout)")
+    export_parser.add_argument("--format", choices=["raw", "json"], default="raw",
+                               help="raw: one message per line; json: the whole session")
+
+    subparsers.add_parser("reindex", help="Rebuild the index from the archive file")
+
+    args = parser.parse_args()
+    archive = WSArchive(args.archive, args.index)
+
+    if args.command == "import":
+        for path in args.files:
+            try:
+                session_id = archive.import_file(path)
+                print(f"{session_id} {path}")
+            except OSError as e:
+                print(f"Skipping {path}: {e}")
+    elif args.command == "lookup":
+        start = time.perf_counter()
+        if args.presentation_id:
+            results = archive.lookup("presentation_id", args.presentation_id, args.limit)
+        elif args.slide_id:
+            results = archive.lookup("slide_id", args.slide_id, args.limit)
+        elif args.variant_id:
+            results = archive.lookup("variant_id", args.variant_id, args.limit)
+        else:
+            results = archive.lookup(limit=args.limit)
+        print(json.dumps(results, indent=2))
+        print(f"{len(results)} sessions in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    elif args.command == "export":
+        session = archive.read_session(args.session_id)
+        if not session:
+            print(f"Unknown session {args.session_id}")
+            exit(1)
+        if args.format == "raw":
+            output = "".join(message + "\n" for message in session["messages"])
+        else:
+            output = json.dumps(session, indent=2)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(output)
+            print(f"Exported {len(session['messages'])} messages to {args.out}")
+        else:
+            sys.stdout.write(output)
+    elif args.command == "reindex":
+        print(f"Reindexed {archive.reindex()} sessions")